@@ -12,6 +12,7 @@
 #    under the License.
 
 import hashlib
+import time
 
 from oslo.config import cfg
 from oslo.serialization import jsonutils as json
@@ -20,6 +21,7 @@ import requests
 import webob
 
 from heat.api.aws import exception
+from heat.common import cache
 from heat.common.i18n import _
 from heat.common.i18n import _LE
 from heat.common.i18n import _LI
@@ -39,10 +41,21 @@ opts = [
                 default=[],
                 help=_('Allowed keystone endpoints for auth_uri when '
                        'multi_cloud is enabled. At least one endpoint needs '
-                       'to be specified.'))
+                       'to be specified.')),
+    cfg.IntOpt('cache_ttl',
+               default=10,
+               help=_('Seconds for which a request signature validated by '
+                      'keystone is accepted without validating it again. '
+                      'For this long, an identical request may be replayed, '
+                      'and a deleted or revoked credential is still '
+                      'accepted for requests already validated. Set to 0 '
+                      'to disable caching.'))
 ]
 cfg.CONF.register_opts(opts, group='ec2authtoken')
 
+# Maximum number of validated request signatures that are remembered
+VALIDATION_CACHE_SIZE = 10000
+
 
 class EC2Token(wsgi.Middleware):
     """Authenticate an EC2 request with keystone and convert to token."""
@@ -50,6 +63,10 @@ class EC2Token(wsgi.Middleware):
     def __init__(self, app, conf):
         self.conf = conf
         self.application = app
+        ttl = int(self._conf_get('cache_ttl'))
+        self.validations = cache.LRUCache(
+            maxsize=VALIDATION_CACHE_SIZE if ttl > 0 else 0, ttl=ttl)
+        self._session = None
 
     def _conf_get(self, name):
         # try config from paste-deploy first
@@ -179,13 +196,58 @@ class EC2Token(wsgi.Middleware):
                                     'headers': req.headers,
                                     'body_hash': body_hash
                                     }}
+        keystone_ec2_uri = self._conf_get_keystone_ec2_uri(auth_uri)
+
+        # The signature covers the whole request, so a request that has
+        # already been validated can be accepted again until the cached
+        # validation expires, without another round trip to keystone. Until
+        # then, replays of the request and a credential that has since been
+        # deleted or revoked are accepted too, so cache_ttl is kept short.
+        cache_key = (keystone_ec2_uri,
+                     hashlib.sha256(json.dumps(creds,
+                                               sort_keys=True)).hexdigest())
+        token_id, tenant, tenant_id, roles = self.validations.get_or_set(
+            cache_key, lambda: self._validate(keystone_ec2_uri, creds))
+
+        # Authenticated!
+        ec2_creds = {'ec2Credentials': {'access': access,
+                                        'signature': signature}}
+        req.headers['X-Auth-EC2-Creds'] = json.dumps(ec2_creds)
+        req.headers['X-Auth-Token'] = token_id
+        req.headers['X-Tenant-Name'] = tenant
+        req.headers['X-Tenant-Id'] = tenant_id
+        req.headers['X-Auth-URL'] = auth_uri
+        req.headers['X-Roles'] = ','.join(roles)
+
+        return self.application
+
+    @property
+    def session(self):
+        '''The HTTP session, and its pool of connections, used for keystone.'''
+        if self._session is None:
+            self._session = requests.Session()
+        return self._session
+
+    def _validate(self, keystone_ec2_uri, creds):
+        '''
+        Validate the EC2 credentials of a request with keystone.
+
+        Returns the token ID, tenant name, tenant ID and roles of the
+        credentials, or raises the AWS error matching the failure.
+        '''
         creds_json = json.dumps(creds)
         headers = {'Content-Type': 'application/json'}
 
-        keystone_ec2_uri = self._conf_get_keystone_ec2_uri(auth_uri)
         LOG.info(_LI('Authenticating with %s'), keystone_ec2_uri)
-        response = requests.post(keystone_ec2_uri, data=creds_json,
-                                 headers=headers)
+        start = time.time()
+        response = self.session.post(keystone_ec2_uri, data=creds_json,
+                                     headers=headers)
+        elapsed = time.time() - start
+        LOG.debug('Keystone validation took %(elapsed).3fs, %(hits)d of '
+                  '%(total)d validations served from the cache' %
+                  {'elapsed': elapsed, 'hits': self.validations.hits,
+                   'total': self.validations.hits + self.validations.misses})
+
         result = response.json()
         try:
             token_id = result['access']['token']['id']
@@ -208,20 +270,9 @@ class EC2Token(wsgi.Middleware):
             else:
                 raise exception.HeatAccessDeniedError()
 
-        # Authenticated!
-        ec2_creds = {'ec2Credentials': {'access': access,
-                                        'signature': signature}}
-        req.headers['X-Auth-EC2-Creds'] = json.dumps(ec2_creds)
-        req.headers['X-Auth-Token'] = token_id
-        req.headers['X-Tenant-Name'] = tenant
-        req.headers['X-Tenant-Id'] = tenant_id
-        req.headers['X-Auth-URL'] = auth_uri
-
         metadata = result['access'].get('metadata', {})
         roles = metadata.get('roles', [])
-        req.headers['X-Roles'] = ','.join(roles)
-
-        return self.application
+        return token_id, tenant, tenant_id, roles
 
 
 def EC2Token_filter_factory(global_conf, **local_conf):
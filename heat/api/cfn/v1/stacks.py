@@ -141,7 +141,7 @@ class StackController(object):
 
         con = req.context
         try:
-            stack_list = self.rpc_client.list_stacks(con)
+            stack_list = self.rpc_client.list_stacks(con, summary=True)
         except Exception as ex:
             return exception.map_remote_error(ex)
 
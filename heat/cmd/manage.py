@@ -18,8 +18,10 @@
 """
 
 import sys
+import time
 
 from oslo.config import cfg
+import six
 
 from heat.common.i18n import _
 from heat.db import api
@@ -29,6 +31,7 @@ from heat import version
 
 
 CONF = cfg.CONF
+CONF.import_opt('watch_data_retention', 'heat.common.config')
 
 
 def do_db_version():
@@ -48,7 +51,35 @@ def purge_deleted():
     """
     Remove database records that have been previously soft deleted
     """
-    utils.purge_deleted(CONF.command.age, CONF.command.granularity)
+    start = time.time()
+
+    def report(totals):
+        elapsed = time.time() - start
+        rate = totals['stack'] / elapsed if elapsed else 0.0
+        print(six.text_type(
+            _('Purged %(count)d stacks in %(elapsed).1f seconds '
+              '(%(rate).1f stacks per second)') % {'count': totals['stack'],
+                                                   'elapsed': elapsed,
+                                                   'rate': rate}))
+
+    totals = utils.purge_deleted(CONF.command.age, CONF.command.granularity,
+                                 CONF.command.batch_size, report)
+    for table, count in totals.items():
+        print(six.text_type(
+            _('Deleted %(count)d rows from %(table)s.') % {'count': count,
+                                                          'table': table}))
+
+
+def purge_watch_data():
+    """
+    Remove CloudWatch Lite metric samples which are no longer evaluated
+    """
+    if CONF.command.age is None:
+        age, granularity = CONF.watch_data_retention, 'seconds'
+    else:
+        age, granularity = CONF.command.age, CONF.command.granularity
+    deleted = utils.purge_watch_data(age, granularity)
+    print(six.text_type(_('Deleted %d watch data samples.') % deleted))
 
 
 def add_command_parsers(subparsers):
@@ -68,6 +99,23 @@ def add_command_parsers(subparsers):
         '-g', '--granularity', default='days',
         choices=['days', 'hours', 'minutes', 'seconds'],
         help=_('Granularity to use for age argument, defaults to days.'))
+    parser.add_argument(
+        '-b', '--batch_size', type=int,
+        help=_('Number of stacks to purge in each transaction. An '
+               'interrupted purge resumes where it left off when run '
+               'again.'))
+
+    parser = subparsers.add_parser('purge_watch_data')
+    parser.set_defaults(func=purge_watch_data)
+    parser.add_argument('age', nargs='?',
+                        help=_('How long to preserve watch data samples, '
+                               'defaults to the watch_data_retention '
+                               'option. Samples within the Period of their '
+                               'watch rule are always preserved.'))
+    parser.add_argument(
+        '-g', '--granularity', default='seconds',
+        choices=['days', 'hours', 'minutes', 'seconds'],
+        help=_('Granularity to use for age argument, defaults to seconds.'))
 
 command_opt = cfg.SubCommandOpt('command',
                                 title='Commands',
@@ -0,0 +1,147 @@
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+A simple in-process LRU cache with optional expiry of entries.
+"""
+
+import collections
+import threading
+import time
+
+
+class LRUCache(object):
+    '''
+    A dictionary-like cache holding at most maxsize entries.
+
+    When the cache is full, the least recently used entry is evicted to make
+    room for a new one. If a ttl (in seconds) is given, entries older than
+    that are treated as absent. A maxsize of 0 disables the cache entirely.
+
+    If maxweight is given, each entry is stored with a weight (for example,
+    its approximate size in bytes) and entries are also evicted while the
+    total weight of the cache exceeds maxweight.
+    '''
+
+    def __init__(self, maxsize=1000, ttl=None, timer=time.time,
+                 maxweight=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.maxweight = maxweight
+        self.weight = 0
+        self._timer = timer
+        self._data = collections.OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return self._lookup(key) is not None
+
+    def _expired(self, stored_at):
+        return self.ttl is not None and self._timer() - stored_at > self.ttl
+
+    def _lookup(self, key):
+        with self._lock:
+            try:
+                entry = self._data.pop(key)
+            except KeyError:
+                return None
+            value, stored_at, weight = entry
+            if self._expired(stored_at):
+                self.weight -= weight
+                return None
+            # Re-insert to mark as most recently used
+            self._data[key] = entry
+            return value,
+
+    def _remove(self, key):
+        value, stored_at, weight = self._data.pop(key)
+        self.weight -= weight
+
+    def get(self, key, default=None):
+        '''Return the cached value for key, or default if absent.'''
+        entry = self._lookup(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return entry[0]
+
+    def set(self, key, value, weight=1):
+        '''Store value under key, evicting the oldest entries if needed.'''
+        if self.maxsize <= 0:
+            return
+        if self.maxweight is not None and weight > self.maxweight:
+            self.invalidate(key)
+            return
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = value, self._timer(), weight
+            self.weight += weight
+            while (len(self._data) > self.maxsize or
+                   (self.maxweight is not None and
+                    self.weight > self.maxweight)):
+                self._remove(next(iter(self._data)))
+
+    def get_or_set(self, key, create):
+        '''
+        Return the cached value for key, calling create() to obtain and store
+        it if it is absent. Exceptions from create() are not cached.
+        '''
+        entry = self._lookup(key)
+        if entry is not None:
+            self.hits += 1
+            return entry[0]
+        self.misses += 1
+        value = create()
+        self.set(key, value)
+        return value
+
+    def invalidate(self, match=None):
+        '''
+        Remove entries from the cache.
+
+        With no argument, every entry is removed. Otherwise match is either a
+        key to remove or a predicate called with each key that returns True
+        for the keys to remove.
+        '''
+        with self._lock:
+            if match is None:
+                self._data.clear()
+                self.weight = 0
+            elif callable(match):
+                for key in [k for k in self._data if match(k)]:
+                    self._remove(key)
+            elif match in self._data:
+                self._remove(match)
+
+    def invalidate_items(self, match):
+        '''
+        Remove the entries for which the predicate match, called with each
+        key and value, returns True.
+        '''
+        with self._lock:
+            for key in [k for k, (v, s, w) in self._data.items()
+                        if match(k, v)]:
+                self._remove(key)
+
+    def clear(self):
+        '''Remove every entry and reset the hit and miss counters.'''
+        self.invalidate()
+        self.hits = 0
+        self.misses = 0
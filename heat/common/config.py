@@ -128,8 +128,15 @@ engine_opts = [
     cfg.IntOpt('max_events_per_stack',
                default=1000,
                help=_('Maximum events that will be available per stack. Older'
-                      ' events will be deleted when this is reached. Set to 0'
-                      ' for unlimited events per stack.')),
+                      ' events will be deleted by a periodic task once this'
+                      ' is exceeded. Set to 0 for unlimited events per'
+                      ' stack.')),
+    cfg.IntOpt('watch_data_retention',
+               default=86400,
+               help=_('Minimum age in seconds of the CloudWatch Lite metric '
+                      'samples which are kept. Samples older than both this '
+                      'and the Period of their watch rule are deleted by a '
+                      'periodic task.')),
     cfg.IntOpt('stack_action_timeout',
                default=3600,
                help=_('Timeout in seconds for stack action (ie. create or'
@@ -141,7 +148,57 @@ engine_opts = [
     cfg.IntOpt('engine_life_check_timeout',
                default=2,
                help=_('RPC timeout for the engine liveness check that is used'
-                      ' for stack locking.')),
+                      ' for stack locking, when the engine holding a lock'
+                      ' does not send heartbeats.')),
+    cfg.IntOpt('engine_heartbeat_interval',
+               default=10,
+               help=_('Seconds between the heartbeats by which an engine'
+                      ' renews the leases on the stack locks it holds.')),
+    cfg.IntOpt('stack_lock_lease_time',
+               default=60,
+               help=_('Seconds since its last heartbeat after which an engine'
+                      ' is considered dead, and the stack locks it holds may'
+                      ' be taken over by other engines.')),
+    cfg.IntOpt('lookup_cache_ttl',
+               default=60,
+               help=_('Seconds for which the IDs of images, flavors and '
+                      'networks looked up by name are cached. Set to 0 to '
+                      'disable caching.')),
+    cfg.IntOpt('lookup_cache_size',
+               default=1000,
+               help=_('Maximum number of name to ID lookups cached by each '
+                      'engine process.')),
+    cfg.IntOpt('template_cache_size',
+               default=64,
+               help=_('Maximum size in megabytes of the templates cached by '
+                      'each engine process after loading them from the '
+                      'database. Set to 0 to disable caching.')),
+    cfg.IntOpt('url_fetch_cache_ttl',
+               default=60,
+               help=_('Seconds for which data fetched from a URL, such as a '
+                      'provider template, is reused without checking with '
+                      'the server. After that it is revalidated with a '
+                      'conditional request. Set to 0 to disable caching.')),
+    cfg.IntOpt('url_fetch_cache_size',
+               default=32,
+               help=_('Maximum size in megabytes of the data fetched from '
+                      'URLs that is cached by each engine process. Set to 0 '
+                      'to disable caching.')),
+    cfg.IntOpt('template_parse_cache_size',
+               default=32,
+               help=_('Maximum size in megabytes of the template and '
+                      'environment bodies whose parsed form is cached by '
+                      'each process. Set to 0 to disable caching.')),
+    cfg.IntOpt('watch_rule_workers',
+               default=10,
+               help=_('Maximum number of CloudWatch Lite watch rules '
+                      'evaluated concurrently by an engine.')),
+    cfg.IntOpt('watch_rule_rescan_interval',
+               default=300,
+               help=_('Seconds between full re-scans of the CloudWatch Lite '
+                      'watch rules, which pick up any rules that an engine '
+                      'is not yet evaluating. New rules are picked up '
+                      'every periodic_interval in between.')),
     cfg.BoolOpt('enable_cloud_watch_lite',
                 default=True,
                 help=_('Enable the legacy OS::Heat::CWLiteAlarm resource.')),
@@ -20,6 +20,7 @@ from oslo.middleware import request_id as oslo_request_id
 from oslo.utils import importutils
 from oslo_context import context
 
+from heat.common import cache
 from heat.common import exception
 from heat.common.i18n import _LE
 from heat.common import policy
@@ -31,6 +32,26 @@ from heat.openstack.common import log as logging
 
 LOG = logging.getLogger(__name__)
 
+# Maximum number of trusts for which an authenticated plugin is kept
+TRUST_AUTH_CACHE_SIZE = 1000
+
+_trust_auth_cache = None
+
+
+def trust_auth_cache():
+    '''
+    Return the engine-wide cache of auth plugins for trust-scoped contexts,
+    keyed by trust ID, user and auth URL.
+
+    The plugins hold on to their token and service catalog and only
+    authenticate again when the token is close to expiry, so contexts that
+    act on behalf of the same trust share a single trust-scoped token.
+    '''
+    global _trust_auth_cache
+    if _trust_auth_cache is None:
+        _trust_auth_cache = cache.LRUCache(maxsize=TRUST_AUTH_CACHE_SIZE)
+    return _trust_auth_cache
+
 
 # FIXME(jamielennox): I copied this out of a review that is proposed against
 # keystoneclient which can be used when available.
@@ -170,12 +191,17 @@ class RequestContext(context.RequestContext):
             importutils.import_module('keystonemiddleware.auth_token')
             username = cfg.CONF.keystone_authtoken.admin_user
             password = cfg.CONF.keystone_authtoken.admin_password
+            auth_url = self._keystone_v3_endpoint
 
-            return v3.Password(username=username,
-                               password=password,
-                               user_domain_id='default',
-                               auth_url=self._keystone_v3_endpoint,
-                               trust_id=self.trust_id)
+            def trust_plugin():
+                return v3.Password(username=username,
+                                   password=password,
+                                   user_domain_id='default',
+                                   auth_url=auth_url,
+                                   trust_id=self.trust_id)
+
+            return trust_auth_cache().get_or_set(
+                (self.trust_id, username, auth_url), trust_plugin)
 
         if self.auth_token_info:
             auth_ref = access.AccessInfo.factory(body=self.auth_token_info,
@@ -0,0 +1,50 @@
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+A consistent hash ring, used to partition work between engines.
+"""
+
+import bisect
+import hashlib
+
+import six
+
+
+class HashRing(object):
+    '''
+    Map keys onto a set of hosts using consistent hashing.
+
+    Each host is placed on the ring at a number of pseudo-random points, so
+    that adding or removing a host only moves the keys which map to it.
+    '''
+
+    def __init__(self, hosts, replicas=100):
+        self.hosts = frozenset(hosts)
+        self._ring = {}
+        for host in self.hosts:
+            for replica in range(replicas):
+                self._ring[self._hash('%s-%d' % (host, replica))] = host
+        self._points = sorted(self._ring)
+
+    @staticmethod
+    def _hash(key):
+        key = six.text_type(key).encode('utf-8')
+        return int(hashlib.md5(key).hexdigest()[:8], 16)
+
+    def get_host(self, key):
+        '''Return the host for the given key, or None if there are none.'''
+        if not self._points:
+            return None
+        index = bisect.bisect(self._points, self._hash(key))
+        return self._ring[self._points[index % len(self._points)]]
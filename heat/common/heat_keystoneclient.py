@@ -23,6 +23,7 @@ from keystoneclient.v3 import client as kc_v3
 from oslo.config import cfg
 from oslo.utils import importutils
 
+from heat.common import cache
 from heat.common import context
 from heat.common import exception
 from heat.common.i18n import _
@@ -43,6 +44,29 @@ keystone_opts = [
 ]
 cfg.CONF.register_opts(keystone_opts)
 
+# Maximum number of distinct SSL configurations for which a session is kept
+SESSION_CACHE_SIZE = 10
+
+_session_cache = None
+
+
+def session_cache():
+    '''
+    Return the engine-wide cache of keystone sessions, keyed by their SSL
+    options. Sharing a session shares its pool of HTTP connections.
+    '''
+    global _session_cache
+    if _session_cache is None:
+        _session_cache = cache.LRUCache(maxsize=SESSION_CACHE_SIZE)
+    return _session_cache
+
+
+def get_session(ssl_options):
+    '''Return a shared keystone session using the given SSL options.'''
+    key = tuple(sorted(ssl_options.items()))
+    return session_cache().get_or_set(
+        key, lambda: session.Session.construct(ssl_options))
+
 
 class KeystoneClientV3(object):
 
@@ -73,7 +97,7 @@ class KeystoneClientV3(object):
         self._admin_client = None
         self._domain_admin_client = None
 
-        self.session = session.Session.construct(self._ssl_options())
+        self.session = get_session(self._ssl_options())
 
         if self.context.auth_url:
             self.v3_endpoint = self.context.auth_url.replace('v2.0', 'v3')
@@ -272,6 +296,7 @@ class KeystoneClientV3(object):
             self.client.trusts.delete(trust_id)
         except kc_exception.NotFound:
             pass
+        context.trust_auth_cache().invalidate(lambda k: k[0] == trust_id)
 
     def _get_username(self, username):
         if(len(username) > 64):
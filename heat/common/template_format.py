@@ -11,18 +11,26 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import copy
+import hashlib
 import itertools
 import json
 import re
+import sys
 
 from oslo.config import cfg
+from oslo.utils import encodeutils
 import six
 import yaml
 
+from heat.common import cache
 from heat.common import exception
 from heat.common.i18n import _
 
 cfg.CONF.import_opt('max_template_size', 'heat.common.config')
+cfg.CONF.import_opt('template_parse_cache_size', 'heat.common.config')
+
+_parse_cache = None
 
 if hasattr(yaml, 'CSafeLoader'):
     yaml_loader = yaml.CSafeLoader
@@ -48,7 +56,37 @@ yaml_loader.add_constructor(u'tag:yaml.org,2002:timestamp',
                             _construct_yaml_str)
 
 
-def simple_parse(tmpl_str):
+def parse_cache():
+    '''
+    Return the process-wide cache of parsed templates, keyed by a digest of
+    the template body and weighted by the size of the body.
+    '''
+    global _parse_cache
+    if _parse_cache is None:
+        maxweight = cfg.CONF.template_parse_cache_size * 1024 * 1024
+        _parse_cache = cache.LRUCache(
+            maxsize=sys.maxsize if maxweight > 0 else 0,
+            maxweight=maxweight)
+    return _parse_cache
+
+
+def _copy(data):
+    '''
+    Return a copy of a parsed structure that shares none of its containers.
+
+    This is considerably cheaper than copy.deepcopy() for the dicts, lists
+    and scalars that make up almost all parsed templates.
+    '''
+    if isinstance(data, dict):
+        return dict((k, _copy(v)) for k, v in six.iteritems(data))
+    if isinstance(data, list):
+        return [_copy(v) for v in data]
+    if data is None or isinstance(data, (six.string_types, int, float)):
+        return data
+    return copy.deepcopy(data)
+
+
+def _load(tmpl_str):
     try:
         tpl = json.loads(tmpl_str)
     except ValueError:
@@ -69,6 +107,23 @@ def simple_parse(tmpl_str):
     return tpl
 
 
+def simple_parse(tmpl_str):
+    '''
+    Takes a JSON or YAML string and returns the mapping it contains.
+
+    Parsed structures are cached by the digest of the string, so repeated
+    submissions of the same body are only parsed once. Callers always get
+    their own copy, which they are free to modify.
+    '''
+    body = encodeutils.safe_encode(tmpl_str)
+    digest = hashlib.sha256(body).hexdigest()
+    cached = parse_cache().get(digest)
+    if cached is None:
+        cached = _load(tmpl_str)
+        parse_cache().set(digest, cached, weight=len(body))
+    return _copy(cached)
+
+
 def parse(tmpl_str):
     """Takes a string and returns a dict containing the parsed structure.
 
@@ -13,25 +13,97 @@
 
 """Utility for fetching a resource (e.g. a template) from a URL."""
 
+import hashlib
+import sys
+
 from oslo.config import cfg
+from oslo.utils import timeutils
 import requests
 from requests import exceptions
 from six.moves import urllib
 
+from heat.common import cache
 from heat.common import exception
 from heat.common.i18n import _
 from heat.common.i18n import _LI
 from heat.openstack.common import log as logging
 
 cfg.CONF.import_opt('max_template_size', 'heat.common.config')
+cfg.CONF.import_opt('url_fetch_cache_ttl', 'heat.common.config')
+cfg.CONF.import_opt('url_fetch_cache_size', 'heat.common.config')
 
 LOG = logging.getLogger(__name__)
 
+# Maximum number of URLs for which the validators are remembered
+URL_CACHE_SIZE = 1000
+
+_url_cache = None
+_content_cache = None
+
 
 class URLFetchError(exception.Error, IOError):
     pass
 
 
+def url_cache():
+    '''
+    Return the engine-wide cache of the data fetched from each URL: the time
+    it was fetched, the digest of its content and the validators with which
+    to revalidate it.
+    '''
+    global _url_cache
+    if _url_cache is None:
+        enabled = cfg.CONF.url_fetch_cache_size > 0
+        _url_cache = cache.LRUCache(maxsize=URL_CACHE_SIZE if enabled else 0)
+    return _url_cache
+
+
+def content_cache():
+    '''
+    Return the engine-wide cache of fetched data, keyed by the SHA-256 digest
+    of the content so that identical data from different URLs is stored once.
+    '''
+    global _content_cache
+    if _content_cache is None:
+        maxweight = cfg.CONF.url_fetch_cache_size * 1024 * 1024
+        _content_cache = cache.LRUCache(
+            maxsize=sys.maxsize if maxweight > 0 else 0,
+            maxweight=maxweight)
+    return _content_cache
+
+
+def _read(resp):
+    # We cannot use resp.text here because it would download the
+    # entire file, and a large enough file would bring down the
+    # engine.  The 'Content-Length' header could be faked, so it's
+    # necessary to download the content in chunks to until
+    # max_template_size is reached.  The chunk_size we use needs
+    # to balance the number of chunks with accuracy (eg. it's
+    # possible to fetch 1000 bytes greater than max_template_size
+    # with a chunk_size of 1000).
+    chunks = []
+    size = 0
+    for chunk in resp.iter_content(chunk_size=1000):
+        chunks.append(chunk)
+        size += len(chunk)
+        if size > cfg.CONF.max_template_size:
+            raise URLFetchError("Template exceeds maximum allowed size (%s"
+                                " bytes)" % cfg.CONF.max_template_size)
+    return b''.join(chunks)
+
+
+def _validators(resp, default):
+    '''Return the headers with which to revalidate a response.'''
+    validators = {}
+    etag = resp.headers.get('ETag')
+    if etag:
+        validators['If-None-Match'] = etag
+    last_modified = resp.headers.get('Last-Modified')
+    if last_modified:
+        validators['If-Modified-Since'] = last_modified
+    return validators or default
+
+
 def get(url, allowed_schemes=('http', 'https')):
     """Get the data at the specified URL.
 
@@ -39,40 +111,57 @@ def get(url, allowed_schemes=('http', 'https')):
     The file: scheme is also supported if you override
     the allowed_schemes argument.
     Raise an IOError if getting the data fails.
-    """
-    LOG.info(_LI('Fetching data from %s'), url)
 
+    Data fetched over HTTP is cached, and reused for url_fetch_cache_ttl
+    seconds before being revalidated with the server using the ETag and
+    Last-Modified headers of the response. Nothing is cached if
+    url_fetch_cache_ttl is 0.
+    """
     components = urllib.parse.urlparse(url)
 
     if components.scheme not in allowed_schemes:
         raise URLFetchError(_('Invalid URL scheme %s') % components.scheme)
 
     if components.scheme == 'file':
+        LOG.info(_LI('Fetching data from %s'), url)
         try:
             return urllib.request.urlopen(url).read()
         except urllib.error.URLError as uex:
             raise URLFetchError(_('Failed to retrieve template: %s') % uex)
 
-    try:
-        resp = requests.get(url, stream=True)
-        resp.raise_for_status()
-
-        # We cannot use resp.text here because it would download the
-        # entire file, and a large enough file would bring down the
-        # engine.  The 'Content-Length' header could be faked, so it's
-        # necessary to download the content in chunks to until
-        # max_template_size is reached.  The chunk_size we use needs
-        # to balance CPU-intensive string concatenation with accuracy
-        # (eg. it's possible to fetch 1000 bytes greater than
-        # max_template_size with a chunk_size of 1000).
-        reader = resp.iter_content(chunk_size=1000)
-        result = ""
-        for chunk in reader:
-            result += chunk
-            if len(result) > cfg.CONF.max_template_size:
-                raise URLFetchError("Template exceeds maximum allowed size (%s"
-                                    " bytes)" % cfg.CONF.max_template_size)
-        return result
+    data = None
+    validators = {}
+    use_cache = cfg.CONF.url_fetch_cache_ttl > 0
+    cached = url_cache().get(url) if use_cache else None
+    if cached is not None:
+        fetched_at, digest, validators = cached
+        data = content_cache().get(digest)
+        if data is None:
+            validators = {}
+        elif not timeutils.is_older_than(fetched_at,
+                                         cfg.CONF.url_fetch_cache_ttl):
+            LOG.debug('Using cached data from %s' % url)
+            return data
 
+    LOG.info(_LI('Fetching data from %s'), url)
+    try:
+        if validators:
+            resp = requests.get(url, stream=True, headers=validators)
+        else:
+            resp = requests.get(url, stream=True)
+
+        if validators and resp.status_code == requests.codes.not_modified:
+            LOG.debug('Cached data from %s is still valid' % url)
+        else:
+            resp.raise_for_status()
+            data = _read(resp)
+            digest = hashlib.sha256(data).hexdigest()
+            validators = {}
     except exceptions.RequestException as ex:
         raise URLFetchError(_('Failed to retrieve template: %s') % ex)
+
+    if use_cache:
+        content_cache().set(digest, data, weight=len(data))
+        url_cache().set(url, (timeutils.utcnow(), digest,
+                              _validators(resp, validators)))
+    return data
@@ -88,10 +88,22 @@ def resource_create(context, values):
     return IMPL.resource_create(context, values)
 
 
+def resource_update(context, resource_id, values):
+    return IMPL.resource_update(context, resource_id, values)
+
+
+def resource_state_batch_save(context, resource_updates, events):
+    return IMPL.resource_state_batch_save(context, resource_updates, events)
+
+
 def resource_exchange_stacks(context, resource_id1, resource_id2):
     return IMPL.resource_exchange_stacks(context, resource_id1, resource_id2)
 
 
+def resource_get_all_by_stacks(context, stack_ids):
+    return IMPL.resource_get_all_by_stacks(context, stack_ids)
+
+
 def resource_get_all_by_stack(context, stack_id):
     return IMPL.resource_get_all_by_stack(context, stack_id)
 
@@ -130,10 +142,28 @@ def stack_get_all(context, limit=None, sort_keys=None, marker=None,
                               show_deleted, show_nested)
 
 
+def stack_get_all_summaries(context, limit=None, sort_keys=None,
+                            marker=None, sort_dir=None, filters=None,
+                            tenant_safe=True, show_deleted=False,
+                            show_nested=False):
+    return IMPL.stack_get_all_summaries(context, limit, sort_keys,
+                                        marker, sort_dir, filters,
+                                        tenant_safe, show_deleted,
+                                        show_nested)
+
+
+def stack_count_total_resources(context, root_stack_id):
+    return IMPL.stack_count_total_resources(context, root_stack_id)
+
+
 def stack_get_all_by_owner_id(context, owner_id):
     return IMPL.stack_get_all_by_owner_id(context, owner_id)
 
 
+def stack_get_all_by_owner_ids(context, owner_ids):
+    return IMPL.stack_get_all_by_owner_ids(context, owner_ids)
+
+
 def stack_count_all(context, filters=None, tenant_safe=True,
                     show_deleted=False, show_nested=False):
     return IMPL.stack_count_all(context, filters=filters,
@@ -162,10 +192,38 @@ def stack_lock_steal(stack_id, old_engine_id, new_engine_id):
     return IMPL.stack_lock_steal(stack_id, old_engine_id, new_engine_id)
 
 
+def stack_lock_get_engine_id(stack_id):
+    return IMPL.stack_lock_get_engine_id(stack_id)
+
+
 def stack_lock_release(stack_id, engine_id):
     return IMPL.stack_lock_release(stack_id, engine_id)
 
 
+def engine_heartbeat(engine_id, hostname):
+    return IMPL.engine_heartbeat(engine_id, hostname)
+
+
+def engine_get(engine_id):
+    return IMPL.engine_get(engine_id)
+
+
+def engine_get_heartbeat_age(engine_id):
+    return IMPL.engine_get_heartbeat_age(engine_id)
+
+
+def engine_get_all_hosts(lease_time):
+    return IMPL.engine_get_all_hosts(lease_time)
+
+
+def engine_delete(engine_id):
+    return IMPL.engine_delete(engine_id)
+
+
+def engine_purge(lease_time):
+    return IMPL.engine_purge(lease_time)
+
+
 def user_creds_create(context):
     return IMPL.user_creds_create(context)
 
@@ -214,6 +272,10 @@ def event_create(context, values):
     return IMPL.event_create(context, values)
 
 
+def event_prune(context):
+    return IMPL.event_prune(context)
+
+
 def watch_rule_get(context, watch_rule_id):
     return IMPL.watch_rule_get(context, watch_rule_id)
 
@@ -222,8 +284,8 @@ def watch_rule_get_by_name(context, watch_rule_name):
     return IMPL.watch_rule_get_by_name(context, watch_rule_name)
 
 
-def watch_rule_get_all(context):
-    return IMPL.watch_rule_get_all(context)
+def watch_rule_get_all(context, marker=None):
+    return IMPL.watch_rule_get_all(context, marker=marker)
 
 
 def watch_rule_get_all_by_stack(context, stack_id):
@@ -250,6 +312,15 @@ def watch_data_get_all(context):
     return IMPL.watch_data_get_all(context)
 
 
+def watch_data_get_all_by_watch_rule(context, watch_rule_id, since=None):
+    return IMPL.watch_data_get_all_by_watch_rule(context, watch_rule_id,
+                                                 since=since)
+
+
+def watch_data_purge(context, min_age=0):
+    return IMPL.watch_data_purge(context, min_age)
+
+
 def software_config_create(context, values):
     return IMPL.software_config_create(context, values)
 
@@ -12,12 +12,16 @@
 #    under the License.
 
 '''Implementation of SQLAlchemy backend.'''
+import collections
 import datetime
+import hashlib
+import itertools
 import sys
 
 from oslo.config import cfg
 from oslo.db.sqlalchemy import session as db_session
 from oslo.db.sqlalchemy import utils
+from oslo.utils import timeutils
 import osprofiler.sqlalchemy
 import six
 import sqlalchemy
@@ -30,12 +34,18 @@ from heat.common.i18n import _
 from heat.db.sqlalchemy import filters as db_filters
 from heat.db.sqlalchemy import migration
 from heat.db.sqlalchemy import models
+from heat.db.sqlalchemy import types as db_types
 from heat.rpc import api as rpc_api
 
 CONF = cfg.CONF
 CONF.import_opt('max_events_per_stack', 'heat.common.config')
+CONF.import_opt('event_purge_batch_size', 'heat.common.config')
 CONF.import_group('profiler', 'heat.common.config')
 
+# Number of rows fetched at a time when streaming stack summaries
+STACK_SUMMARY_BATCH_SIZE = 500
+PURGE_BATCH_SIZE = 1000
+
 _facade = None
 
 
@@ -94,9 +104,16 @@ def raw_template_get(context, template_id):
     return result
 
 
+def _raw_template_content_hash(template, files):
+    content = db_types.dumps([template, files], sort_keys=True)
+    return hashlib.sha256(content).hexdigest()
+
+
 def raw_template_create(context, values):
     raw_template_ref = models.RawTemplate()
     raw_template_ref.update(values)
+    raw_template_ref.content_hash = _raw_template_content_hash(
+        raw_template_ref.template, raw_template_ref.files)
     raw_template_ref.save(_session(context))
     return raw_template_ref
 
@@ -108,6 +125,10 @@ def raw_template_update(context, template_id, values):
                   if getattr(raw_template_ref, k) != v)
 
     if values:
+        content = dict(template=raw_template_ref.template,
+                       files=raw_template_ref.files)
+        content.update(values)
+        values['content_hash'] = _raw_template_content_hash(**content)
         raw_template_ref.update_and_save(values)
 
     return raw_template_ref
@@ -260,6 +281,91 @@ def resource_create(context, values):
     return resource_ref
 
 
+def _truncate_reason(values, key):
+    '''
+    Truncate a status reason as the model's setter would, for writes that do
+    not go through the model.
+    '''
+    if key in values:
+        values = dict(values)
+        reason = values[key]
+        values[key] = reason and reason[:255] or ''
+    return values
+
+
+def resource_update(context, resource_id, values):
+    '''Update a resource with a single UPDATE, without loading it first.'''
+    values = _truncate_reason(values, 'status_reason')
+    if 'status_reason' in values:
+        values[models.Resource._status_reason] = values.pop('status_reason')
+    return model_query(context, models.Resource).filter_by(
+        id=resource_id).update(values)
+
+
+def _events_insert(context, events):
+    '''Insert many events with a single batched INSERT.'''
+    new_counts = {}
+    for ev in events:
+        new_counts[ev['stack_id']] = new_counts.get(ev['stack_id'], 0) + 1
+
+    _session(context).execute(models.Event.__table__.insert(),
+                              [_truncate_reason(ev, 'resource_status_reason')
+                               for ev in events])
+    for stack_id, new_count in six.iteritems(new_counts):
+        _stack_event_count_add(context, stack_id, new_count)
+
+
+def resource_state_batch_save(context, resource_updates, events):
+    '''
+    Write many resource updates and events in a single transaction.
+
+    resource_updates is a dict of the values to update, keyed by resource ID.
+    Updates with the same set of columns are sent as a single batched
+    UPDATE statement, and all of the events as a batched INSERT.
+    '''
+    session = _session(context)
+    table = models.Resource.__table__
+    by_columns = {}
+    for resource_id, values in six.iteritems(resource_updates):
+        values = _truncate_reason(values, 'status_reason')
+        params = dict(values, _id=resource_id)
+        by_columns.setdefault(tuple(sorted(values)), []).append(params)
+
+    with session.begin(subtransactions=True):
+        for columns, params in six.iteritems(by_columns):
+            stmt = table.update().where(
+                table.c.id == sqlalchemy.bindparam('_id')).values(
+                    dict((c, sqlalchemy.bindparam(c)) for c in columns))
+            session.execute(stmt, params)
+        if events:
+            _events_insert(context, events)
+
+    # The updates bypassed the ORM, so refresh any loaded copies on next use
+    for resource_id in resource_updates:
+        obj = session.identity_map.get(
+            orm.util.identity_key(models.Resource, resource_id))
+        if obj is not None:
+            session.expire(obj)
+
+
+def resource_get_all_by_stacks(context, stack_ids):
+    '''
+    Return the resources of all of the given stacks as a dict, keyed by
+    stack ID, of dicts keyed by resource name.
+    '''
+    results = dict((stack_id, {}) for stack_id in stack_ids)
+    if not stack_ids:
+        return results
+    query = model_query(
+        context, models.Resource
+    ).filter(
+        models.Resource.stack_id.in_(stack_ids)
+    ).options(orm.joinedload("data"))
+    for res in query:
+        results[res.stack_id][res.name] = res
+    return results
+
+
 def resource_get_all_by_stack(context, stack_id):
     results = model_query(
         context, models.Resource
@@ -297,7 +403,7 @@ def stack_get(context, stack_id, show_deleted=False, tenant_safe=True,
               eager_load=False):
     query = model_query(context, models.Stack)
     if eager_load:
-        query = query.options(orm.joinedload("raw_template"))
+        query = query.options(_joinedload_raw_template_hash())
     result = query.get(stack_id)
 
     deleted_ok = show_deleted or context.show_deleted
@@ -313,12 +419,51 @@ def stack_get(context, stack_id, show_deleted=False, tenant_safe=True,
     return result
 
 
+def _joinedload_raw_template_hash():
+    '''
+    Join the raw template of a stack, but defer loading its contents until
+    they are accessed, so that a template found in the template cache is
+    never fetched.
+    '''
+    return orm.joinedload("raw_template").load_only("content_hash")
+
+
+def stack_count_total_resources(context, root_stack_id):
+    '''
+    Return the number of resources in the templates of all of the stacks
+    (other than backup stacks) in the tree with the given root stack.
+    '''
+    query = model_query(
+        context, sqlalchemy.func.sum(models.Stack.resource_count)
+    ).filter(
+        sqlalchemy.or_(models.Stack.id == root_stack_id,
+                       models.Stack.root_stack_id == root_stack_id)
+    ).filter_by(backup=False, deleted_at=None)
+    return query.scalar() or 0
+
+
 def stack_get_all_by_owner_id(context, owner_id):
     results = soft_delete_aware_query(
         context, models.Stack).filter_by(owner_id=owner_id).all()
     return results
 
 
+def stack_get_all_by_owner_ids(context, owner_ids):
+    '''
+    Return the stacks (other than backup stacks) owned by any of the given
+    stacks, with the content hashes of their raw templates loaded by the
+    same query.
+    '''
+    if not owner_ids:
+        return []
+    results = soft_delete_aware_query(
+        context, models.Stack
+    ).filter(
+        models.Stack.owner_id.in_(owner_ids)
+    ).filter_by(backup=False).options(_joinedload_raw_template_hash()).all()
+    return results
+
+
 def _get_sort_keys(sort_keys, mapping):
     '''Returns an array containing only whitelisted keys
 
@@ -380,6 +525,43 @@ def stack_get_all(context, limit=None, sort_keys=None, marker=None,
                                   marker, sort_dir, filters).all()
 
 
+def stack_get_all_summaries(context, limit=None, sort_keys=None,
+                            marker=None, sort_dir=None, filters=None,
+                            tenant_safe=True, show_deleted=False,
+                            show_nested=False):
+    '''
+    Return an iterator over summaries of the matching stacks.
+
+    Rather than loading Stack models, only the columns needed to list the
+    stacks are selected (together with each stack's raw template, from
+    which the description is taken), and rows are fetched in batches as
+    the iterator is consumed.
+    '''
+    query = _query_stack_get_all(context, tenant_safe,
+                                 show_deleted=show_deleted,
+                                 show_nested=show_nested)
+    query = db_filters.exact_filter(query, models.Stack, filters)
+    query = query.join(models.Stack.raw_template)
+    filters = None
+    query = _filter_and_page_query(context, query, limit, sort_keys,
+                                   marker, sort_dir, filters)
+    query = query.with_entities(
+        models.Stack.id,
+        models.Stack.name,
+        models.Stack.tenant,
+        models.Stack.username,
+        models.Stack.owner_id,
+        models.Stack.action,
+        models.Stack.status,
+        models.Stack._status_reason.label('status_reason'),
+        models.Stack.created_at,
+        models.Stack.updated_at,
+        models.Stack.timeout,
+        models.Stack.disable_rollback,
+        models.RawTemplate.template)
+    return query.yield_per(STACK_SUMMARY_BATCH_SIZE)
+
+
 def _filter_and_page_query(context, query, limit=None, sort_keys=None,
                            marker=None, sort_dir=None, filters=None):
     if filters is None:
@@ -402,7 +584,8 @@ def stack_count_all(context, filters=None, tenant_safe=True,
                                  show_deleted=show_deleted,
                                  show_nested=show_nested)
     query = db_filters.exact_filter(query, models.Stack, filters)
-    return query.count()
+    count = query.with_entities(sqlalchemy.func.count(models.Stack.id))
+    return count.scalar()
 
 
 def stack_create(context, values):
@@ -462,6 +645,12 @@ def stack_lock_steal(stack_id, old_engine_id, new_engine_id):
         return lock.engine_id if lock is not None else True
 
 
+def stack_lock_get_engine_id(stack_id):
+    lock = get_session().query(models.StackLock).get(stack_id)
+    if lock is not None:
+        return lock.engine_id
+
+
 def stack_lock_release(stack_id, engine_id):
     session = get_session()
     with session.begin():
@@ -472,6 +661,87 @@ def stack_lock_release(stack_id, engine_id):
         return True
 
 
+def _lease_expiry(session, lease_time):
+    '''
+    Return the time, by the database server's clock, before which a
+    heartbeat is more than lease_time seconds old.
+
+    Heartbeats are written and checked using only the database server's
+    clock, so that clock skew between the engines cannot make an engine
+    appear dead (or alive) to the others.
+    '''
+    now = session.query(sqlalchemy.func.now()).scalar()
+    return now - datetime.timedelta(seconds=lease_time)
+
+
+def engine_heartbeat(engine_id, hostname):
+    session = get_session()
+    with session.begin():
+        now = sqlalchemy.func.now()
+        rows_affected = session.query(
+            models.Engine
+        ).filter_by(id=engine_id).update({'heartbeat_at': now},
+                                         synchronize_session=False)
+        if not rows_affected:
+            session.add(models.Engine(id=engine_id, hostname=hostname,
+                                      heartbeat_at=now))
+
+
+def engine_get(engine_id):
+    return get_session().query(models.Engine).get(engine_id)
+
+
+def engine_get_heartbeat_age(engine_id):
+    '''
+    Return the number of seconds, by the database server's clock, since the
+    engine with the given ID last sent a heartbeat, or None if the engine is
+    not registered.
+    '''
+    result = get_session().query(
+        models.Engine.heartbeat_at, sqlalchemy.func.now()
+    ).filter_by(id=engine_id).first()
+    if result is None:
+        return None
+    heartbeat_at, now = result
+    return timeutils.delta_seconds(heartbeat_at, now)
+
+
+def engine_get_all_hosts(lease_time):
+    '''
+    Return the sorted host names of the engines that have sent a heartbeat
+    in the last lease_time seconds.
+    '''
+    session = get_session()
+    alive = _lease_expiry(session, lease_time)
+    hosts = session.query(models.Engine.hostname).filter(
+        models.Engine.heartbeat_at >= alive).distinct()
+    return sorted(host for host, in hosts)
+
+
+def engine_delete(engine_id):
+    session = get_session()
+    with session.begin():
+        session.query(models.Engine).filter_by(id=engine_id).delete()
+
+
+def engine_purge(lease_time):
+    '''
+    Delete the registrations of engines that have not sent a heartbeat in the
+    last lease_time seconds and hold no stack locks.
+    '''
+    lock_holders = sqlalchemy.select([models.StackLock.engine_id])
+    session = get_session()
+    with session.begin():
+        expired = _lease_expiry(session, lease_time)
+        return session.query(
+            models.Engine
+        ).filter(
+            models.Engine.heartbeat_at < expired
+        ).filter(
+            ~models.Engine.id.in_(lock_holders)
+        ).delete(synchronize_session=False)
+
+
 def user_creds_create(context):
     values = context.to_dict()
     user_creds_ref = models.UserCreds()
@@ -534,6 +804,28 @@ def event_get_all(context):
     return results
 
 
+def _event_list_query(query):
+    '''
+    Select only the columns needed to list events, together with the name
+    and tenant of each event's stack (which must be joined to the query),
+    rather than loading Event models.
+    '''
+    return query.with_entities(
+        models.Event.id,
+        models.Event.uuid,
+        models.Event.stack_id,
+        models.Event.created_at,
+        models.Event.resource_action,
+        models.Event.resource_status,
+        models.Event.resource_name,
+        models.Event.physical_resource_id,
+        models.Event._resource_status_reason.label('resource_status_reason'),
+        models.Event.resource_type,
+        models.Event.resource_properties,
+        models.Stack.name.label('stack_name'),
+        models.Stack.tenant.label('stack_tenant'))
+
+
 def event_get_all_by_tenant(context, limit=None, marker=None,
                             sort_keys=None, sort_dir=None, filters=None):
     query = model_query(context, models.Event)
@@ -542,8 +834,9 @@ def event_get_all_by_tenant(context, limit=None, marker=None,
         models.Event.stack
     ).filter_by(tenant=context.tenant_id).filter_by(deleted_at=None)
     filters = None
-    return _events_filter_and_page_query(context, query, limit, marker,
-                                         sort_keys, sort_dir, filters).all()
+    query = _events_filter_and_page_query(context, query, limit, marker,
+                                          sort_keys, sort_dir, filters)
+    return _event_list_query(query).all()
 
 
 def _query_all_by_stack(context, stack_id):
@@ -554,8 +847,32 @@ def _query_all_by_stack(context, stack_id):
 def event_get_all_by_stack(context, stack_id, limit=None, marker=None,
                            sort_keys=None, sort_dir=None, filters=None):
     query = _query_all_by_stack(context, stack_id)
-    return _events_filter_and_page_query(context, query, limit, marker,
-                                         sort_keys, sort_dir, filters).all()
+    query = db_filters.exact_filter(query, models.Event, filters)
+    query = query.join(models.Event.stack)
+    filters = None
+    query = _events_filter_and_page_query(context, query, limit, marker,
+                                          sort_keys, sort_dir, filters)
+    return _event_list_query(query).all()
+
+
+class _EventMarker(object):
+    '''
+    The sort key values of a marker event, as scalar subqueries.
+
+    This allows the page following the marker to be found with a single
+    seek on the sort keys, without first loading the marker event itself.
+    '''
+
+    def __init__(self, context, marker):
+        self.marker_event = orm.aliased(models.Event)
+        self.query = model_query(context, self.marker_event).filter(
+            self.marker_event.uuid == marker)
+
+    def __getattr__(self, key):
+        if key.startswith('_'):
+            raise AttributeError(key)
+        column = getattr(self.marker_event, key)
+        return self.query.with_entities(column).as_scalar()
 
 
 def _events_paginate_query(context, query, model, limit=None, sort_keys=None,
@@ -574,8 +891,7 @@ def _events_paginate_query(context, query, model, limit=None, sort_keys=None,
     if marker:
         # not to use model_query(context, model).get(marker), because
         # user can only see the ID(column 'uuid') and the ID as the marker
-        model_marker = model_query(
-            context, model).filter_by(uuid=marker).first()
+        model_marker = _EventMarker(context, marker)
     try:
         query = utils.paginate_query(query, model, limit, sort_keys,
                                      model_marker, sort_dir)
@@ -606,34 +922,72 @@ def event_count_all_by_stack(context, stack_id):
     return _query_all_by_stack(context, stack_id).count()
 
 
+def _stack_event_count_add(context, stack_id, count):
+    '''Adjust the running count of a stack's events without reading it.'''
+    model_query(context, models.Stack).filter_by(id=stack_id).update(
+        {models.Stack.event_count: models.Stack.event_count + count},
+        synchronize_session=False)
+
+
 def _delete_event_rows(context, stack_id, limit):
-    # MySQL does not support LIMIT in subqueries,
-    # sqlite does not support JOIN in DELETE.
-    # So we must manually supply the IN() values.
-    # pgsql SHOULD work with the pure DELETE/JOIN below but that must be
-    # confirmed via integration tests.
+    # MySQL does not support LIMIT in subqueries, so find the ID of the
+    # newest event to be deleted and then delete it and all older events.
     query = _query_all_by_stack(context, stack_id)
-    session = _session(context)
-    ids = [r.id for r in query.order_by(
-        models.Event.id).limit(limit).all()]
-    q = session.query(models.Event).filter(
-        models.Event.id.in_(ids))
-    return q.delete(synchronize_session='fetch')
+    last = query.with_entities(models.Event.id).order_by(
+        models.Event.id).offset(limit - 1).limit(1).first()
+    if last is not None:
+        query = query.filter(models.Event.id <= last.id)
+    return query.delete(synchronize_session=False)
 
 
 def event_create(context, values):
-    if 'stack_id' in values and cfg.CONF.max_events_per_stack:
-        if ((event_count_all_by_stack(context, values['stack_id']) >=
-             cfg.CONF.max_events_per_stack)):
-            # prune
-            _delete_event_rows(
-                context, values['stack_id'], cfg.CONF.event_purge_batch_size)
     event_ref = models.Event()
     event_ref.update(values)
-    event_ref.save(_session(context))
+    session = _session(context)
+    with session.begin(subtransactions=True):
+        event_ref.save(session)
+        if 'stack_id' in values:
+            _stack_event_count_add(context, values['stack_id'], 1)
     return event_ref
 
 
+def event_prune(context):
+    '''
+    Delete the oldest events of every stack that has more than
+    max_events_per_stack events, and return the number deleted.
+
+    The candidate stacks are found from the running event count stored with
+    each stack, so that creating an event never needs to count the events.
+    Each stack is pruned with its row locked and its events recounted, so
+    that engines pruning concurrently do not delete more than the excess,
+    and the stored count is corrected from the recount.
+    '''
+    max_events = cfg.CONF.max_events_per_stack
+    if not max_events:
+        return 0
+
+    stack_ids = model_query(context, models.Stack.id).filter(
+        models.Stack.event_count > max_events).all()
+
+    session = _session(context)
+    deleted = 0
+    for stack_id, in stack_ids:
+        with session.begin(subtransactions=True):
+            query = model_query(context, models.Stack).filter_by(id=stack_id)
+            query.with_entities(models.Stack.id).with_for_update().first()
+            event_count = event_count_all_by_stack(context, stack_id)
+            count = 0
+            if event_count > max_events:
+                count = _delete_event_rows(
+                    context, stack_id,
+                    max(event_count - max_events,
+                        cfg.CONF.event_purge_batch_size))
+            query.update({'event_count': event_count - count},
+                         synchronize_session=False)
+        deleted += count
+    return deleted
+
+
 def watch_rule_get(context, watch_rule_id):
     result = model_query(context, models.WatchRule).get(watch_rule_id)
     return result
@@ -645,9 +999,13 @@ def watch_rule_get_by_name(context, watch_rule_name):
     return result
 
 
-def watch_rule_get_all(context):
-    results = model_query(context, models.WatchRule).all()
-    return results
+def watch_rule_get_all(context, marker=None):
+    query = model_query(context, models.WatchRule).order_by(
+        models.WatchRule.id)
+    if marker is not None:
+        # Only the rules created after the marker rule
+        query = query.filter(models.WatchRule.id > marker)
+    return query.all()
 
 
 def watch_rule_get_all_by_stack(context, stack_id):
@@ -684,11 +1042,10 @@ def watch_rule_delete(context, watch_id):
                                      'msg': 'that does not exist'})
     session = orm_session.Session.object_session(wr)
 
-    for d in wr.watch_data:
-        session.delete(d)
-
-    session.delete(wr)
-    session.flush()
+    with session.begin(subtransactions=True):
+        session.query(models.WatchData).filter_by(
+            watch_rule_id=watch_id).delete(synchronize_session=False)
+        session.delete(wr)
 
 
 def watch_data_create(context, values):
@@ -703,6 +1060,54 @@ def watch_data_get_all(context):
     return results
 
 
+def watch_data_get_all_by_watch_rule(context, watch_rule_id, since=None):
+    query = model_query(context, models.WatchData).filter_by(
+        watch_rule_id=watch_rule_id)
+    if since is not None:
+        query = query.filter(models.WatchData.created_at >= since)
+    return query.order_by(models.WatchData.created_at).all()
+
+
+def watch_data_purge(context, min_age=0):
+    '''
+    Delete the watch data samples which are older than both min_age seconds
+    and the Period of their watch rule, and return the number deleted.
+
+    Watch rules are only ever evaluated over the samples within their
+    Period, so older samples are no longer used. The Period is stored in
+    the serialised rule, so the (few) rules whose Period exceeds min_age are
+    found first; the samples of all other rules are deleted by a single
+    DELETE on their age, and those of the longer rules by one DELETE per
+    distinct Period.
+    '''
+    now = timeutils.utcnow()
+    long_rules = {}
+    for wr_id, rule in model_query(context, models.WatchRule.id,
+                                   models.WatchRule.rule):
+        rule = rule or {}
+        period = int(rule.get('Period', rule.get('period', 0)))
+        if period > min_age:
+            long_rules.setdefault(period, []).append(wr_id)
+
+    def older_than(age):
+        time_line = now - datetime.timedelta(seconds=age)
+        return session.query(models.WatchData).filter(
+            models.WatchData.created_at < time_line)
+
+    session = _session(context)
+    with session.begin(subtransactions=True):
+        query = older_than(min_age)
+        long_ids = list(itertools.chain(*long_rules.values()))
+        if long_ids:
+            query = query.filter(~models.WatchData.watch_rule_id.in_(long_ids))
+        deleted = query.delete(synchronize_session=False)
+        for period, wr_ids in six.iteritems(long_rules):
+            deleted += older_than(period).filter(
+                models.WatchData.watch_rule_id.in_(wr_ids)
+            ).delete(synchronize_session=False)
+    return deleted
+
+
 def software_config_create(context, values):
     obj_ref = models.SoftwareConfig()
     obj_ref.update(values)
@@ -814,7 +1219,7 @@ def snapshot_get_all(context, stack_id):
         stack_id=stack_id, tenant=context.tenant_id)
 
 
-def purge_deleted(age, granularity='days'):
+def _age_in_seconds(age, granularity):
     try:
         age = int(age)
     except ValueError:
@@ -832,34 +1237,110 @@ def purge_deleted(age, granularity='days'):
         age = age * 3600
     elif granularity == 'minutes':
         age = age * 60
+    return age
+
+
+def _purge_stacks(session, stacks):
+    '''
+    Delete the given stacks and all of the rows that belong to them, deepest
+    dependents first, and return the number of rows deleted from each table.
+    '''
+    stack_ids = [s.id for s in stacks]
+
+    def delete(model, *criteria):
+        return session.query(model).filter(
+            *criteria).delete(synchronize_session=False)
+
+    resource_ids = sqlalchemy.select(
+        [models.Resource.id]
+    ).where(models.Resource.stack_id.in_(stack_ids))
+    watch_rule_ids = sqlalchemy.select(
+        [models.WatchRule.id]
+    ).where(models.WatchRule.stack_id.in_(stack_ids))
+
+    counts = collections.OrderedDict()
+    counts['resource_data'] = delete(
+        models.ResourceData, models.ResourceData.resource_id.in_(resource_ids))
+    counts['resource'] = delete(models.Resource,
+                                models.Resource.stack_id.in_(stack_ids))
+    counts['event'] = delete(models.Event,
+                             models.Event.stack_id.in_(stack_ids))
+    counts['watch_data'] = delete(
+        models.WatchData, models.WatchData.watch_rule_id.in_(watch_rule_ids))
+    counts['watch_rule'] = delete(models.WatchRule,
+                                  models.WatchRule.stack_id.in_(stack_ids))
+    counts['snapshot'] = delete(models.Snapshot,
+                                models.Snapshot.stack_id.in_(stack_ids))
+    counts['stack_lock'] = delete(models.StackLock,
+                                  models.StackLock.stack_id.in_(stack_ids))
+    counts['stack'] = delete(models.Stack, models.Stack.id.in_(stack_ids))
+
+    # Templates, credentials and projects may be shared with stacks that
+    # remain (e.g. nested stacks share the credentials of their parent), so
+    # only delete those that no stack refers to any longer
+    def delete_unreferenced(model, column, stack_column):
+        values = set(getattr(s, stack_column.key) for s in stacks)
+        values.discard(None)
+        if not values:
+            return 0
+        referenced = sqlalchemy.select(
+            [stack_column]).where(stack_column.isnot(None))
+        return delete(model, column.in_(values), ~column.in_(referenced))
+
+    counts['software_deployment'] = delete_unreferenced(
+        models.SoftwareDeployment,
+        models.SoftwareDeployment.stack_user_project_id,
+        models.Stack.stack_user_project_id)
+    counts['raw_template'] = delete_unreferenced(
+        models.RawTemplate, models.RawTemplate.id,
+        models.Stack.raw_template_id)
+    counts['user_creds'] = delete_unreferenced(
+        models.UserCreds, models.UserCreds.id, models.Stack.user_creds_id)
+    return counts
+
+
+def purge_deleted(age, granularity='days', batch_size=None, progress=None):
+    '''
+    Delete the stacks that were soft deleted more than age ago, together with
+    all of their resources, resource data, events, watch rules, snapshots and
+    locks, and the templates, credentials and software deployments that no
+    remaining stack uses. Return the number of rows deleted from each table.
+
+    The stacks are purged batch_size (by default PURGE_BATCH_SIZE) at a time,
+    each batch in a single transaction, so that no locks are held for long
+    and an interrupted purge can simply be run again to resume. If given,
+    progress is called after each batch with the running totals.
+    '''
+    age = _age_in_seconds(age, granularity)
+    if batch_size is None:
+        batch_size = PURGE_BATCH_SIZE
+    elif batch_size <= 0:
+        raise exception.Error(_("batch size should be a positive integer"))
 
     time_line = datetime.datetime.now() - datetime.timedelta(seconds=age)
-    engine = get_engine()
-    meta = sqlalchemy.MetaData()
-    meta.bind = engine
-
-    stack = sqlalchemy.Table('stack', meta, autoload=True)
-    event = sqlalchemy.Table('event', meta, autoload=True)
-    raw_template = sqlalchemy.Table('raw_template', meta, autoload=True)
-    user_creds = sqlalchemy.Table('user_creds', meta, autoload=True)
-
-    stmt = sqlalchemy.select(
-        [stack.c.id,
-         stack.c.raw_template_id,
-         stack.c.user_creds_id]
-    ).where(stack.c.deleted_at < time_line)
-    deleted_stacks = engine.execute(stmt)
-
-    for s in deleted_stacks:
-        event_del = event.delete().where(event.c.stack_id == s[0])
-        engine.execute(event_del)
-        stack_del = stack.delete().where(stack.c.id == s[0])
-        engine.execute(stack_del)
-        raw_template_del = raw_template.delete().where(
-            raw_template.c.id == s[1])
-        engine.execute(raw_template_del)
-        user_creds_del = user_creds.delete().where(user_creds.c.id == s[2])
-        engine.execute(user_creds_del)
+    session = get_session()
+    totals = collections.OrderedDict()
+    while True:
+        with session.begin():
+            stacks = session.query(
+                models.Stack.id, models.Stack.raw_template_id,
+                models.Stack.user_creds_id, models.Stack.stack_user_project_id
+            ).filter(
+                models.Stack.deleted_at < time_line
+            ).limit(batch_size).all()
+            if not stacks:
+                break
+            counts = _purge_stacks(session, stacks)
+
+        for table, count in counts.items():
+            totals[table] = totals.get(table, 0) + count
+        if progress is not None:
+            progress(totals)
+    return totals
+
+
+def purge_watch_data(age, granularity='seconds'):
+    return watch_data_purge(None, _age_in_seconds(age, granularity))
 
 
 def db_sync(engine, version=None):
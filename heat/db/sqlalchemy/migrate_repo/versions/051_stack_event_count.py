@@ -0,0 +1,36 @@
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import sqlalchemy
+
+
+def upgrade(migrate_engine):
+    meta = sqlalchemy.MetaData(bind=migrate_engine)
+
+    stack = sqlalchemy.Table('stack', meta, autoload=True)
+    event = sqlalchemy.Table('event', meta, autoload=True)
+    event_count = sqlalchemy.Column('event_count', sqlalchemy.Integer,
+                                    server_default='0')
+    event_count.create(stack)
+
+    count = sqlalchemy.select(
+        [sqlalchemy.func.count(event.c.id)]
+    ).where(event.c.stack_id == stack.c.id).as_scalar()
+    migrate_engine.execute(stack.update().values(event_count=count))
+
+
+def downgrade(migrate_engine):
+    meta = sqlalchemy.MetaData(bind=migrate_engine)
+
+    stack = sqlalchemy.Table('stack', meta, autoload=True)
+    stack.c.event_count.drop()
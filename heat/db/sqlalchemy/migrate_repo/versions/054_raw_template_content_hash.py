@@ -0,0 +1,45 @@
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import hashlib
+import json
+
+import sqlalchemy
+
+
+def upgrade(migrate_engine):
+    meta = sqlalchemy.MetaData(bind=migrate_engine)
+
+    raw_template = sqlalchemy.Table('raw_template', meta, autoload=True)
+    content_hash = sqlalchemy.Column('content_hash', sqlalchemy.String(64),
+                                     nullable=True)
+    content_hash.create(raw_template)
+
+    # Hash the existing templates the same way raw_template_create() does
+    rows = migrate_engine.execute(sqlalchemy.select(
+        [raw_template.c.id, raw_template.c.template, raw_template.c.files]))
+    for row in rows.fetchall():
+        template = json.loads(row.template) if row.template else None
+        files = json.loads(row.files) if row.files else None
+        content = json.dumps([template, files], sort_keys=True)
+        migrate_engine.execute(
+            raw_template.update().where(
+                raw_template.c.id == row.id
+            ).values(content_hash=hashlib.sha256(content).hexdigest()))
+
+
+def downgrade(migrate_engine):
+    meta = sqlalchemy.MetaData(bind=migrate_engine)
+
+    raw_template = sqlalchemy.Table('raw_template', meta, autoload=True)
+    raw_template.c.content_hash.drop()
@@ -0,0 +1,73 @@
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+
+import sqlalchemy
+
+
+def upgrade(migrate_engine):
+    meta = sqlalchemy.MetaData(bind=migrate_engine)
+
+    stack = sqlalchemy.Table('stack', meta, autoload=True)
+    root_stack_id = sqlalchemy.Column('root_stack_id',
+                                      sqlalchemy.String(36),
+                                      nullable=True)
+    root_stack_id.create(stack)
+    index = sqlalchemy.Index('ix_stack_root_stack_id',
+                             stack.c.root_stack_id)
+    index.create(migrate_engine)
+    resource_count = sqlalchemy.Column('resource_count', sqlalchemy.Integer,
+                                       nullable=True)
+    resource_count.create(stack)
+
+    raw_template = sqlalchemy.Table('raw_template', meta, autoload=True)
+
+    def get_stacks(owner_id):
+        stmt = sqlalchemy.select(
+            [stack.c.id, raw_template.c.template]
+        ).where(stack.c.raw_template_id == raw_template.c.id
+                ).where(stack.c.owner_id == owner_id)
+        return migrate_engine.execute(stmt).fetchall()
+
+    def set_root_stack_id(st, root_stack_id):
+        template = json.loads(st.template) if st.template else {}
+        resources = template.get('resources', template.get('Resources'))
+        values = {'root_stack_id': root_stack_id,
+                  'resource_count': len(resources or {})}
+        update = stack.update().where(stack.c.id == st.id).values(values)
+        migrate_engine.execute(update)
+
+        # Recurse down the tree
+        for ch in get_stacks(owner_id=st.id):
+            set_root_stack_id(ch, root_stack_id or st.id)
+
+    # Iterate over all top-level non nested stacks
+    for st in get_stacks(owner_id=None):
+        set_root_stack_id(st, None)
+
+
+def downgrade(migrate_engine):
+    meta = sqlalchemy.MetaData(bind=migrate_engine)
+
+    stack = sqlalchemy.Table('stack', meta, autoload=True)
+    index = sqlalchemy.Index('ix_stack_root_stack_id',
+                             stack.c.root_stack_id)
+    index.drop(migrate_engine)
+
+    # Reload the table so that dropping the columns does not try to drop
+    # the index again
+    meta = sqlalchemy.MetaData(bind=migrate_engine)
+    stack = sqlalchemy.Table('stack', meta, autoload=True)
+    stack.c.resource_count.drop()
+    stack.c.root_stack_id.drop()
@@ -107,12 +107,15 @@ class RawTemplate(BASE, HeatBase):
     id = sqlalchemy.Column(sqlalchemy.Integer, primary_key=True)
     template = sqlalchemy.Column(types.Json)
     files = sqlalchemy.Column(types.Json)
+    content_hash = sqlalchemy.Column(sqlalchemy.String(64), nullable=True)
 
 
 class Stack(BASE, HeatBase, SoftDelete, StateAware):
     """Represents a stack created by the heat engine."""
 
     __tablename__ = 'stack'
+    __table_args__ = (
+        sqlalchemy.Index('ix_stack_root_stack_id', 'root_stack_id'),)
 
     id = sqlalchemy.Column(sqlalchemy.String(36), primary_key=True,
                            default=lambda: str(uuid.uuid4()))
@@ -136,6 +139,13 @@ class Stack(BASE, HeatBase, SoftDelete, StateAware):
     backup = sqlalchemy.Column('backup', sqlalchemy.Boolean)
     nested_depth = sqlalchemy.Column('nested_depth', sqlalchemy.Integer)
     tags = sqlalchemy.Column('tags', types.Json)
+    event_count = sqlalchemy.Column('event_count', sqlalchemy.Integer,
+                                    default=0, server_default='0')
+    # The stack at the top of the tree this stack is nested in (None for a
+    # top-level stack)
+    root_stack_id = sqlalchemy.Column(sqlalchemy.String(36), nullable=True)
+    # The number of resources in the stack's template
+    resource_count = sqlalchemy.Column(sqlalchemy.Integer, nullable=True)
 
     # Override timestamp column to store the correct value: it should be the
     # time the create/update call was issued, not the time the DB entry is
@@ -154,6 +164,16 @@ class StackLock(BASE, HeatBase):
     engine_id = sqlalchemy.Column(sqlalchemy.String(36))
 
 
+class Engine(BASE, HeatBase):
+    """Register running engines and the time they were last known alive."""
+
+    __tablename__ = 'engine'
+
+    id = sqlalchemy.Column(sqlalchemy.String(36), primary_key=True)
+    hostname = sqlalchemy.Column(sqlalchemy.String(255))
+    heartbeat_at = sqlalchemy.Column(sqlalchemy.DateTime)
+
+
 class UserCreds(BASE, HeatBase):
     """
     Represents user credentials and mirrors the 'context'
@@ -179,6 +199,9 @@ class Event(BASE, HeatBase):
     """Represents an event generated by the heat engine."""
 
     __tablename__ = 'event'
+    __table_args__ = (
+        sqlalchemy.Index('ix_event_stack_id_created_at',
+                         'stack_id', 'created_at'),)
 
     id = sqlalchemy.Column(sqlalchemy.Integer, primary_key=True)
     stack_id = sqlalchemy.Column(sqlalchemy.String(36),
@@ -276,6 +299,9 @@ class WatchData(BASE, HeatBase):
     """Represents a watch_data created by the heat engine."""
 
     __tablename__ = 'watch_data'
+    __table_args__ = (
+        sqlalchemy.Index('ix_watch_data_watch_rule_id_created_at',
+                         'watch_rule_id', 'created_at'),)
 
     id = sqlalchemy.Column(sqlalchemy.Integer, primary_key=True)
     data = sqlalchemy.Column('data', types.Json)
@@ -43,5 +43,9 @@ IMPL = LazyPluggable('backend',
                      sqlalchemy='heat.db.sqlalchemy.api')
 
 
-def purge_deleted(age, granularity='days'):
-    IMPL.purge_deleted(age, granularity)
+def purge_deleted(age, granularity='days', batch_size=None, progress=None):
+    return IMPL.purge_deleted(age, granularity, batch_size, progress)
+
+
+def purge_watch_data(age, granularity='seconds'):
+    return IMPL.purge_watch_data(age, granularity)
@@ -14,9 +14,11 @@
 import collections
 
 from oslo.utils import timeutils
+import six
 
 from heat.common.i18n import _
 from heat.common.i18n import _LE
+from heat.common import identifier
 from heat.common import param_utils
 from heat.common import template_format
 from heat.engine import constraints as constr
@@ -122,6 +124,45 @@ def format_stack(stack, preview=False):
     return info
 
 
+def format_stack_summary(db_stack):
+    '''
+    Return a summary of a stack listed from the database, without loading
+    the stack.
+
+    The summary contains the same fields as format_stack(), except for the
+    parameters and outputs, which can only be obtained from a loaded stack.
+    '''
+    stack_identifier = identifier.HeatIdentifier(db_stack.tenant,
+                                                 db_stack.name,
+                                                 db_stack.id)
+    # Only the description is needed, so take it straight from the raw
+    # template rather than building a Template for every stack listed. The
+    # section is named 'description' in HOT and 'Description' in CFN.
+    description = db_stack.template.get(
+        'description', db_stack.template.get('Description', 'No description'))
+    updated_time = (db_stack.updated_at and
+                    timeutils.isotime(db_stack.updated_at))
+    info = {
+        rpc_api.STACK_NAME: db_stack.name,
+        rpc_api.STACK_ID: dict(stack_identifier),
+        rpc_api.STACK_CREATION_TIME: timeutils.isotime(db_stack.created_at),
+        rpc_api.STACK_UPDATED_TIME: updated_time,
+        rpc_api.STACK_NOTIFICATION_TOPICS: [],  # TODO(?) Not implemented yet
+        rpc_api.STACK_DESCRIPTION: description,
+        rpc_api.STACK_TMPL_DESCRIPTION: description,
+        rpc_api.STACK_CAPABILITIES: [],   # TODO(?) Not implemented yet
+        rpc_api.STACK_DISABLE_ROLLBACK: db_stack.disable_rollback,
+        rpc_api.STACK_TIMEOUT: db_stack.timeout,
+        rpc_api.STACK_OWNER: db_stack.username,
+        rpc_api.STACK_PARENT: db_stack.owner_id,
+        rpc_api.STACK_ACTION: db_stack.action or '',
+        rpc_api.STACK_STATUS: db_stack.status or '',
+        rpc_api.STACK_STATUS_DATA: db_stack.status_reason,
+    }
+
+    return info
+
+
 def format_resource_attributes(resource, with_attr=None):
     def resolve(attr, resolver):
         try:
@@ -228,6 +269,44 @@ def format_event(event):
     return result
 
 
+def format_db_event(db_event):
+    '''
+    Format an event listed from the database, without loading its stack.
+
+    The event must carry the name and tenant of its stack as stack_name and
+    stack_tenant, as returned by db_api.event_get_all_by_stack() and
+    db_api.event_get_all_by_tenant().
+    '''
+    stack_identifier = identifier.HeatIdentifier(db_event.stack_tenant,
+                                                 db_event.stack_name,
+                                                 db_event.stack_id)
+    res_identifier = identifier.ResourceIdentifier(
+        resource_name=db_event.resource_name, **stack_identifier)
+    event_identifier = identifier.EventIdentifier(
+        event_id=str(db_event.uuid), **res_identifier)
+
+    try:
+        properties = dict(db_event.resource_properties)
+    except ValueError as ex:
+        properties = {'Error': six.text_type(ex)}
+
+    result = {
+        rpc_api.EVENT_ID: dict(event_identifier),
+        rpc_api.EVENT_STACK_ID: dict(stack_identifier),
+        rpc_api.EVENT_STACK_NAME: stack_identifier.stack_name,
+        rpc_api.EVENT_TIMESTAMP: timeutils.isotime(db_event.created_at),
+        rpc_api.EVENT_RES_NAME: db_event.resource_name,
+        rpc_api.EVENT_RES_PHYSICAL_ID: db_event.physical_resource_id,
+        rpc_api.EVENT_RES_ACTION: db_event.resource_action,
+        rpc_api.EVENT_RES_STATUS: db_event.resource_status,
+        rpc_api.EVENT_RES_STATUS_DATA: db_event.resource_status_reason,
+        rpc_api.EVENT_RES_TYPE: db_event.resource_type,
+        rpc_api.EVENT_RES_PROPERTIES: properties,
+    }
+
+    return result
+
+
 def format_notification_body(stack):
     # some other possibilities here are:
     # - template name
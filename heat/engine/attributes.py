@@ -165,6 +165,14 @@ class Attributes(collections.Mapping):
             self._resolved_values[key] = value
         return value
 
+    def is_cached(self, key):
+        '''
+        Return True unless the given attribute is resolved afresh every time
+        it is read.
+        '''
+        attrib = self._attributes.get(key)
+        return attrib is None or attrib.schema.cache_mode != Schema.CACHE_NONE
+
     def __len__(self):
         return len(self._attributes)
 
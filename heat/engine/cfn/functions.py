@@ -184,6 +184,10 @@ class GetAtt(function.Function):
             raise exception.InvalidTemplateAttribute(
                 resource=self._resource_name, key=attr)
 
+    def cacheable(self):
+        attribute = function.resolve(self._attribute)
+        return self._resource().attributes.is_cached(attribute)
+
     def result(self):
         attribute = function.resolve(self._attribute)
 
@@ -210,6 +214,8 @@ class Select(function.Function):
     string.
     '''
 
+    pure = True
+
     def __init__(self, stack, fn_name, args):
         super(Select, self).__init__(stack, fn_name, args)
 
@@ -281,6 +287,8 @@ class Join(function.Function):
         "<string_1><delim><string_2><delim>..."
     '''
 
+    pure = True
+
     def __init__(self, stack, fn_name, args):
         super(Join, self).__init__(stack, fn_name, args)
 
@@ -335,6 +343,8 @@ class Split(function.Function):
         [ "<string_1>", "<string_2>", ... ]
     '''
 
+    pure = True
+
     def __init__(self, stack, fn_name, args):
         super(Split, self).__init__(stack, fn_name, args)
 
@@ -384,6 +394,8 @@ class Replace(function.Function):
     which replacements are performed is undefined.
     '''
 
+    pure = True
+
     def __init__(self, stack, fn_name, args):
         super(Replace, self).__init__(stack, fn_name, args)
 
@@ -456,6 +468,8 @@ class Base64(function.Function):
     in plain text.
     '''
 
+    pure = True
+
     def result(self):
         resolved = function.resolve(self.args)
         if not isinstance(resolved, six.string_types):
@@ -483,6 +497,8 @@ class MemberListToMap(function.Function):
     The first two arguments are the names of the key and value.
     '''
 
+    pure = True
+
     def __init__(self, stack, fn_name, args):
         super(MemberListToMap, self).__init__(stack, fn_name, args)
 
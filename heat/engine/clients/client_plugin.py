@@ -12,11 +12,113 @@
 #    under the License.
 
 import abc
+import functools
 
 from keystoneclient import exceptions
 from oslo.config import cfg
+from oslo.utils import excutils
 import six
 
+from heat.common import cache
+from heat.common.i18n import _LW
+from heat.engine import scheduler
+from heat.openstack.common import log as logging
+
+LOG = logging.getLogger(__name__)
+
+_lookup_cache = None
+
+
+def lookup_cache():
+    '''
+    Return the engine-wide cache of validated physical resource IDs.
+    '''
+    global _lookup_cache
+    if _lookup_cache is None:
+        cfg.CONF.import_opt('lookup_cache_ttl', 'heat.common.config')
+        cfg.CONF.import_opt('lookup_cache_size', 'heat.common.config')
+        ttl = cfg.CONF.lookup_cache_ttl
+        _lookup_cache = cache.LRUCache(
+            maxsize=cfg.CONF.lookup_cache_size if ttl > 0 else 0,
+            ttl=ttl)
+    return _lookup_cache
+
+
+def invalidate_lookups(resource_id):
+    '''
+    Remove every lookup that resolved to a physical resource ID from the
+    lookup cache, for every kind and tenant, e.g. once the resource has been
+    deleted.
+    '''
+    lookup_cache().invalidate_items(lambda k, v: v == resource_id)
+
+
+class PollAggregator(object):
+    '''
+    Batch status polls of many physical resources of the same kind.
+
+    Resources that are waiting for a physical resource to change state
+    register its ID with the aggregator. The first poll of a registered ID in
+    each polling cycle fetches the current state of every registered ID with
+    a single call to list_func; the other registered resources are then
+    served from that result. A new cycle starts when a resource polls again
+    after already having been served, or when the result is more than
+    max_age seconds old.
+
+    If the list call fails, the error is logged and every resource falls
+    back to polling its own status individually for that cycle.
+    '''
+
+    def __init__(self, list_func, max_age=1):
+        '''
+        Initialise with a function that takes a list of IDs and returns a
+        dict of the current representations of those found, keyed by ID.
+        '''
+        self._list = list_func
+        self.max_age = max_age
+        self._ids = set()
+        self._results = {}
+        self._unserved = set()
+        self._fetched_at = None
+
+    def register(self, resource_id):
+        '''Start batching polls of the given physical resource ID.'''
+        self._ids.add(resource_id)
+
+    def unregister(self, resource_id):
+        '''Stop batching polls of the given physical resource ID.'''
+        self._ids.discard(resource_id)
+        self._unserved.discard(resource_id)
+        self._results.pop(resource_id, None)
+
+    def batching(self, resource_id):
+        '''
+        Return True if polls of the given ID are batched with others.
+
+        There is nothing to gain by listing a single resource, so when only
+        one ID is registered it should be polled individually as normal.
+        '''
+        return resource_id in self._ids and len(self._ids) > 1
+
+    def get(self, resource_id):
+        '''
+        Return the current representation of a registered resource, or None
+        if it was not found by the list call.
+        '''
+        if (resource_id not in self._unserved or
+                scheduler.wallclock() - self._fetched_at > self.max_age):
+            try:
+                self._results = self._list(list(self._ids))
+            except Exception as ex:
+                LOG.warn(_LW('Batched status poll failed, polling '
+                             'individually: %s'), ex)
+                self._results = {}
+            self._unserved = set(self._ids)
+            self._fetched_at = scheduler.wallclock()
+
+        self._unserved.discard(resource_id)
+        return self._results.get(resource_id)
+
 
 @six.add_metaclass(abc.ABCMeta)
 class ClientPlugin(object):
@@ -29,6 +131,7 @@ class ClientPlugin(object):
         self.context = context
         self.clients = context.clients
         self._client = None
+        self._poll_aggregators = {}
 
     def client(self):
         if not self._client:
@@ -71,6 +174,94 @@ class ClientPlugin(object):
 
         return url
 
+    def poll_aggregator(self, kind):
+        '''
+        Return the aggregator that batches status polls of physical resources
+        of the given kind, e.g. 'server'.
+
+        The aggregator is shared by all resources using this client plugin,
+        i.e. by all of the resources in a stack operation.
+        '''
+        if kind not in self._poll_aggregators:
+            self._poll_aggregators[kind] = PollAggregator(
+                functools.partial(self._list_by_id, kind))
+        return self._poll_aggregators[kind]
+
+    def _lookup_scope(self):
+        region = self.context.region_name or cfg.CONF.region_name_for_services
+        return (self.context.tenant_id, region)
+
+    def cached_lookup(self, kind, name, lookup):
+        '''
+        Return the ID of the physical resource of the given kind (e.g.
+        'glance.image', qualified by the service) with the given name or ID,
+        calling lookup(name) to find it if it is not already in the
+        engine-wide lookup cache.
+
+        Results are cached per tenant and region for lookup_cache_ttl
+        seconds, so a name that is changed to refer to another resource in
+        the meantime may still resolve to the old one. Failed lookups are not
+        cached, and a lookup that finds no resource removes any cached
+        lookups of that kind that resolved to the given name as an ID.
+        '''
+        scope = self._lookup_scope()
+        key = scope + (kind, name)
+        resource_id = lookup_cache().get(key)
+        if resource_id is None:
+            try:
+                resource_id = lookup(name)
+            except Exception as ex:
+                with excutils.save_and_reraise_exception():
+                    if self.is_lookup_not_found(ex):
+                        lookup_cache().invalidate_items(
+                            lambda k, v: (k[:-1] == key[:-1] and
+                                          v == name))
+            lookup_cache().set(key, resource_id)
+        return resource_id
+
+    def invalidate_lookup(self, kind, resource_id=None):
+        '''
+        Remove the lookups of the given kind that resolved to the given
+        physical resource ID, or every lookup of that kind if no ID is given,
+        from the lookup cache for all tenants.
+        '''
+        lookup_cache().invalidate_items(
+            lambda k, v: k[-2] == kind and resource_id in (None, v))
+
+    def is_lookup_not_found(self, ex):
+        '''Returns True if a failed lookup means the resource is absent.'''
+        return self.is_not_found(ex)
+
+    def _list_by_id(self, kind, ids):
+        '''
+        Return a dict of the current representations of the physical
+        resources of the given kind with the given IDs, keyed by ID.
+
+        By default each resource is fetched individually with _get_by_id().
+        Client plugins that can list many resources in one call override
+        this. Resources that are omitted from the result are polled
+        individually by their owners.
+        '''
+        found = {}
+        for resource_id in ids:
+            try:
+                current = self._get_by_id(kind, resource_id)
+            except Exception as ex:
+                # The owner of the resource sees the error when it polls
+                # the resource individually
+                LOG.debug('Failed to get %s %s: %s' % (kind, resource_id, ex))
+                continue
+            if current is not None:
+                found[resource_id] = current
+        return found
+
+    def _get_by_id(self, kind, resource_id):
+        '''
+        Return the current representation of a physical resource of the
+        given kind, or None if this client plugin cannot fetch it.
+        '''
+        return None
+
     def _get_client_option(self, client, option):
         # look for the option in the [clients_${client}] section
         # unknown options raise cfg.NoSuchOptError
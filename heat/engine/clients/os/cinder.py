@@ -94,6 +94,35 @@ class CinderClientPlugin(client_plugin.ClientPlugin):
                      {'volume': volume, 'ex': ex})
             raise exception.VolumeNotFound(volume=volume)
 
+    def _list_by_id(self, kind, ids):
+        if kind != 'volume':
+            return super(CinderClientPlugin, self)._list_by_id(kind, ids)
+        # Cinder cannot filter on a list of IDs, so list only the volumes
+        # that are still being created, which keeps the cost in proportion
+        # to the volumes being created rather than to the size of the
+        # tenant. Volumes in any other state are polled individually.
+        ids = set(ids)
+        creating = self.client().volumes.list(
+            search_opts={'status': 'creating'})
+        return dict((v.id, v) for v in creating if v.id in ids)
+
+    def _get_by_id(self, kind, resource_id):
+        if kind == 'volume':
+            return self.client().volumes.get(resource_id)
+
+    def refresh_volume(self, volume):
+        '''
+        Refresh the volume's attributes, as part of a batched poll if other
+        volumes are also being polled.
+        '''
+        poller = self.poll_aggregator('volume')
+        if poller.batching(volume.id):
+            current = poller.get(volume.id)
+            if current is not None:
+                volume._add_details(current._info)
+                return
+        volume.get()
+
     def get_volume_snapshot(self, snapshot):
         try:
             return self.client().volume_snapshots.get(snapshot)
@@ -52,6 +52,10 @@ class GlanceClientPlugin(client_plugin.ClientPlugin):
     def is_not_found(self, ex):
         return isinstance(ex, exc.HTTPNotFound)
 
+    def is_lookup_not_found(self, ex):
+        return (isinstance(ex, exception.ImageNotFound) or
+                self.is_not_found(ex))
+
     def is_over_limit(self, ex):
         return isinstance(ex, exc.HTTPOverLimit)
 
@@ -67,13 +71,17 @@ class GlanceClientPlugin(client_plugin.ClientPlugin):
         :raises: exception.ImageNotFound,
                  exception.PhysicalResourceNameAmbiguity
         '''
+        return self.cached_lookup('glance.image', image_identifier,
+                                  self._find_image_id)
+
+    def _find_image_id(self, image_identifier):
         if uuidutils.is_uuid_like(image_identifier):
             try:
                 image_id = self.client().images.get(image_identifier).id
             except exc.HTTPNotFound:
-                image_id = self.get_image_id_by_name(image_identifier)
+                image_id = self._find_image_id_by_name(image_identifier)
         else:
-            image_id = self.get_image_id_by_name(image_identifier)
+            image_id = self._find_image_id_by_name(image_identifier)
         return image_id
 
     def get_image_id_by_name(self, image_identifier):
@@ -85,6 +93,9 @@ class GlanceClientPlugin(client_plugin.ClientPlugin):
         :raises: exception.ImageNotFound,
                  exception.PhysicalResourceNameAmbiguity
         '''
+        return self._find_image_id_by_name(image_identifier)
+
+    def _find_image_id_by_name(self, image_identifier):
         try:
             filters = {'name': image_identifier}
             image_list = list(self.client().images.list(filters=filters))
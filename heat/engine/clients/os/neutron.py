@@ -20,6 +20,10 @@ from heat.common import exception
 from heat.engine.clients import client_plugin
 from heat.engine import constraints
 
+# Maximum number of IDs filtered on in a single list request, to keep the
+# request URI to a reasonable length
+LIST_ID_CHUNK_SIZE = 40
+
 
 class NeutronClientPlugin(client_plugin.ClientPlugin):
 
@@ -63,9 +67,43 @@ class NeutronClientPlugin(client_plugin.ClientPlugin):
             return False
         return ex.status_code == 413
 
+    def _list_by_id(self, kind, ids):
+        collection = '%ss' % kind
+        list_func = getattr(self.client(), 'list_%s' % collection)
+        found = {}
+        for i in range(0, len(ids), LIST_ID_CHUNK_SIZE):
+            chunk = ids[i:i + LIST_ID_CHUNK_SIZE]
+            found.update((r['id'], r) for r in list_func(id=chunk)[collection])
+        return found
+
+    def _get_by_id(self, kind, resource_id):
+        return getattr(self.client(), 'show_%s' % kind)(resource_id)[kind]
+
+    def show_resource(self, kind, resource_id):
+        '''
+        Return the attributes of a neutron resource of the given kind (e.g.
+        'network'), as part of a batched poll if other resources of the same
+        kind are also being polled.
+        '''
+        poller = self.poll_aggregator(kind)
+        if poller.batching(resource_id):
+            attributes = poller.get(resource_id)
+            if attributes is not None:
+                return attributes
+        return self._get_by_id(kind, resource_id)
+
     def find_neutron_resource(self, props, key, key_type):
-        return neutronV20.find_resourceid_by_name_or_id(
-            self.client(), key_type, props.get(key))
+        return self.find_resourceid_by_name_or_id(key_type, props.get(key))
+
+    def find_resourceid_by_name_or_id(self, resource, name_or_id):
+        '''
+        Return the ID of the neutron resource of the given type (e.g.
+        'network') with the given name or ID, using the lookup cache.
+        '''
+        return self.cached_lookup(
+            'neutron.%s' % resource, name_or_id,
+            lambda value: neutronV20.find_resourceid_by_name_or_id(
+                self.client(), resource, value))
 
     def _resolve(self, props, key, id_key, key_type):
         if props.get(key):
@@ -129,9 +167,8 @@ class NetworkConstraint(constraints.BaseCustomConstraint):
     expected_exceptions = (exceptions.NeutronClientException,)
 
     def validate_with_client(self, client, value):
-        neutron_client = client.client('neutron')
-        neutronV20.find_resourceid_by_name_or_id(
-            neutron_client, 'network', value)
+        client.client_plugin('neutron').find_resourceid_by_name_or_id(
+            'network', value)
 
 
 class PortConstraint(constraints.BaseCustomConstraint):
@@ -139,9 +176,8 @@ class PortConstraint(constraints.BaseCustomConstraint):
     expected_exceptions = (exceptions.NeutronClientException,)
 
     def validate_with_client(self, client, value):
-        neutron_client = client.client('neutron')
-        neutronV20.find_resourceid_by_name_or_id(
-            neutron_client, 'port', value)
+        client.client_plugin('neutron').find_resourceid_by_name_or_id(
+            'port', value)
 
 
 class RouterConstraint(constraints.BaseCustomConstraint):
@@ -149,9 +185,8 @@ class RouterConstraint(constraints.BaseCustomConstraint):
     expected_exceptions = (exceptions.NeutronClientException,)
 
     def validate_with_client(self, client, value):
-        neutron_client = client.client('neutron')
-        neutronV20.find_resourceid_by_name_or_id(
-            neutron_client, 'router', value)
+        client.client_plugin('neutron').find_resourceid_by_name_or_id(
+            'router', value)
 
 
 class SubnetConstraint(constraints.BaseCustomConstraint):
@@ -159,6 +194,5 @@ class SubnetConstraint(constraints.BaseCustomConstraint):
     expected_exceptions = (exceptions.NeutronClientException,)
 
     def validate_with_client(self, client, value):
-        neutron_client = client.client('neutron')
-        neutronV20.find_resourceid_by_name_or_id(
-            neutron_client, 'subnet', value)
+        client.client_plugin('neutron').find_resourceid_by_name_or_id(
+            'subnet', value)
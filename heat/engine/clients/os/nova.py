@@ -84,6 +84,10 @@ class NovaClientPlugin(client_plugin.ClientPlugin):
     def is_not_found(self, ex):
         return isinstance(ex, exceptions.NotFound)
 
+    def is_lookup_not_found(self, ex):
+        return (isinstance(ex, exception.FlavorMissing) or
+                self.is_not_found(ex))
+
     def is_over_limit(self, ex):
         return isinstance(ex, exceptions.OverLimit)
 
@@ -99,13 +103,41 @@ class NovaClientPlugin(client_plugin.ClientPlugin):
         return (isinstance(ex, exceptions.ClientException) and
                 http_status == 422)
 
+    def _list_by_id(self, kind, ids):
+        if kind != 'server':
+            return super(NovaClientPlugin, self)._list_by_id(kind, ids)
+        # Nova cannot filter on a list of IDs, so list only the servers that
+        # are still building, which keeps the cost in proportion to the
+        # servers being created rather than to the size of the tenant.
+        # Servers that have left BUILD are polled individually.
+        ids = set(ids)
+        building = self.client().servers.list(search_opts={'status': 'BUILD'})
+        return dict((s.id, s) for s in building if s.id in ids)
+
+    def _get_by_id(self, kind, resource_id):
+        if kind == 'server':
+            return self.client().servers.get(resource_id)
+
+    def _get_server(self, server):
+        '''
+        Fetch the server's current attributes, as part of a batched poll if
+        other servers are also being polled.
+        '''
+        poller = self.poll_aggregator('server')
+        if poller.batching(server.id):
+            current = poller.get(server.id)
+            if current is not None:
+                server._add_details(current._info)
+                return
+        server.get()
+
     def refresh_server(self, server):
         '''
         Refresh server's attributes and log warnings for non-critical
         API errors.
         '''
         try:
-            server.get()
+            self._get_server(server)
         except exceptions.OverLimit as exc:
             LOG.warn(_LW("Server %(name)s (%(id)s) received an OverLimit "
                          "response during server.get(): %(exception)s"),
@@ -149,6 +181,9 @@ class NovaClientPlugin(client_plugin.ClientPlugin):
         :returns: the id of :flavor:
         :raises: exception.FlavorMissing
         '''
+        return self.cached_lookup('nova.flavor', flavor, self._find_flavor_id)
+
+    def _find_flavor_id(self, flavor):
         flavor_id = None
         flavor_list = self.client().flavors.list()
         for o in flavor_list:
@@ -11,6 +11,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import array
 import collections
 import itertools
 
@@ -160,41 +161,162 @@ class Graph(collections.defaultdict):
 
         This is a destructive operation for the graph.
         '''
-        for iteration in six.moves.xrange(len(graph)):
-            for key, node in six.iteritems(graph):
-                if not node:
-                    yield key
-                    del graph[key]
-                    break
-            else:
-                # There are nodes remaining, but none without
-                # dependencies: a cycle
-                raise CircularDependencyException(cycle=six.text_type(graph))
+        leaves = collections.deque(k for k, n in six.iteritems(graph)
+                                   if not n)
+        while leaves:
+            key = leaves.popleft()
+            requirers = list(graph[key].required_by())
+
+            yield key
+            del graph[key]
+
+            # Only the nodes that required the one just removed can have
+            # become leaves, so there is no need to rescan the whole graph.
+            for rqr in requirers:
+                if rqr in graph and not graph[rqr]:
+                    leaves.append(rqr)
+
+        if graph:
+            # There are nodes remaining, but none without
+            # dependencies: a cycle
+            raise CircularDependencyException(cycle=six.text_type(graph))
+
+
+class _CSR(object):
+    '''
+    The edges of a dependency graph, in both directions, stored as compressed
+    sparse row adjacency arrays of integer node indices.
+    '''
+
+    def __init__(self, requires, required_by):
+        self._requires = self._compress(requires)
+        self._required_by = self._compress(required_by)
+
+    @staticmethod
+    def _compress(adjacency):
+        offsets = array.array('l', [0])
+        targets = array.array('l')
+        for adjacent in adjacency:
+            targets.extend(adjacent)
+            offsets.append(len(targets))
+        return offsets, targets
+
+    def adjacent(self, index, required_by=False):
+        '''
+        Return the indices of the nodes the given node requires, or is
+        required by.
+        '''
+        offsets, targets = (self._required_by if required_by
+                            else self._requires)
+        return targets[offsets[index]:offsets[index + 1]]
+
+    def degree(self, index, required_by=False):
+        '''
+        Return the number of nodes the given node requires, or is required by.
+        '''
+        offsets = (self._required_by if required_by else self._requires)[0]
+        return offsets[index + 1] - offsets[index]
 
 
 class Dependencies(object):
-    '''Helper class for calculating a dependency graph.'''
+    '''
+    Helper class for calculating a dependency graph.
+
+    Keys are interned to integer indices. While the graph is being built its
+    edges are held in adjacency lists of indices; the first time it is
+    traversed they are compacted into CSR arrays, from which topological
+    sorts, reverse sorts and partial graphs are calculated without copying.
+    '''
 
     def __init__(self, edges=None):
         '''
         Initialise, optionally with a list of edges, in the form of
         (requirer, required) tuples.
         '''
-        edges = edges or []
-        self._graph = Graph()
-        for e in edges:
+        self._keys = []
+        self._index = {}
+        self._requires = []
+        self._required_by = []
+        self._csr = None
+        # For a partial graph, a mask of the member indices (sharing the
+        # keys and edges of the graph it was taken from)
+        self._mask = None
+        for e in edges or []:
             self += e
 
+    @classmethod
+    def _partial(cls, source, mask):
+        deps = cls.__new__(cls)
+        deps._keys = source._keys
+        deps._index = source._index
+        deps._requires = deps._required_by = None
+        deps._csr = source._freeze()
+        deps._mask = mask
+        return deps
+
+    def _freeze(self):
+        '''Return the CSR arrays for the graph, building them if needed.'''
+        if self._csr is None:
+            self._csr = _CSR(self._requires, self._required_by)
+            self._requires = self._required_by = None
+        return self._csr
+
+    def _thaw(self):
+        '''Prepare for new edges to be added.'''
+        if self._mask is not None:
+            self.__init__(list(self.edges()))
+        elif self._csr is not None:
+            csr = self._csr
+            nodes = range(len(self._keys))
+            self._requires = [list(csr.adjacent(i)) for i in nodes]
+            self._required_by = [list(csr.adjacent(i, True)) for i in nodes]
+            self._csr = None
+
+    def _intern(self, key):
+        index = self._index.get(key)
+        if index is None:
+            index = len(self._keys)
+            self._keys.append(key)
+            self._index[key] = index
+            self._requires.append([])
+            self._required_by.append([])
+        return index
+
+    def _contains(self, index):
+        mask = self._mask
+        return mask is None or (index < len(mask) and bool(mask[index]))
+
+    def _members(self):
+        if self._mask is None:
+            return range(len(self._keys))
+        return [i for i, m in enumerate(self._mask) if m]
+
+    def _lookup(self, key):
+        index = self._index.get(key)
+        if index is None or not self._contains(index):
+            raise KeyError(key)
+        return index
+
+    def _adjacent(self, index, required_by=False):
+        if self._csr is None:
+            adjacency = self._required_by if required_by else self._requires
+            return adjacency[index]
+        adjacent = self._csr.adjacent(index, required_by)
+        if self._mask is None:
+            return adjacent
+        return [i for i in adjacent if self._contains(i)]
+
     def __iadd__(self, edge):
         '''Add another edge, in the form of a (requirer, required) tuple.'''
         requirer, required = edge
 
-        if required is None:
-            # Just ensure the node is created by accessing the defaultdict
-            self._graph[requirer]
-        else:
-            self._graph[required].required_by(requirer)
-            self._graph[requirer].requires(required)
+        self._thaw()
+        rqr = self._intern(requirer)
+        if required is not None:
+            rqd = self._intern(required)
+            if rqd not in self._requires[rqr]:
+                self._requires[rqr].append(rqd)
+                self._required_by[rqd].append(rqr)
 
         return self
 
@@ -202,68 +324,117 @@ class Dependencies(object):
         '''
         List the keys that require the specified node.
         '''
-        if last not in self._graph:
-            raise KeyError
+        index = self._lookup(last)
+        return iter([self._keys[i] for i in self._adjacent(index, True)])
 
-        return self._graph[last].required_by()
+    def requires(self, first):
+        '''
+        List the keys that the specified node requires.
+        '''
+        index = self._lookup(first)
+        return iter([self._keys[i] for i in self._adjacent(index)])
 
     def __getitem__(self, last):
         '''
         Return a partial dependency graph consisting of the specified node and
         all those that require it only.
         '''
-        if last not in self._graph:
-            raise KeyError
-
-        def get_edges(key):
-            def requirer_edges(rqr):
-                # Concatenate the dependency on the current node with the
-                # recursive generated list
-                return itertools.chain([(rqr, key)], get_edges(rqr))
-
-            # Get the edge list for each node that requires the current node
-            edge_lists = itertools.imap(requirer_edges,
-                                        self._graph[key].required_by())
-            # Combine the lists into one long list
-            return itertools.chain.from_iterable(edge_lists)
-
-        if self._graph[last].stem():
-            # Nothing requires this, so just add the node itself
-            edges = [(last, None)]
-        else:
-            edges = get_edges(last)
+        index = self._lookup(last)
+        csr = self._freeze()
 
-        return Dependencies(edges)
+        mask = bytearray(len(self._keys))
+        mask[index] = 1
+        pending = [index]
+        while pending:
+            for rqr in csr.adjacent(pending.pop(), True):
+                if not mask[rqr] and self._contains(rqr):
+                    mask[rqr] = 1
+                    pending.append(rqr)
+
+        return self._partial(self, mask)
+
+    def edges(self, reverse=False):
+        '''
+        Return an iterator over all of the edges in the graph, in the form of
+        (requirer, required) tuples. Nodes with no edges are returned as
+        (requirer, None).
+        '''
+        keys = self._keys
+        for i in self._members():
+            adjacent = self._adjacent(i, reverse)
+            if adjacent:
+                for j in adjacent:
+                    yield (keys[i], keys[j])
+            elif not self._adjacent(i, not reverse):
+                yield (keys[i], None)
 
     def __str__(self):
         '''
         Return a human-readable string representation of the dependency graph
         '''
-        return str(self._graph)
+        return str(self.graph())
 
     def __unicode__(self):
         '''
         Return a human-readable string representation of the dependency graph
         '''
-        return six.text_type(self._graph)
+        return six.text_type(self.graph())
 
     def __repr__(self):
         '''Return a string representation of the object.'''
-        edge_reprs = (repr(e) for e in self._graph.edges())
+        edge_reprs = (repr(e) for e in self.edges())
         text = 'Dependencies([%s])' % ', '.join(edge_reprs)
         return encodeutils.safe_encode(text)
 
     def graph(self, reverse=False):
         '''Return a copy of the underlying dependency graph.'''
-        if reverse:
-            return self._graph.reverse_copy()
+        keys = self._keys
+        graph = Graph()
+        for i in self._members():
+            node = graph[keys[i]]
+            node.require.update(keys[j] for j in self._adjacent(i, reverse))
+            node.satisfy.update(keys[j]
+                                for j in self._adjacent(i, not reverse))
+        return graph
+
+    def _toposort(self, reverse=False):
+        '''
+        Return a topologically sorted iterator over the keys, in O(V+E) time.
+        '''
+        csr = self._freeze()
+        members = self._members()
+        if self._mask is None:
+            counts = [csr.degree(i, reverse) for i in members]
         else:
-            return self._graph.copy()
+            counts = dict((i, len(self._adjacent(i, reverse)))
+                          for i in members)
+
+        leaves = collections.deque(i for i in members if not counts[i])
+        done = 0
+        while leaves:
+            index = leaves.popleft()
+            yield self._keys[index]
+            done += 1
+
+            for rqr in self._adjacent(index, not reverse):
+                counts[rqr] -= 1
+                if not counts[rqr]:
+                    leaves.append(rqr)
+
+        if done < len(members):
+            # There are nodes remaining, but none without
+            # dependencies: a cycle
+            remaining = bytearray(len(self._keys))
+            for i in members:
+                if counts[i]:
+                    remaining[i] = 1
+            cycle = self._partial(self, remaining).graph(reverse)
+            raise CircularDependencyException(cycle=six.text_type(cycle))
 
     def __iter__(self):
         '''Return a topologically sorted iterator.'''
-        return Graph.toposort(self.graph())
+        return self._toposort()
 
     def __reversed__(self):
         '''Return a reverse topologically sorted iterator.'''
-        return Graph.toposort(self.graph(reverse=True))
+        return self._toposort(reverse=True)
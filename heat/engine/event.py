@@ -11,6 +11,9 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import uuid
+
+from oslo.utils import timeutils
 import six
 
 from heat.common import exception
@@ -65,8 +68,13 @@ class Event(object):
                    ev.resource_properties, ev.resource_name,
                    ev.resource_type, ev.uuid, ev.created_at, ev.id)
 
-    def store(self):
-        '''Store the Event in the database.'''
+    def store(self, write_buffer=None):
+        '''
+        Store the Event in the database.
+
+        If a write buffer is supplied, the event is instead queued to be
+        written when the buffer is next flushed, and None is returned.
+        '''
         ev = {
             'resource_name': self.resource_name,
             'physical_resource_id': self.physical_resource_id,
@@ -81,6 +89,17 @@ class Event(object):
         if self.uuid is not None:
             ev['uuid'] = self.uuid
 
+        if write_buffer is not None:
+            # Record the time of the state change, not of the flush
+            if self.timestamp is None:
+                self.timestamp = timeutils.utcnow()
+            if self.uuid is None:
+                self.uuid = str(uuid.uuid4())
+            ev['uuid'] = self.uuid
+            ev['created_at'] = self.timestamp
+            write_buffer.add_event(ev)
+            return None
+
         if self.timestamp is not None:
             ev['created_at'] = self.timestamp
 
@@ -18,12 +18,34 @@ import itertools
 import six
 
 
+def invalidate_results(stack):
+    """
+    Invalidate the cached results of the non-static functions in a stack.
+
+    This must be called whenever anything that may affect the results of
+    functions (e.g. the state or attributes of a resource) changes. The
+    results in the stacks that the stack is nested in are invalidated too,
+    since they may refer to its outputs.
+    """
+    while stack is not None:
+        stack.result_epoch += 1
+        parent = stack.parent_resource
+        stack = parent.stack if parent is not None else None
+
+
 @six.add_metaclass(abc.ABCMeta)
 class Function(object):
     """
     Abstract base class for template functions.
     """
 
+    # Subclasses whose result depends only on their arguments set this, so
+    # that when the arguments are static the result is calculated only once.
+    pure = False
+
+    _cached = None
+    _static = None
+
     def __init__(self, stack, fn_name, args):
         """
         Initialise with a Stack, the function name and the arguments.
@@ -59,6 +81,50 @@ class Function(object):
     def dependencies(self, path):
         return dependencies(self.args, '.'.join([path, self.fn_name]))
 
+    def is_static(self):
+        """
+        Return True if the result of the function can never change.
+
+        This is the case when the function is pure and its arguments contain
+        no functions other than static ones.
+        """
+        if self._static is None:
+            self._static = self.pure and is_static(self.args)
+        return self._static
+
+    def cacheable(self):
+        """
+        Return whether the result of the function may be cached until the
+        results of the stack are invalidated.
+
+        Functions whose results can change without the state or attributes
+        of any resource changing (e.g. because they read a value that is
+        never cached) should override this to return False.
+        """
+        return True
+
+    def cached_result(self):
+        """
+        Return the result of the function, calculating it only if it may
+        have changed since it was last calculated.
+
+        Non-static results are cached only until the results of the stack
+        are invalidated, and only for functions that belong to a stack and
+        are cacheable. Results of None are never cached.
+        """
+        if self.is_static():
+            key = None
+        else:
+            key = getattr(self.stack, 'result_epoch', None)
+            if not isinstance(key, int) or not self.cacheable():
+                return self.result()
+        if self._cached is None or self._cached[0] != key:
+            result = self.result()
+            if result is None:
+                return None
+            self._cached = (key, result)
+        return self._cached[1]
+
     def __reduce__(self):
         """
         Return a representation of the function suitable for pickling.
@@ -114,7 +180,7 @@ class Function(object):
 
 def resolve(snippet):
     while isinstance(snippet, Function):
-        snippet = snippet.result()
+        snippet = snippet.cached_result()
 
     if isinstance(snippet, collections.Mapping):
         return dict((k, resolve(v)) for k, v in snippet.items())
@@ -125,6 +191,19 @@ def resolve(snippet):
     return snippet
 
 
+def is_static(snippet):
+    """Return True if a template snippet contains no non-static functions."""
+    if isinstance(snippet, Function):
+        return snippet.is_static()
+    elif isinstance(snippet, collections.Mapping):
+        return all(is_static(v) for v in snippet.values())
+    elif (not isinstance(snippet, six.string_types) and
+          isinstance(snippet, collections.Iterable)):
+        return all(is_static(v) for v in snippet)
+
+    return True
+
+
 def validate(snippet):
     if isinstance(snippet, Function):
         snippet.validate()
@@ -31,6 +31,7 @@ from heat.common import short_id
 from heat.common import timeutils
 from heat.db import api as db_api
 from heat.engine import attributes
+from heat.engine.clients import client_plugin
 from heat.engine import environment
 from heat.engine import event
 from heat.engine import function
@@ -115,6 +116,11 @@ class Resource(object):
     # Default name to use for calls to self.client()
     default_client_name = None
 
+    # Wait strategy (e.g. scheduler.ExponentialBackoff) to use between steps
+    # of this resource's actions during a stack operation, or None to step
+    # them every time the stack's task group is stepped.
+    wait_strategy = None
+
     def __new__(cls, name, definition, stack):
         '''Create a new Resource of the appropriate class for its type.'''
 
@@ -187,6 +193,8 @@ class Resource(object):
         self.status_reason = ''
         self.id = None
         self._data = {}
+        self._data_rows = None
+        self._batched_polls = []
         self._rsrc_metadata = None
         self._stored_properties_data = None
         self.created_time = None
@@ -210,10 +218,10 @@ class Resource(object):
         self.status = resource.status
         self.status_reason = resource.status_reason
         self.id = resource.id
-        try:
-            self._data = db_api.resource_data_get_all(self, resource.data)
-        except exception.NotFound:
-            self._data = {}
+        # The data rows are loaded along with the resource, but redacted
+        # values are only decrypted when the data is first used.
+        self._data = None
+        self._data_rows = resource.data
         self._rsrc_metadata = resource.rsrc_metadata
         self._stored_properties_data = resource.properties_data
         self.created_time = resource.created_at
@@ -504,11 +512,30 @@ class Resource(object):
         handler = getattr(self, 'handle_%s' % handler_action, None)
 
         if callable(handler):
-            handler_data = handler(*args)
-            yield
-            if callable(check):
-                while not check(handler_data):
-                    yield
+            try:
+                handler_data = handler(*args)
+                yield
+                if callable(check):
+                    while not check(handler_data):
+                        yield
+            finally:
+                self._unbatch_polls()
+
+    def _batch_polls(self, kind, physical_id):
+        '''
+        Batch the status polls of the given physical resource with those of
+        sibling resources of the same kind until the current action ends,
+        whether it completes, fails or is cancelled.
+        '''
+        aggregator = self.client_plugin().poll_aggregator(kind)
+        aggregator.register(physical_id)
+        self._batched_polls.append((aggregator, physical_id))
+
+    def _unbatch_polls(self):
+        '''Stop batching the status polls registered by _batch_polls().'''
+        while self._batched_polls:
+            aggregator, physical_id = self._batched_polls.pop()
+            aggregator.unregister(physical_id)
 
     @scheduler.wrappertask
     def _do_action(self, action, pre_func=None, resource_data=None):
@@ -884,6 +911,9 @@ class Resource(object):
                 else:
                     action_args = []
                 yield self.action_handler_task(action, *action_args)
+                if self.resource_id is not None:
+                    # Don't let later lookups vouch for the deleted ID
+                    client_plugin.invalidate_lookups(self.resource_id)
 
     @scheduler.wrappertask
     def destroy(self):
@@ -906,10 +936,15 @@ class Resource(object):
 
     def resource_id_set(self, inst):
         self.resource_id = inst
+        # References to this resource now resolve differently
+        function.invalidate_results(self.stack)
         if self.id is not None:
+            # The physical resource ID is always written immediately, so that
+            # the resource can still be found and deleted if the engine dies.
             try:
-                rs = db_api.resource_get(self.context, self.id)
-                rs.update_and_save({'nova_instance': self.resource_id})
+                self._flush_writes()
+                db_api.resource_update(self.context, self.id,
+                                       {'nova_instance': self.resource_id})
             except Exception as ex:
                 LOG.warn(_LW('db error %s'), ex)
 
@@ -934,13 +969,34 @@ class Resource(object):
         except Exception as ex:
             LOG.error(_LE('DB error %s'), ex)
 
+    def _write_buffer(self, status):
+        '''
+        Return the buffer in which to queue writes of a change to the given
+        status, or None if the change must be written immediately.
+
+        Writes are buffered only during a stack operation, and transitions to
+        IN_PROGRESS are always written immediately so that an engine failure
+        cannot leave a resource that is in progress recorded as anything else.
+        '''
+        if status == self.IN_PROGRESS:
+            return None
+        return self.stack.write_buffer
+
+    def _flush_writes(self):
+        '''Write out any buffered writes, to preserve their ordering.'''
+        if self.stack.write_buffer is not None:
+            self.stack.write_buffer.flush()
+
     def _add_event(self, action, status, reason):
         '''Add a state change event to the database.'''
         ev = event.Event(self.context, self.stack, action, status, reason,
                          self.resource_id, self.properties,
                          self.name, self.type())
 
-        ev.store()
+        # Events need not survive an engine failure mid-step, so they are
+        # always buffered; this also keeps the stack's event count to one
+        # update per step.
+        ev.store(self.stack.write_buffer)
 
     def _store_or_update(self, action, status, reason):
         self.action = action
@@ -948,16 +1004,21 @@ class Resource(object):
         self.status_reason = reason
 
         if self.id is not None:
+            values = {'action': self.action,
+                      'status': self.status,
+                      'status_reason': reason,
+                      'stack_id': self.stack.id,
+                      'updated_at': self.updated_time,
+                      'properties_data': self._stored_properties_data,
+                      'nova_instance': self.resource_id}
+            write_buffer = self._write_buffer(status)
+            if write_buffer is not None:
+                write_buffer.update_resource(self.id, values)
+                return
+
             try:
-                rs = db_api.resource_get(self.context, self.id)
-                rs.update_and_save({
-                    'action': self.action,
-                    'status': self.status,
-                    'status_reason': reason,
-                    'stack_id': self.stack.id,
-                    'updated_at': self.updated_time,
-                    'properties_data': self._stored_properties_data,
-                    'nova_instance': self.resource_id})
+                self._flush_writes()
+                db_api.resource_update(self.context, self.id, values)
             except Exception as ex:
                 LOG.error(_LE('DB error %s'), ex)
 
@@ -1000,7 +1061,7 @@ class Resource(object):
         if new_state != old_state:
             self._add_event(action, status, reason)
 
-        self.stack.reset_resource_attributes()
+        self.stack.reset_resource_attributes(self)
 
     @property
     def state(self):
@@ -1136,17 +1197,22 @@ class Resource(object):
         '''
         if self._data is None and self.id:
             try:
-                self._data = db_api.resource_data_get_all(self)
+                self._data = db_api.resource_data_get_all(self,
+                                                          self._data_rows)
             except exception.NotFound:
-                pass
+                self._data = {}
+            self._data_rows = None
 
         return self._data or {}
 
     def data_set(self, key, value, redact=False):
         '''Save resource's key/value pair to database.'''
         db_api.resource_data_set(self, key, value, redact)
-        # force fetch all resource data from the database again
-        self._data = None
+        if self._data is not None:
+            self._data[key] = value
+        else:
+            # The preloaded rows are stale, so fetch afresh on the next read
+            self._data_rows = None
 
     def data_delete(self, key):
         '''
@@ -1159,8 +1225,10 @@ class Resource(object):
         except exception.NotFound:
             return False
         else:
-            # force fetch all resource data from the database again
-            self._data = None
+            if self._data is not None:
+                self._data.pop(key, None)
+            else:
+                self._data_rows = None
             return True
 
     def is_using_neutron(self):
@@ -79,6 +79,10 @@ class Volume(resource.Resource):
 
     default_client_name = 'cinder'
 
+    # Back off polling Cinder for the status of volumes that take a while to
+    # become available, e.g. when created from a large image or backup.
+    wait_strategy = scheduler.ExponentialBackoff(maximum=10)
+
     def _name(self):
         return self.physical_resource_name()
 
@@ -125,15 +129,19 @@ class Volume(resource.Resource):
             vol = cinder.volumes.create(**kwargs)
         self.resource_id_set(vol.id)
 
+        self._batch_polls('volume', vol.id)
         return vol
 
     def check_create_complete(self, vol):
-        vol.get()
+        cp = self.client_plugin()
+        cp.refresh_volume(vol)
 
-        if vol.status == 'available':
-            return True
         if vol.status in self._volume_creating_status:
             return False
+
+        cp.poll_aggregator('volume').unregister(vol.id)
+        if vol.status == 'available':
+            return True
         if vol.status == 'error':
             raise resource.ResourceInError(
                 resource_status=vol.status)
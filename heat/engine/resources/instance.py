@@ -21,6 +21,7 @@ from heat.common.i18n import _
 from heat.common.i18n import _LI
 from heat.engine import attributes
 from heat.engine import constraints
+from heat.engine import function
 from heat.engine import properties
 from heat.engine import resource
 from heat.engine import scheduler
@@ -428,6 +429,10 @@ class Instance(resource.Resource):
 
     default_client_name = 'nova'
 
+    # Servers typically take tens of seconds to build, so back off polling
+    # Nova for their status rather than checking on every cycle.
+    wait_strategy = scheduler.ExponentialBackoff(maximum=15)
+
     def __init__(self, name, json_snippet, stack):
         super(Instance, self).__init__(name, json_snippet, stack)
         self.ipaddress = None
@@ -647,6 +652,7 @@ class Instance(resource.Resource):
             if server is not None:
                 self.resource_id_set(server.id)
 
+        self._batch_polls('server', server.id)
         return server, scheduler.TaskRunner(self._attach_volumes_task())
 
     def _attach_volumes_task(self):
@@ -677,12 +683,13 @@ class Instance(resource.Resource):
             cp.refresh_server(server)
             status = cp.get_status(server)
 
-        if status == 'ACTIVE':
-            return True
-
         if status in cp.deferred_server_statuses:
             return False
 
+        cp.poll_aggregator('server').unregister(server.id)
+        if status == 'ACTIVE':
+            return True
+
         if status == 'ERROR':
             fault = getattr(server, 'fault', {})
             raise resource.ResourceInError(
@@ -821,6 +828,7 @@ class Instance(resource.Resource):
         Refresh the metadata if new_metadata is None
         '''
         if new_metadata is None:
+            function.invalidate_results(self.stack)
             self.metadata_set(self.t.metadata())
 
     def validate(self):
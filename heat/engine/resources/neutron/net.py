@@ -107,6 +107,7 @@ class Net(neutron.NeutronResource):
 
         net = self.neutron().create_network({'network': props})['network']
         self.resource_id_set(net['id'])
+        self._register_for_polling('network')
 
         if dhcp_agent_ids:
             self._replace_dhcp_agents(dhcp_agent_ids)
@@ -116,8 +117,7 @@ class Net(neutron.NeutronResource):
             self.resource_id)['network']
 
     def check_create_complete(self, *args):
-        attributes = self._show_resource()
-        return self.is_built(attributes)
+        return self._check_built('network')
 
     def handle_delete(self):
         client = self.neutron()
@@ -118,6 +118,26 @@ class NeutronResource(resource.Resource):
                 resource_status=status,
                 result=_('Resource is not built'))
 
+    def _register_for_polling(self, kind):
+        '''
+        Batch the status polls of this resource with those of any sibling
+        resources of the same kind until it is built.
+        '''
+        self._batch_polls(kind, self.resource_id)
+
+    def _check_built(self, kind):
+        '''
+        Return True if the resource has been built, having polled for its
+        status in a batch with any sibling resources of the same kind.
+        '''
+        cp = self.client_plugin()
+        attributes = cp.show_resource(kind, self.resource_id)
+        if attributes['status'] == 'BUILD':
+            return False
+
+        cp.poll_aggregator(kind).unregister(self.resource_id)
+        return self.is_built(attributes)
+
     def _resolve_attribute(self, name):
         try:
             attributes = self._show_resource()
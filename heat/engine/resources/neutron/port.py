@@ -261,6 +261,7 @@ class Port(neutron.NeutronResource):
 
         port = self.neutron().create_port({'port': props})['port']
         self.resource_id_set(port['id'])
+        self._register_for_polling('port')
 
     def _prepare_port_properties(self, props, prepare_for_update=False):
         for fixed_ip in props.get(self.FIXED_IPS, []):
@@ -300,8 +301,7 @@ class Port(neutron.NeutronResource):
             self.resource_id)['port']
 
     def check_create_complete(self, *args):
-        attributes = self._show_resource()
-        return self.is_built(attributes)
+        return self._check_built('port')
 
     def handle_delete(self):
         client = self.neutron()
@@ -161,6 +161,7 @@ class Router(neutron.NeutronResource):
 
         router = self.neutron().create_router({'router': props})['router']
         self.resource_id_set(router['id'])
+        self._register_for_polling('router')
 
         if l3_agent_id:
             self._replace_agent(l3_agent_id)
@@ -170,8 +171,7 @@ class Router(neutron.NeutronResource):
             self.resource_id)['router']
 
     def check_create_complete(self, *args):
-        attributes = self._show_resource()
-        return self.is_built(attributes)
+        return self._check_built('router')
 
     def handle_delete(self):
         client = self.neutron()
@@ -24,6 +24,7 @@ from heat.common.i18n import _
 from heat.common.i18n import _LI
 from heat.engine import attributes
 from heat.engine import constraints
+from heat.engine import function
 from heat.engine import properties
 from heat.engine import resource
 from heat.engine.resources.neutron import subnet
@@ -373,6 +374,10 @@ class Server(stack_user.StackUser):
 
     default_client_name = 'nova'
 
+    # Servers typically take tens of seconds to build, so back off polling
+    # Nova for their status rather than checking on every cycle.
+    wait_strategy = scheduler.ExponentialBackoff(maximum=15)
+
     def __init__(self, name, json_snippet, stack):
         super(Server, self).__init__(name, json_snippet, stack)
         if self.user_data_software_config():
@@ -578,6 +583,7 @@ class Server(stack_user.StackUser):
             if server is not None:
                 self.resource_id_set(server.id)
 
+        self._batch_polls('server', server.id)
         return server
 
     def check_create_complete(self, server):
@@ -592,7 +598,9 @@ class Server(stack_user.StackUser):
 
         if status in cp.deferred_server_statuses:
             return False
-        elif status == 'ACTIVE':
+
+        cp.poll_aggregator('server').unregister(server.id)
+        if status == 'ACTIVE':
             return True
         elif status == 'ERROR':
             fault = getattr(server, 'fault', {})
@@ -936,6 +944,7 @@ class Server(stack_user.StackUser):
             # and the resource itself adds keys to the metadata which
             # are not specified in the template (e.g the deployments data)
             meta = self.metadata_get(refresh=True) or {}
+            function.invalidate_results(self.stack)
             tmpl_meta = self.t.metadata()
             meta.update(tmpl_meta)
             self.metadata_set(meta)
@@ -165,6 +165,14 @@ class ResourceDefinitionCore(object):
                                strict_func_deps(self._metadata,
                                                 path(METADATA)))
 
+    def metadata_dependencies(self):
+        """
+        Return the Resource objects referenced by the metadata of this
+        resource.
+        """
+        return function.dependencies(self._metadata,
+                                     '.'.join([self.name, METADATA]))
+
     def properties(self, schema, context=None):
         """
         Return a Properties object representing the resource properties.
@@ -11,8 +11,11 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
 import functools
 import itertools
+import numbers
+import random
 import sys
 import time
 import types
@@ -125,6 +128,52 @@ class ExceptionGroup(Exception):
         return six.text_type(map(six.text_type, self.exceptions))
 
 
+class ExponentialBackoff(object):
+    """
+    A wait strategy that backs off exponentially between steps of a task.
+
+    Iterating over the strategy yields the successive times, in seconds, to
+    wait between steps. The wait starts at `initial` and is multiplied by
+    `factor` after each step, up to a limit of `maximum`. Each wait is varied
+    randomly by up to the fraction `jitter` of its value, so that many tasks
+    started together do not all poll at the same moment.
+
+    The strategy itself holds no state, so a single instance may be shared
+    between any number of tasks.
+    """
+
+    def __init__(self, initial=1, factor=2, maximum=30, jitter=0.1):
+        self.initial = initial
+        self.factor = factor
+        self.maximum = maximum
+        self.jitter = jitter
+
+    def __iter__(self):
+        wait = self.initial
+        while True:
+            yield wait * (1 + random.uniform(-self.jitter, self.jitter))
+            wait = min(wait * self.factor, self.maximum)
+
+    def __repr__(self):
+        return '%s(initial=%s, factor=%s, maximum=%s, jitter=%s)' % (
+            type(self).__name__, self.initial, self.factor, self.maximum,
+            self.jitter)
+
+
+def wait_times(wait_time):
+    """
+    Return an iterator over the times to wait between the steps of a task.
+
+    The wait_time may be a number of seconds to wait between every step, None
+    to avoid waiting at all, or a wait strategy such as ExponentialBackoff
+    (or any other iterable of wait times). Once a finite iterable of wait
+    times is exhausted, no further waits are done.
+    """
+    if wait_time is None or isinstance(wait_time, numbers.Number):
+        return itertools.repeat(wait_time)
+    return iter(wait_time)
+
+
 class TaskRunner(object):
     """
     Wrapper for a resumable task (co-routine).
@@ -169,13 +218,16 @@ class TaskRunner(object):
         Start and run the task to completion.
 
         The task will sleep for `wait_time` seconds between steps. To avoid
-        sleeping, pass `None` for `wait_time`.
+        sleeping, pass `None` for `wait_time`. A wait strategy, such as
+        ExponentialBackoff, may be passed instead to vary the time between
+        steps.
         """
+        waits = wait_times(wait_time)
         self.start(timeout=timeout)
         # ensure that wait is applied only if task has not completed.
         if not self.done():
-            self._sleep(wait_time)
-        self.run_to_completion(wait_time=wait_time)
+            self._sleep(next(waits, None))
+        self.run_to_completion(wait_time=waits)
 
     def start(self, timeout=None):
         """
@@ -231,10 +283,13 @@ class TaskRunner(object):
         Run the task to completion.
 
         The task will sleep for `wait_time` seconds between steps. To avoid
-        sleeping, pass `None` for `wait_time`.
+        sleeping, pass `None` for `wait_time`. A wait strategy, such as
+        ExponentialBackoff, may be passed instead to vary the time between
+        steps.
         """
+        waits = wait_times(wait_time)
         while not self.step():
-            self._sleep(wait_time)
+            self._sleep(next(waits, None))
 
     def cancel(self, grace_period=None):
         """Cancel the task and mark it as done."""
@@ -332,7 +387,8 @@ class DependencyTaskGroup(object):
 
     def __init__(self, dependencies, task=lambda o: o(),
                  reverse=False, name=None, error_wait_time=None,
-                 aggregate_exceptions=False):
+                 aggregate_exceptions=False, wait_strategy=None,
+                 step_callback=None):
         """
         Initialise with the task dependencies and (optionally) a task to run on
         each.
@@ -350,12 +406,38 @@ class DependencyTaskGroup(object):
         will not be cancelled in the event of an error (operations downstream
         of the error will be cancelled). Once all chains are complete, any
         errors will be rolled up into an ExceptionGroup exception.
+
+        If a wait_strategy is supplied, it is called with each object in the
+        dependency tree and may return a wait strategy (such as
+        ExponentialBackoff) for the corresponding subtask, or None. A subtask
+        with a wait strategy is stepped only once the time given by the
+        strategy has elapsed since its last step, rather than every time the
+        group is stepped.
+
+        If a step_callback is supplied, it is called with no arguments at the
+        end of every step of the group, before yielding control.
         """
         self._runners = dict((o, TaskRunner(task, o)) for o in dependencies)
         self._graph = dependencies.graph(reverse=reverse)
         self.error_wait_time = error_wait_time
         self.aggregate_exceptions = aggregate_exceptions
 
+        # Rather than rescanning the whole graph on every step, keep a count
+        # of the unsatisfied requirements of each subtask and a queue of the
+        # subtasks that are ready to start. These are updated only when a
+        # subtask completes, so the cost of a step is proportional to the
+        # number of subtasks that are actually running.
+        self._requirements = dict((k, len(n))
+                                  for k, n in six.iteritems(self._graph))
+        self._ready_queue = collections.deque(
+            k for k, n in six.iteritems(self._requirements) if not n)
+        self._in_progress = collections.OrderedDict()
+
+        self._wait_strategy = wait_strategy
+        self._waits = {}
+        self._step_callback = step_callback
+        self._due = {}
+
         if name is None:
             name = '(%s) %s' % (getattr(task, '__name__',
                                         task_description(task)),
@@ -370,19 +452,27 @@ class DependencyTaskGroup(object):
     def __call__(self):
         """Return a co-routine which runs the task group."""
         raised_exceptions = []
-        while any(self._runners.itervalues()):
+        while self._pending():
+            # The subtask being started or stepped, if any
+            k = r = None
             try:
                 for k, r in self._ready():
                     r.start()
+                    self._schedule(k)
+                k = r = None
 
+                if self._step_callback is not None:
+                    self._step_callback()
                 yield
 
                 for k, r in self._running():
                     if r.step():
-                        del self._graph[k]
+                        self._complete(k)
+                    else:
+                        self._schedule(k)
             except Exception:
                 exc_info = sys.exc_info()
-                if self.aggregate_exceptions:
+                if self.aggregate_exceptions and k is not None:
                     self._cancel_recursively(k, r)
                 else:
                     self.cancel_all(grace_period=self.error_wait_time)
@@ -399,36 +489,96 @@ class DependencyTaskGroup(object):
                 raise exc_type, exc_val, traceback
 
     def cancel_all(self, grace_period=None):
+        # Step any subtasks that remain on every cycle from now on, so that
+        # they are cancelled promptly once their grace period expires.
+        self._wait_strategy = None
+        self._due.clear()
+
         for r in self._runners.itervalues():
             r.cancel(grace_period=grace_period)
 
     def _cancel_recursively(self, key, runner):
-        runner.cancel()
-        node = self._graph[key]
-        for dependent_node in node.required_by():
-            node_runner = self._runners[dependent_node]
-            self._cancel_recursively(dependent_node, node_runner)
+        cancelled = set()
+        to_cancel = [(key, runner)]
+        while to_cancel:
+            k, r = to_cancel.pop()
+            if k in cancelled:
+                continue
+            cancelled.add(k)
+
+            r.cancel()
+            self._in_progress.pop(k, None)
+            to_cancel.extend((d, self._runners[d])
+                             for d in self._graph[k].required_by())
+
+    def _schedule(self, key):
+        """
+        Record the time at which a subtask that has a wait strategy is next
+        due to be stepped.
+        """
+        if self._wait_strategy is None or not self._runners[key]:
+            return
+
+        if key not in self._waits:
+            strategy = self._wait_strategy(key)
+            if strategy is None:
+                return
+            self._waits[key] = wait_times(strategy)
+
+        wait_time = next(self._waits[key], None)
+        if wait_time is None:
+            self._due.pop(key, None)
+        else:
+            self._due[key] = wallclock() + wait_time
 
-        del self._graph[key]
+    def _complete(self, key):
+        """
+        Mark a subtask as complete, and queue any subtasks that were waiting
+        only on it.
+        """
+        del self._in_progress[key]
+        self._due.pop(key, None)
+        self._waits.pop(key, None)
+
+        for rqr in self._graph[key].required_by():
+            self._requirements[rqr] -= 1
+            if not self._requirements[rqr]:
+                self._ready_queue.append(rqr)
+
+    def _pending(self):
+        """Return True if there are subtasks remaining to run."""
+        # Discard any queued subtasks that were cancelled before starting
+        while (self._ready_queue and
+               not self._runners[self._ready_queue[0]]):
+            self._ready_queue.popleft()
+        return (bool(self._ready_queue) or
+                any(self._in_progress.itervalues()))
 
     def _ready(self):
         """
         Iterate over all subtasks that are ready to start - i.e. all their
         dependencies have been satisfied but they have not yet been started.
         """
-        for k, n in six.iteritems(self._graph):
-            if not n:
-                runner = self._runners[k]
-                if runner and not runner.started():
-                    yield k, runner
+        while self._ready_queue:
+            k = self._ready_queue.popleft()
+            runner = self._runners[k]
+            if runner and not runner.started():
+                self._in_progress[k] = runner
+                yield k, runner
 
     def _running(self):
         """
         Iterate over all subtasks that are currently running - i.e. they have
-        been started but have not yet completed.
+        been started but have not yet completed - and are due to be stepped.
+
+        Wait strategies are honoured only when sleeping is enabled.
         """
-        running = lambda (k, r): k in self._graph and r.started()
-        return itertools.ifilter(running, six.iteritems(self._runners))
+        if not (self._due and ENABLE_SLEEP):
+            return list(six.iteritems(self._in_progress))
+
+        now = wallclock()
+        return [(k, r) for k, r in six.iteritems(self._in_progress)
+                if self._due.get(k, 0) <= now]
 
 
 class PollingTaskGroup(object):
@@ -21,6 +21,7 @@ import eventlet
 from oslo.config import cfg
 from oslo import messaging
 from oslo.serialization import jsonutils
+from oslo.utils import timeutils
 from oslo.utils import uuidutils
 from osprofiler import profiler
 import requests
@@ -40,7 +41,6 @@ from heat.engine import api
 from heat.engine import attributes
 from heat.engine import clients
 from heat.engine import environment
-from heat.engine import event as evt
 from heat.engine import parameter_groups
 from heat.engine import properties
 from heat.engine import resources
@@ -59,6 +59,10 @@ cfg.CONF.import_opt('max_resources_per_stack', 'heat.common.config')
 cfg.CONF.import_opt('max_stacks_per_tenant', 'heat.common.config')
 cfg.CONF.import_opt('enable_stack_abandon', 'heat.common.config')
 cfg.CONF.import_opt('enable_stack_adopt', 'heat.common.config')
+cfg.CONF.import_opt('max_events_per_stack', 'heat.common.config')
+cfg.CONF.import_opt('watch_data_retention', 'heat.common.config')
+cfg.CONF.import_opt('engine_heartbeat_interval', 'heat.common.config')
+cfg.CONF.import_opt('stack_lock_lease_time', 'heat.common.config')
 
 LOG = logging.getLogger(__name__)
 
@@ -81,6 +85,8 @@ class ThreadGroupManager(object):
         super(ThreadGroupManager, self).__init__()
         self.groups = {}
         self.events = collections.defaultdict(list)
+        # IDs of the stacks whose threads hold a stack lock
+        self.locked = set()
 
         # Create dummy service task, because when there is nothing queued
         # on self.tg the process exits
@@ -162,9 +168,11 @@ class ThreadGroupManager(object):
             """
             Callback function that will be passed to GreenThread.link().
             """
+            self.locked.discard(stack.id)
             lock.release(*args)
 
         th = self.start(stack.id, func, *args, **kwargs)
+        self.locked.add(stack.id)
         th.link(release, stack.id)
         return th
 
@@ -215,6 +223,24 @@ class ThreadGroupManager(object):
         for event in self.events.pop(stack_id, []):
             event.send(message)
 
+    def stop_lost_locks(self, engine_id):
+        '''
+        Stop the threads working on any stack whose lock is no longer held by
+        the given engine, or cannot be confirmed to be.
+        '''
+        for stack_id in list(self.locked):
+            try:
+                lock_engine_id = db_api.stack_lock_get_engine_id(stack_id)
+            except Exception as ex:
+                LOG.error(_LE('Failed to check the lock on stack %(stack)s: '
+                              '%(ex)s'), {'stack': stack_id, 'ex': ex})
+                lock_engine_id = None
+            if lock_engine_id != engine_id:
+                LOG.warn(_LW('Engine %(engine)s has lost the lock on stack '
+                             '%(stack)s, stopping work on it'),
+                         {'engine': engine_id, 'stack': stack_id})
+                self.stop(stack_id)
+
 
 @profiler.trace_cls("rpc")
 class EngineListener(service.Service):
@@ -267,7 +293,7 @@ class EngineService(service.Service):
     by the RPC caller.
     """
 
-    RPC_API_VERSION = '1.3'
+    RPC_API_VERSION = '1.4'
 
     def __init__(self, host, topic, manager=None):
         super(EngineService, self).__init__()
@@ -282,6 +308,12 @@ class EngineService(service.Service):
         self.engine_id = None
         self.thread_group_mgr = None
         self.target = None
+        # Local time of the last heartbeat that was recorded
+        self._heartbeat_at = None
+
+        # Names of the signalled resources whose dependent metadata is
+        # waiting to be refreshed, keyed by the ID of the stack
+        self._metadata_refreshes = {}
 
         if cfg.CONF.instance_user:
             warnings.warn('The "instance_user" option in heat.conf is '
@@ -304,16 +336,95 @@ class EngineService(service.Service):
             self.thread_group_mgr = ThreadGroupManager()
         self.stack_watch = service_stack_watch.StackWatch(
             self.thread_group_mgr)
+        self.stack_watch.start()
+
+        self.thread_group_mgr.add_timer(cfg.CONF.periodic_interval,
+                                        self.purge_watch_data)
+
+    def purge_watch_data(self):
+        '''
+        Delete the watch data samples which are older than both
+        watch_data_retention and the Period of their watch rule.
+
+        Every host runs this task, but only the first of the live engine
+        hosts does the purge.
+        '''
+        try:
+            hosts = db_api.engine_get_all_hosts(
+                cfg.CONF.stack_lock_lease_time)
+            if hosts and hosts[0] != self.host:
+                return
+            deleted = db_api.watch_data_purge(
+                context.get_admin_context(), cfg.CONF.watch_data_retention)
+        except Exception as ex:
+            LOG.error(_LE('Failed to purge watch data: %s'), ex)
+        else:
+            if deleted:
+                LOG.debug('Purged %d watch data samples' % deleted)
+
+    def prune_events(self):
+        '''
+        Delete the oldest events of any stacks that have more than
+        max_events_per_stack events. This runs as a periodic task, so that
+        storing an event never has to count the existing events.
+        '''
+        try:
+            deleted = db_api.event_prune(context.get_admin_context())
+        except Exception as ex:
+            LOG.error(_LE('Failed to prune events: %s'), ex)
+        else:
+            if deleted:
+                LOG.debug('Pruned %d events' % deleted)
+
+    def engine_heartbeat(self):
+        '''
+        Record that this engine is alive, renewing the leases on the stack
+        locks that it holds.
+
+        Once no heartbeat has been recorded for longer than the lease time,
+        other engines may have stolen the locks, so stop working on any stack
+        whose lock is no longer held.
+        '''
+        lapsed = (self._heartbeat_at is not None and
+                  timeutils.is_older_than(self._heartbeat_at,
+                                          cfg.CONF.stack_lock_lease_time))
+        try:
+            db_api.engine_heartbeat(self.engine_id, self.host)
+        except Exception as ex:
+            LOG.error(_LE('Failed to send engine heartbeat: %s'), ex)
+        else:
+            self._heartbeat_at = timeutils.utcnow()
 
-        # Create a periodic_watcher_task per-stack
-        admin_context = context.get_admin_context()
-        stacks = db_api.stack_get_all(admin_context, tenant_safe=False)
-        for s in stacks:
-            self.stack_watch.start_watch_task(s.id, admin_context)
+        if lapsed and self.thread_group_mgr is not None:
+            self.thread_group_mgr.stop_lost_locks(self.engine_id)
+
+    def purge_engines(self):
+        '''
+        Delete the registrations of dead engines that no longer hold any
+        stack locks.
+        '''
+        try:
+            deleted = db_api.engine_purge(cfg.CONF.stack_lock_lease_time)
+        except Exception as ex:
+            LOG.error(_LE('Failed to purge dead engines: %s'), ex)
+        else:
+            if deleted:
+                LOG.debug('Purged %d dead engines' % deleted)
 
     def start(self):
         self.engine_id = stack_lock.StackLock.generate_engine_id()
+        # Register before taking any locks, so that other engines never need
+        # to ask this one whether it is alive
+        self.engine_heartbeat()
+        self.tg.add_timer(cfg.CONF.engine_heartbeat_interval,
+                          self.engine_heartbeat,
+                          initial_delay=cfg.CONF.engine_heartbeat_interval)
         self.thread_group_mgr = ThreadGroupManager()
+        if cfg.CONF.max_events_per_stack:
+            self.thread_group_mgr.add_timer(cfg.CONF.periodic_interval,
+                                            self.prune_events)
+        self.thread_group_mgr.add_timer(cfg.CONF.periodic_interval,
+                                        self.purge_engines)
         self.listener = EngineListener(self.host, self.engine_id,
                                        self.thread_group_mgr)
         LOG.debug("Starting listener for engine %s" % self.engine_id)
@@ -348,6 +459,13 @@ class EngineService(service.Service):
             self.thread_group_mgr.stop(stack_id, True)
             LOG.info(_LI("Stack %s processing was finished"), stack_id)
 
+        # All locks have been released, so stop the heartbeat and deregister
+        self.tg.stop_timers()
+        try:
+            db_api.engine_delete(self.engine_id)
+        except Exception as ex:
+            LOG.error(_LE('Failed to deregister engine: %s'), ex)
+
         # Terminate the engine process
         LOG.info(_LI("All threads were gone, terminating engine"))
         super(EngineService, self).stop()
@@ -418,12 +536,15 @@ class EngineService(service.Service):
     @request_context
     def list_stacks(self, cnxt, limit=None, marker=None, sort_keys=None,
                     sort_dir=None, filters=None, tenant_safe=True,
-                    show_deleted=False, show_nested=False):
+                    show_deleted=False, show_nested=False, summary=False):
         """
         The list_stacks method returns attributes of all stacks.  It supports
         pagination (``limit`` and ``marker``), sorting (``sort_keys`` and
         ``sort_dir``) and filtering (``filters``) of the results.
 
+        If ``summary`` is true, the stacks are not loaded and their parameters
+        and outputs are omitted, which makes listing many stacks much cheaper.
+
         :param cnxt: RPC context
         :param limit: the number of stacks to list (integer or string)
         :param marker: the ID of the last item in the previous page
@@ -433,8 +554,16 @@ class EngineService(service.Service):
         :param tenant_safe: if true, scope the request by the current tenant
         :param show_deleted: if true, show soft-deleted stacks
         :param show_nested: if true, show nested stacks
+        :param summary: if true, return only a summary of each stack
         :returns: a list of formatted stacks
         """
+        if summary:
+            stacks = db_api.stack_get_all_summaries(
+                cnxt, limit=limit, sort_keys=sort_keys, marker=marker,
+                sort_dir=sort_dir, filters=filters, tenant_safe=tenant_safe,
+                show_deleted=show_deleted, show_nested=show_nested)
+            return [api.format_stack_summary(s) for s in stacks]
+
         stacks = parser.Stack.load_all(cnxt, limit, marker, sort_keys,
                                        sort_dir, filters, tenant_safe,
                                        show_deleted, resolve_data=False,
@@ -581,18 +710,15 @@ class EngineService(service.Service):
                     stack.state_set(stack.action, stack.FAILED,
                                     six.text_type(ex))
 
-            # Create/Adopt a stack, and create the periodic task if successful
+            # Create/Adopt a stack. Any watch rules of the stack are
+            # scheduled by the periodic watcher task.
             if stack.adopt_stack_data:
                 stack.adopt()
             elif stack.status != stack.FAILED:
                 stack.create()
 
-            if (stack.action in (stack.CREATE, stack.ADOPT)
+            if not (stack.action in (stack.CREATE, stack.ADOPT)
                     and stack.status == stack.COMPLETE):
-                if self.stack_watch:
-                    # Schedule a periodic watcher task for this stack
-                    self.stack_watch.start_watch_task(stack.id, cnxt)
-            else:
                 LOG.info(_LI("Stack create failed, status %s"), stack.status)
 
         stack = self._parse_template_and_validate_stack(cnxt,
@@ -974,17 +1100,7 @@ class EngineService(service.Service):
                                                     sort_dir=sort_dir,
                                                     filters=filters)
 
-        stacks = {}
-
-        def get_stack(stack_id):
-            if stack_id not in stacks:
-                stacks[stack_id] = parser.Stack.load(cnxt, stack_id)
-            return stacks[stack_id]
-
-        return [api.format_event(evt.Event.load(cnxt,
-                                                e.id, e,
-                                                get_stack(e.stack_id)))
-                for e in events]
+        return [api.format_db_event(e) for e in events]
 
     def _authorize_stack_user(self, cnxt, stack, resource_name):
         '''
@@ -1049,13 +1165,14 @@ class EngineService(service.Service):
             LOG.debug("signaling resource %s:%s" % (stack.name, rsrc.name))
             rsrc.signal(details)
 
-            # Refresh the metadata for all other resources, since signals can
+            # Refresh the metadata of other resources, since signals can
             # update metadata which is used by other resources, e.g
             # when signalling a WaitConditionHandle resource, and other
             # resources may refer to WaitCondition Fn::GetAtt Data
-            for r in stack.dependencies:
-                if r.name != rsrc.name and r.id is not None:
-                    r.metadata_update()
+            if sync_call:
+                stack.refresh_metadata([rsrc.name])
+            else:
+                self._refresh_metadata(stack, rsrc.name)
 
         s = self._get_stack(cnxt, stack_identity)
 
@@ -1075,6 +1192,31 @@ class EngineService(service.Service):
                 self.thread_group_mgr.start(stack.id, _resource_signal,
                                             rsrc, details)
 
+    def _refresh_metadata(self, stack, resource_name):
+        '''
+        Refresh the metadata that depends on a signalled resource, coalescing
+        the refreshes for signals to the same stack that arrive in a burst.
+
+        While a refresh is in progress, signals to other resources in the
+        stack only record the resource name; the thread doing the refresh
+        then refreshes once more for all of the names recorded meanwhile.
+        The metadata is always re-resolved from the database, so it does not
+        matter which thread's copy of the stack does the refresh.
+        '''
+        pending = self._metadata_refreshes.get(stack.id)
+        if pending is not None:
+            pending.add(resource_name)
+            return
+
+        self._metadata_refreshes[stack.id] = set([resource_name])
+        try:
+            while self._metadata_refreshes[stack.id]:
+                changed = self._metadata_refreshes[stack.id]
+                self._metadata_refreshes[stack.id] = set()
+                stack.refresh_metadata(changed)
+        finally:
+            del self._metadata_refreshes[stack.id]
+
     @request_context
     def find_physical_resource(self, cnxt, physical_resource_id):
         """
@@ -1249,13 +1391,11 @@ class EngineService(service.Service):
         refresh_stack = parser.Stack.load(cnxt, stack=s,
                                           use_stored_context=True)
 
-        # Refresh the metadata for all other resources, since we expect
+        # Refresh the metadata for other resources, since we expect
         # resource_name to be a WaitCondition resource, and other
         # resources may refer to WaitCondition Fn::GetAtt Data, which
         # is updated here.
-        for res in refresh_stack.dependencies:
-            if res.name != resource_name and res.id is not None:
-                res.metadata_update()
+        refresh_stack.refresh_metadata([resource_name])
 
         return resource.metadata_get()
 
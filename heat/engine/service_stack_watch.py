@@ -11,9 +11,15 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import datetime
+import heapq
+
+from eventlet import greenpool
+from oslo.config import cfg
 from oslo.utils import timeutils
 
 from heat.common import context
+from heat.common import hash_ring
 from heat.common.i18n import _LE
 from heat.common.i18n import _LW
 from heat.db import api as db_api
@@ -22,86 +28,168 @@ from heat.engine import watchrule
 from heat.openstack.common import log as logging
 from heat.rpc import api as rpc_api
 
+cfg.CONF.import_opt('periodic_interval', 'heat.common.config')
+cfg.CONF.import_opt('watch_rule_workers', 'heat.common.config')
+cfg.CONF.import_opt('watch_rule_rescan_interval', 'heat.common.config')
+cfg.CONF.import_opt('stack_lock_lease_time', 'heat.common.config')
+cfg.CONF.import_opt('host', 'heat.common.config')
+
 LOG = logging.getLogger(__name__)
 
 
 class StackWatch(object):
-    def __init__(self, thread_group_mgr):
-        self.thread_group_mgr = thread_group_mgr
+    '''
+    Engine-wide scheduler for the evaluation of watch rules.
 
-    def start_watch_task(self, stack_id, cnxt):
+    A single periodic task runs the rules which are due, in order of their
+    next evaluation time, in a bounded pool of green threads. The hosts of
+    the live engines in the engine registry share the evaluation: the rules
+    of each stack are evaluated only by the host it hashes to.
 
-        def stack_has_a_watchrule(sid):
-            wrs = db_api.watch_rule_get_all_by_stack(cnxt, sid)
+    All of the rules are re-scanned every watch_rule_rescan_interval seconds
+    and whenever the live hosts change, so that rules which were skipped
+    (e.g. while controlled by Ceilometer) or committed out of ID order are
+    not missed.
+    '''
 
-            now = timeutils.utcnow()
-            start_watch_thread = False
-            for wr in wrs:
-                # reset the last_evaluated so we don't fire off alarms when
-                # the engine has not been running.
+    def __init__(self, thread_group_mgr):
+        self.thread_group_mgr = thread_group_mgr
+        self.ring = hash_ring.HashRing([])
+        self.pool = greenpool.GreenPool(cfg.CONF.watch_rule_workers)
+        # Heap of (due time, watch rule ID), and the IDs of the rules which
+        # are either in it or being evaluated
+        self._queue = []
+        self._scheduled = set()
+        # ID of the most recent watch rule seen, and the time at which all
+        # of the rules are next re-scanned
+        self._marker = None
+        self._rescan_at = None
+
+    def start(self):
+        '''
+        Schedule all of the existing watch rules, and start the periodic
+        task which evaluates them.
+        '''
+        self.schedule_new_rules(context.get_admin_context(), reset=True)
+        self.thread_group_mgr.add_timer(cfg.CONF.periodic_interval,
+                                        self.periodic_watcher_task)
+
+    def is_local(self, stack_id):
+        '''Return True if this engine evaluates the rules of the stack.'''
+        host = self.ring.get_host(stack_id)
+        return host is None or host == cfg.CONF.host
+
+    def update_ring(self):
+        '''
+        Rebuild the hash ring from the hosts of the live engines, and return
+        True if they have changed.
+        '''
+        hosts = db_api.engine_get_all_hosts(cfg.CONF.stack_lock_lease_time)
+        if frozenset(hosts) == self.ring.hosts:
+            return False
+        self.ring = hash_ring.HashRing(hosts)
+        return True
+
+    def _push(self, due, wr_id):
+        self._scheduled.add(wr_id)
+        heapq.heappush(self._queue, (due, wr_id))
+
+    def schedule_new_rules(self, cnxt, reset=False):
+        '''
+        Schedule the watch rules created since the last call, or all of the
+        local rules not already scheduled if a re-scan is due.
+
+        If reset is True the last_evaluated time of the rules is reset, so
+        that we don't fire off alarms when the engine has not been running.
+        '''
+        now = timeutils.utcnow()
+        marker = self._marker
+        if (self.update_ring() or self._rescan_at is None or
+                now >= self._rescan_at):
+            marker = None
+            self._rescan_at = now + datetime.timedelta(
+                seconds=cfg.CONF.watch_rule_rescan_interval)
+
+        wrs = db_api.watch_rule_get_all(cnxt, marker=marker)
+        for wr in wrs:
+            self._marker = wr.id
+            if (wr.id in self._scheduled or
+                    wr.state == rpc_api.WATCH_STATE_CEILOMETER_CONTROLLED or
+                    not self.is_local(wr.stack_id)):
+                continue
+            if reset:
                 db_api.watch_rule_update(cnxt, wr.id, {'last_evaluated': now})
-
-                if wr.state != rpc_api.WATCH_STATE_CEILOMETER_CONTROLLED:
-                    start_watch_thread = True
-
-            children = db_api.stack_get_all_by_owner_id(cnxt, sid)
-            for child in children:
-                if stack_has_a_watchrule(child.id):
-                    start_watch_thread = True
-
-            return start_watch_thread
-
-        if stack_has_a_watchrule(stack_id):
-            self.thread_group_mgr.add_timer(
-                stack_id,
-                self.periodic_watcher_task,
-                sid=stack_id)
-
-    def check_stack_watches(self, sid):
-        # Retrieve the stored credentials & create context
+                wr.last_evaluated = now
+            rule = watchrule.WatchRule.load(cnxt, watch=wr)
+            self._push(rule.last_evaluated + rule.timeperiod, wr.id)
+
+    def check_watch_rule(self, wr_id):
+        '''
+        Evaluate a watch rule and schedule its next evaluation.
+        '''
+        due = None
+        try:
+            due = self._evaluate_rule(wr_id)
+        except Exception as ex:
+            LOG.error(_LE('Failed to evaluate watch rule %(id)s: %(ex)s'),
+                      {'id': wr_id, 'ex': ex})
+            due = (timeutils.utcnow() +
+                   datetime.timedelta(seconds=cfg.CONF.periodic_interval))
+        finally:
+            if due is None:
+                self._scheduled.discard(wr_id)
+            else:
+                self._push(due, wr_id)
+
+    def _evaluate_rule(self, wr_id):
         # Require tenant_safe=False to the stack_get to defeat tenant
         # scoping otherwise we fail to retrieve the stack
-        LOG.debug("Periodic watcher task for stack %s" % sid)
         admin_context = context.get_admin_context()
-        db_stack = db_api.stack_get(admin_context, sid, tenant_safe=False,
-                                    eager_load=True)
+        wr = db_api.watch_rule_get(admin_context, wr_id)
+        if (wr is None or
+                wr.state == rpc_api.WATCH_STATE_CEILOMETER_CONTROLLED or
+                not self.is_local(wr.stack_id)):
+            return None
+        db_stack = db_api.stack_get(admin_context, wr.stack_id,
+                                    tenant_safe=False)
         if not db_stack:
             LOG.error(_LE("Unable to retrieve stack %s for periodic task"),
-                      sid)
-            return
-        stk = stack.Stack.load(admin_context, stack=db_stack,
-                               use_stored_context=True)
+                      wr.stack_id)
+            return None
 
-        # recurse into any nested stacks.
-        children = db_api.stack_get_all_by_owner_id(admin_context, sid)
-        for child in children:
-            self.check_stack_watches(child.id)
-
-        # Get all watchrules for this stack and evaluate them
-        try:
-            wrs = db_api.watch_rule_get_all_by_stack(admin_context, sid)
-        except Exception as ex:
-            LOG.warn(_LW('periodic_task db error watch rule removed? %(ex)s'),
-                     ex)
-            return
+        # The rule only needs the stored credentials to be evaluated, the
+        # stack itself is loaded only when an alarm action has to be run
+        stored_context = stack.load_stored_context(admin_context,
+                                                   db_stack.user_creds_id)
 
-        def run_alarm_action(stk, actions, details):
+        def run_alarm_action(actions, details):
             for action in actions:
                 action(details=details)
+            stk = stack.Stack.load(admin_context, stack=db_stack,
+                                   use_stored_context=True)
             for res in stk.itervalues():
                 res.metadata_update()
 
-        for wr in wrs:
-            rule = watchrule.WatchRule.load(stk.context, watch=wr)
-            actions = rule.evaluate()
-            if actions:
-                self.thread_group_mgr.start(sid, run_alarm_action, stk,
-                                            actions, rule.get_details())
+        rule = watchrule.WatchRule.load(stored_context, watch=wr)
+        actions = rule.evaluate()
+        if actions:
+            self.thread_group_mgr.start(db_stack.id, run_alarm_action,
+                                        actions, rule.get_details())
+        return rule.last_evaluated + rule.timeperiod
 
-    def periodic_watcher_task(self, sid):
+    def periodic_watcher_task(self):
         """
-        Periodic task, created for each stack, triggers watch-rule
-        evaluation for all rules defined for the stack
-        sid = stack ID
+        Periodic task which schedules any new watch rules, and evaluates
+        the rules which are due
         """
-        self.check_stack_watches(sid)
+        LOG.debug("Periodic watcher task")
+        try:
+            self.schedule_new_rules(context.get_admin_context())
+        except Exception as ex:
+            LOG.warn(_LW('periodic_task db error %s'), ex)
+
+        now = timeutils.utcnow()
+        while self._queue and self._queue[0][0] <= now:
+            due, wr_id = heapq.heappop(self._queue)
+            # Blocks while all of the workers are busy
+            self.pool.spawn_n(self.check_watch_rule, wr_id)
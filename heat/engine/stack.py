@@ -12,8 +12,10 @@
 #    under the License.
 
 import collections
+import contextlib
 import copy
 import datetime
+import operator
 import re
 import warnings
 
@@ -41,6 +43,7 @@ from heat.engine import resources
 from heat.engine import scheduler
 from heat.engine import template as tmpl
 from heat.engine import update
+from heat.engine import write_buffer
 from heat.openstack.common import log as logging
 from heat.rpc import api as rpc_api
 
@@ -56,6 +59,27 @@ class ForcedCancel(BaseException):
         return "Operation cancelled"
 
 
+def load_stored_context(context, user_creds_id):
+    """Return a context built from the stored credentials of a stack.
+
+    This avoids loading the whole stack when only its stored credentials
+    are needed.
+    """
+    if user_creds_id:
+        creds = db_api.user_creds_get(user_creds_id)
+        # Maintain request_id from context so we retain traceability
+        # in situations where servicing a request requires switching from
+        # the request context to the stored context
+        creds['request_id'] = context.request_id
+        # We don't store roles in the user_creds table, so disable the
+        # policy check for admin by setting is_admin=False.
+        creds['is_admin'] = False
+        return common_context.RequestContext.from_dict(creds)
+    else:
+        msg = _("Attempt to use stored_context with no user_creds")
+        raise exception.Error(msg)
+
+
 class Stack(collections.Mapping):
 
     ACTIONS = (
@@ -79,7 +103,7 @@ class Stack(collections.Mapping):
                  created_time=None, updated_time=None,
                  user_creds_id=None, tenant_id=None,
                  use_stored_context=False, username=None,
-                 nested_depth=0, strict_validate=True):
+                 nested_depth=0, strict_validate=True, root_stack_id=None):
         '''
         Initialise from a context, name, Template object and (optionally)
         Environment object. The database ID may also be initialised, if the
@@ -107,10 +131,14 @@ class Stack(collections.Mapping):
         self.timeout_mins = timeout_mins
         self.disable_rollback = disable_rollback
         self.parent_resource = parent_resource
+        # Incremented to invalidate the cached results of functions
+        self.result_epoch = 0
         self._resources = None
         self._dependencies = None
         self._access_allowed_handlers = {}
+        self.write_buffer = None
         self._db_resources = None
+        self._db_nested = None
         self.adopt_stack_data = adopt_stack_data
         self.stack_user_project_id = stack_user_project_id
         self.created_time = created_time
@@ -118,6 +146,7 @@ class Stack(collections.Mapping):
         self.user_creds_id = user_creds_id
         self.nested_depth = nested_depth
         self.strict_validate = strict_validate
+        self._root_stack_id = root_stack_id
 
         if use_stored_context:
             self.context = self.stored_context()
@@ -144,19 +173,7 @@ class Stack(collections.Mapping):
             self.outputs = {}
 
     def stored_context(self):
-        if self.user_creds_id:
-            creds = db_api.user_creds_get(self.user_creds_id)
-            # Maintain request_id from self.context so we retain traceability
-            # in situations where servicing a request requires switching from
-            # the request context to the stored context
-            creds['request_id'] = self.context.request_id
-            # We don't store roles in the user_creds table, so disable the
-            # policy check for admin by setting is_admin=False.
-            creds['is_admin'] = False
-            return common_context.RequestContext.from_dict(creds)
-        else:
-            msg = _("Attempt to use stored_context with no user_creds")
-            raise exception.Error(msg)
+        return load_stored_context(self.context, self.user_creds_id)
 
     @property
     def resources(self):
@@ -174,19 +191,98 @@ class Stack(collections.Mapping):
         Iterates over all the resources in a stack, including nested stacks up
         to `nested_depth` levels below.
         '''
-        for res in self.values():
-            yield res
+        with self._preloaded_nested_stacks(nested_depth):
+            for res in self.values():
+                yield res
 
-            get_nested = getattr(res, 'nested', None)
-            if not callable(get_nested) or nested_depth == 0:
-                continue
+                get_nested = getattr(res, 'nested', None)
+                if not callable(get_nested) or nested_depth == 0:
+                    continue
 
-            nested_stack = get_nested()
-            if nested_stack is None:
-                continue
+                nested_stack = get_nested()
+                if nested_stack is None:
+                    continue
+
+                for nested_res in nested_stack.iter_resources(
+                        nested_depth - 1):
+                    yield nested_res
 
-            for nested_res in nested_stack.iter_resources(nested_depth - 1):
-                yield nested_res
+    def load_nested_stacks(self, nested_depth=None):
+        '''
+        Fetch the stored data of the stacks nested below this one, up to
+        `nested_depth` levels below (or all of them, by default). Backup
+        stacks are not fetched.
+
+        The stacks (with their templates) are fetched with one query for each
+        level of nesting and all of their resources with one more, so that
+        nested stacks subsequently accessed through this stack need not be
+        loaded from the database one at a time.
+        '''
+        db_stacks = {}
+        owner_ids = [self.id]
+        while owner_ids and nested_depth != 0:
+            children = [s for s in
+                        db_api.stack_get_all_by_owner_ids(self.context,
+                                                          owner_ids)
+                        if s.id not in db_stacks]
+            db_stacks.update((s.id, s) for s in children)
+            owner_ids = [s.id for s in children]
+            if nested_depth is not None:
+                nested_depth -= 1
+
+        db_resources = db_api.resource_get_all_by_stacks(self.context,
+                                                         list(db_stacks))
+        self._db_nested = dict((stack_id, (db_stack, db_resources[stack_id]))
+                               for stack_id, db_stack in db_stacks.items())
+
+    def _nested_loaded(self):
+        '''Return True if every stack nested directly below is loaded.'''
+        return all(res.nested_loaded() for res in self.itervalues()
+                   if callable(getattr(res, 'nested_loaded', None)))
+
+    @contextlib.contextmanager
+    def _preloaded_nested_stacks(self, nested_depth=None):
+        '''
+        Fetch the nested stacks for the duration of a walk over the stack
+        tree, unless they are already loaded or being fetched, and drop any
+        that were not used once the walk is done.
+        '''
+        preload = (nested_depth != 0 and not self._db_nested and
+                   self.id is not None and not self._nested_loaded())
+        if preload:
+            self.load_nested_stacks(nested_depth)
+            preloaded = self._db_nested
+        try:
+            yield
+        finally:
+            if preload:
+                # Nested stacks loaded during the walk share the data
+                preloaded.clear()
+                self._db_nested = None
+
+    def load_nested(self, stack_id, parent_resource):
+        '''
+        Return the nested stack with the given ID if its data was fetched by
+        load_nested_stacks() on this stack or one of its parents, otherwise
+        None.
+        '''
+        if self._db_nested and stack_id in self._db_nested:
+            db_stack, db_resources = self._db_nested.pop(stack_id)
+            template = tmpl.Template.load(self.context,
+                                          db_stack.raw_template_id,
+                                          db_stack.raw_template)
+            stack = self._from_db(self.context, db_stack,
+                                  parent_resource=parent_resource,
+                                  template=template)
+            stack._db_resources = db_resources
+            # The stacks further down were fetched with this one
+            stack._db_nested = self._db_nested
+            return stack
+
+        if self.parent_resource is not None and self.parent_resource.stack:
+            return self.parent_resource.stack.load_nested(stack_id,
+                                                          parent_resource)
+        return None
 
     def db_resource_get(self, name):
         if not self.id:
@@ -209,6 +305,26 @@ class Stack(collections.Mapping):
     def reset_dependencies(self):
         self._dependencies = None
 
+    def refresh_metadata(self, changed):
+        '''
+        Refresh the metadata of the resources that may be affected by a
+        change (e.g. a signal) to the resources with the given names.
+
+        A change to a resource may alter its attributes and those of every
+        resource that depends on it, e.g. the Data of a WaitCondition when
+        its handle is signalled. Only resources whose metadata refers to one
+        of those resources are refreshed.
+        '''
+        affected = set()
+        for name in changed:
+            affected.update(r.name for r in self.dependencies[self[name]])
+
+        for res in self.dependencies:
+            if res.name in changed or res.id is None:
+                continue
+            if any(r.name in affected for r in res.t.metadata_dependencies()):
+                res.metadata_update()
+
     @property
     def root_stack(self):
         '''
@@ -231,7 +347,53 @@ class Stack(collections.Mapping):
                     return nested_stack.total_resources()
             return 0
 
-        return len(self) + sum(total_nested(res) for res in self.itervalues())
+        with self._preloaded_nested_stacks():
+            return len(self) + sum(total_nested(res)
+                                   for res in self.itervalues())
+
+    @property
+    def root_stack_id(self):
+        '''
+        Return the ID of the top-level stack of the tree this stack is in.
+
+        For a nested stack this is found from the stored chain of owner
+        stacks, so it is correct even when the stack was loaded on its own.
+        '''
+        if self.owner_id is None:
+            return self.id
+        if self._root_stack_id is None:
+            if self.parent_resource and self.parent_resource.stack:
+                owner = self.parent_resource.stack
+                self._root_stack_id = owner.root_stack_id
+            else:
+                owner_id = self.owner_id
+                while True:
+                    owner = db_api.stack_get(self.context, owner_id,
+                                             show_deleted=True,
+                                             tenant_safe=False)
+                    if owner is None or owner.owner_id is None:
+                        break
+                    if owner.root_stack_id is not None:
+                        owner_id = owner.root_stack_id
+                        break
+                    owner_id = owner.owner_id
+                self._root_stack_id = owner_id
+        return self._root_stack_id
+
+    def total_tree_resources(self):
+        '''
+        Return the total number of resources in the tree of stacks this
+        stack is in.
+
+        Unlike total_resources(), this loads none of the stacks in the tree;
+        the resources in the templates of all stacks (other than backup
+        stacks) with the same root stack are counted in a single query, so
+        that the resources of stacks still being created are included.
+        '''
+        if self.id is None:
+            return len(self)
+        return db_api.stack_count_total_resources(self.context,
+                                                  self.root_stack_id)
 
     def _set_param_stackid(self):
         '''
@@ -240,6 +402,7 @@ class Stack(collections.Mapping):
         '''
         if not self.parameters.set_stack_id(self.identifier()):
             LOG.warn(_LW("Unable to set parameters StackId identifier"))
+        function.invalidate_results(self)
 
     @staticmethod
     def _get_dependencies(resources):
@@ -281,9 +444,10 @@ class Stack(collections.Mapping):
 
     @classmethod
     def _from_db(cls, context, stack, parent_resource=None, resolve_data=True,
-                 use_stored_context=False):
-        template = tmpl.Template.load(
-            context, stack.raw_template_id, stack.raw_template)
+                 use_stored_context=False, template=None):
+        if template is None:
+            template = tmpl.Template.load(
+                context, stack.raw_template_id, stack.raw_template)
         env = environment.Environment(stack.parameters)
         return cls(context, stack.name, template, env,
                    stack.id, stack.action, stack.status, stack.status_reason,
@@ -294,7 +458,8 @@ class Stack(collections.Mapping):
                    updated_time=stack.updated_at,
                    user_creds_id=stack.user_creds_id, tenant_id=stack.tenant,
                    use_stored_context=use_stored_context,
-                   username=stack.username)
+                   username=stack.username,
+                   root_stack_id=stack.root_stack_id)
 
     @profiler.trace('Stack.store', hide_args=False)
     def store(self, backup=False):
@@ -318,7 +483,10 @@ class Stack(collections.Mapping):
             'updated_at': self.updated_time,
             'user_creds_id': self.user_creds_id,
             'backup': backup,
-            'nested_depth': self.nested_depth
+            'nested_depth': self.nested_depth,
+            'root_stack_id': (self.root_stack_id if self.owner_id is not None
+                              else None),
+            'resource_count': len(self.t[self.t.RESOURCES] or {})
         }
         if self.id:
             db_api.stack_update(self.context, self.id, s)
@@ -624,7 +792,9 @@ class Stack(collections.Mapping):
             resource_action,
             reverse,
             error_wait_time=error_wait_time,
-            aggregate_exceptions=aggregate_exceptions)
+            aggregate_exceptions=aggregate_exceptions,
+            wait_strategy=operator.attrgetter('wait_strategy'),
+            step_callback=self._start_buffered_writes())
 
         try:
             yield action_task()
@@ -634,6 +804,12 @@ class Stack(collections.Mapping):
         except scheduler.Timeout:
             stack_status = self.FAILED
             reason = '%s timed out' % action.title()
+        finally:
+            write_error = self._end_buffered_writes()
+
+        if write_error is not None and stack_status != self.FAILED:
+            stack_status = self.FAILED
+            reason = self._write_failure_reason(write_error)
 
         self.state_set(action, stack_status, reason)
 
@@ -642,6 +818,45 @@ class Stack(collections.Mapping):
         lifecycle_plugin_utils.do_post_ops(self.context, self, None, action,
                                            (self.status == self.FAILED))
 
+    def _start_buffered_writes(self):
+        '''
+        Start buffering the writes of resource state changes and events
+        during a stack operation. Returns the function that flushes the
+        buffer, which should be called at the end of each scheduler step.
+        '''
+        self.write_buffer = write_buffer.WriteBuffer(self.context)
+        return self._flush_buffered_writes
+
+    def _flush_buffered_writes(self):
+        '''
+        Flush any buffered writes, logging rather than raising any error.
+        Writes that fail remain queued, to be retried by the next flush.
+        Returns the exception if the writes failed, otherwise None.
+        '''
+        if self.write_buffer is None:
+            return None
+        try:
+            self.write_buffer.flush()
+        except Exception as ex:
+            LOG.error(_LE('Failed to store the state of stack %(name)s: '
+                          '%(ex)s'), {'name': self.name, 'ex': ex})
+            return ex
+        return None
+
+    def _end_buffered_writes(self):
+        '''
+        Flush any buffered writes and stop buffering. Returns the exception
+        if the writes failed, otherwise None.
+        '''
+        try:
+            return self._flush_buffered_writes()
+        finally:
+            self.write_buffer = None
+
+    @staticmethod
+    def _write_failure_reason(ex):
+        return 'Failed to store resource state: %s' % six.text_type(ex)
+
     @profiler.trace('Stack.check', hide_args=False)
     def check(self):
         self.updated_time = datetime.datetime.utcnow()
@@ -657,8 +872,9 @@ class Stack(collections.Mapping):
             else:
                 return hasattr(res, 'handle_%s' % self.CHECK.lower())
 
-        supported = [is_supported(self, res)
-                     for res in self.resources.values()]
+        with self._preloaded_nested_stacks():
+            supported = [is_supported(self, res)
+                         for res in self.resources.values()]
 
         if not all(supported):
             msg = ". '%s' not fully supported (see resources)" % self.CHECK
@@ -990,9 +1206,12 @@ class Stack(collections.Mapping):
                                e.args[0] if e.args else
                                'Failed stack pre-ops: %s' % six.text_type(e))
                 return
-        action_task = scheduler.DependencyTaskGroup(self.dependencies,
-                                                    resource.Resource.destroy,
-                                                    reverse=True)
+        action_task = scheduler.DependencyTaskGroup(
+            self.dependencies,
+            resource.Resource.destroy,
+            reverse=True,
+            wait_strategy=operator.attrgetter('wait_strategy'),
+            step_callback=self._start_buffered_writes())
         try:
             scheduler.TaskRunner(action_task)(timeout=self.timeout_secs())
         except exception.ResourceFailure as ex:
@@ -1001,6 +1220,12 @@ class Stack(collections.Mapping):
         except scheduler.Timeout:
             stack_status = self.FAILED
             reason = '%s timed out' % action.title()
+        finally:
+            write_error = self._end_buffered_writes()
+
+        if write_error is not None and stack_status != self.FAILED:
+            stack_status = self.FAILED
+            reason = self._write_failure_reason(write_error)
 
         # If the stack delete succeeded, this is not a backup stack and it's
         # not a nested stack, we should delete the credentials
@@ -1202,11 +1427,26 @@ class Stack(collections.Mapping):
                       DeprecationWarning)
         return function.resolve(snippet)
 
-    def reset_resource_attributes(self):
-        # nothing is cached if no resources exist
+    def reset_resource_attributes(self, resource=None):
+        '''
+        Reset the cached attributes of the resources after a change.
+
+        If the resource which changed is given, only its attributes and those
+        of the resources which depend on it are reset, provided that the
+        dependency graph of the stack is known.
+        '''
+        function.invalidate_results(self)
+        # nothing else is cached if no resources exist
         if not self._resources:
             return
         # a change in some resource may have side-effects in the attributes
-        # of other resources, so ensure that attributes are re-calculated
-        for res in self.resources.itervalues():
+        # of the resources that depend on it, so ensure that attributes are
+        # re-calculated
+        affected = self.resources.itervalues()
+        if resource is not None and self._dependencies is not None:
+            try:
+                affected = iter(self._dependencies[resource])
+            except KeyError:
+                pass
+        for res in affected:
             res.attributes.reset_resolved_values()
@@ -26,6 +26,7 @@ from heat.db import api as db_api
 from heat.openstack.common import log as logging
 
 cfg.CONF.import_opt('engine_life_check_timeout', 'heat.common.config')
+cfg.CONF.import_opt('stack_lock_lease_time', 'heat.common.config')
 
 LOG = logging.getLogger(__name__)
 
@@ -39,6 +40,22 @@ class StackLock(object):
 
     @staticmethod
     def engine_alive(context, engine_id):
+        """
+        Determine whether an engine is alive, and so whether the stack locks
+        it holds are still valid.
+
+        A registered engine is alive as long as it has sent a heartbeat within
+        the stack lock lease time, by the database server's clock. Engines
+        that are not registered (because they do not send heartbeats) are
+        asked whether they are listening.
+        """
+        heartbeat_age = db_api.engine_get_heartbeat_age(engine_id)
+        if heartbeat_age is not None:
+            return heartbeat_age <= cfg.CONF.stack_lock_lease_time
+        return StackLock.engine_listening(context, engine_id)
+
+    @staticmethod
+    def engine_listening(context, engine_id):
         client = rpc_messaging.get_rpc_client(version='1.0', topic=engine_id)
         client_context = client.prepare(
             timeout=cfg.CONF.engine_life_check_timeout)
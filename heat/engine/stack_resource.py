@@ -91,17 +91,29 @@ class StackResource(resource.Resource):
             self._nested = None
 
         if self._nested is None and self.resource_id is not None:
-            self._nested = parser.Stack.load(self.context,
-                                             self.resource_id,
-                                             parent_resource=self,
-                                             show_deleted=show_deleted,
-                                             force_reload=force_reload)
+            if not force_reload:
+                # Use the data fetched with the rest of the stack tree, if any
+                self._nested = self.stack.load_nested(self.resource_id,
+                                                      parent_resource=self)
+            if self._nested is None:
+                self._nested = parser.Stack.load(self.context,
+                                                 self.resource_id,
+                                                 parent_resource=self,
+                                                 show_deleted=show_deleted,
+                                                 force_reload=force_reload)
 
             if self._nested is None:
                 raise exception.NotFound(_("Nested stack not found in DB"))
 
         return self._nested
 
+    def nested_loaded(self):
+        '''
+        Return True if the nested stack need not be fetched from the database
+        to be accessed, i.e. it is already loaded or there is none.
+        '''
+        return self._nested is not None or self.resource_id is None
+
     def child_template(self):
         '''
         Default implementation to get the child template.
@@ -193,7 +205,7 @@ class StackResource(resource.Resource):
 
     def _validate_nested_resources(self, templ):
         total_resources = (len(templ[templ.RESOURCES]) +
-                           self.stack.root_stack.total_resources())
+                           self.stack.total_tree_resources())
 
         if self.nested():
             # It's an update and these resources will be deleted
@@ -383,5 +395,6 @@ class StackResource(resource.Resource):
         schema_hash = hashlib.sha1(';'.join(schema_names))
         definition = {'template': self.child_template(),
                       'files': self.stack.t.files}
-        definition_hash = hashlib.sha1(jsonutils.dumps(definition))
+        definition_hash = hashlib.sha1(
+            jsonutils.dumps(definition, sort_keys=True))
         return (schema_hash.hexdigest(), definition_hash.hexdigest())
@@ -15,10 +15,14 @@ import abc
 import collections
 import copy
 import functools
+import json
+import sys
 
+from oslo.config import cfg
 import six
 from stevedore import extension
 
+from heat.common import cache
 from heat.common import exception
 from heat.common.i18n import _
 from heat.db import api as db_api
@@ -30,6 +34,22 @@ __all__ = ['Template']
 
 
 _template_classes = None
+_template_cache = None
+
+
+def template_cache():
+    '''
+    Return the engine-wide cache of template contents loaded from the
+    database, keyed by raw template ID and content hash.
+    '''
+    global _template_cache
+    if _template_cache is None:
+        cfg.CONF.import_opt('template_cache_size', 'heat.common.config')
+        maxweight = cfg.CONF.template_cache_size * 1024 * 1024
+        _template_cache = cache.LRUCache(
+            maxsize=sys.maxsize if maxweight > 0 else 0,
+            maxweight=maxweight)
+    return _template_cache
 
 
 def get_version(template_data, available_versions):
@@ -121,10 +141,35 @@ class Template(collections.Mapping):
 
     @classmethod
     def load(cls, context, template_id, t=None):
-        '''Retrieve a Template with the given ID from the database.'''
+        '''
+        Retrieve a Template with the given ID from the database.
+
+        The contents of the raw template are taken from the template cache
+        if they have not changed since they were cached. When the raw
+        template row is passed in with its contents not yet loaded (as
+        joined by stack_get() with eager_load), a cached template costs no
+        further query.
+        '''
         if t is None:
             t = db_api.raw_template_get(context, template_id)
-        return cls(t.template, template_id=template_id, files=t.files)
+
+        key = template_id, t.content_hash
+        cache = template_cache()
+        content = cache.get(key)
+        if content is None:
+            content = t.template, t.files
+            cache.set(key, content, weight=len(json.dumps(content)))
+
+        template, files = content
+        # The cached contents are shared, so copy the parts of the template
+        # that are modified in place: the resources when they are added or
+        # removed, and the files when template resources fetch theirs.
+        template = cls(dict(template), template_id=template_id,
+                       files=dict(files or {}))
+        resources = template.t.get(template.RESOURCES)
+        if resources is not None:
+            template.t[template.RESOURCES] = dict(resources)
+        return template
 
     def store(self, context=None):
         '''Store the Template in the database and return its ID.'''
@@ -137,6 +182,7 @@ class Template(collections.Mapping):
             self.id = new_rt.id
         else:
             db_api.raw_template_update(context, self.id, rt)
+            template_cache().invalidate(lambda key: key[0] == self.id)
         return self.id
 
     def __iter__(self):
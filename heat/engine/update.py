@@ -11,6 +11,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import operator
+
 import six
 
 from heat.common.i18n import _LI
@@ -59,7 +61,8 @@ class StackUpdate(object):
         self.updater = scheduler.DependencyTaskGroup(
             self.dependencies(),
             self._resource_update,
-            error_wait_time=self.error_wait_time)
+            error_wait_time=self.error_wait_time,
+            wait_strategy=operator.attrgetter('wait_strategy'))
 
         if not self.rollback:
             yield cleanup_prev()
@@ -185,10 +188,10 @@ class StackUpdate(object):
 
         def edges():
             # Create/update the new stack's resources in create order
-            for e in new_deps.graph().edges():
+            for e in new_deps.edges():
                 yield e
             # Destroy/cleanup the old stack's resources in delete order
-            for e in existing_deps.graph(reverse=True).edges():
+            for e in existing_deps.edges(reverse=True):
                 yield e
             # Don't cleanup old resources until after they have been replaced
             for name, res in six.iteritems(self.existing_stack):
@@ -66,9 +66,27 @@ class WatchRule(object):
             period = int(rule['period'])
         self.timeperiod = datetime.timedelta(seconds=period)
         self.id = wid
-        self.watch_data = watch_data or []
+        # If no data is passed in, only the samples within the evaluation
+        # period are loaded (and reloaded on each evaluation) from the DB
+        self._watch_data = watch_data
+        self._load_data = watch_data is None
         self.last_evaluated = last_evaluated
 
+    @property
+    def watch_data(self):
+        if self._watch_data is None:
+            if self.id is None:
+                self._watch_data = []
+            else:
+                self._watch_data = db_api.watch_data_get_all_by_watch_rule(
+                    self.context, self.id, since=self.now - self.timeperiod)
+        return self._watch_data
+
+    @watch_data.setter
+    def watch_data(self, watch_data):
+        self._watch_data = watch_data
+        self._load_data = False
+
     @classmethod
     def load(cls, context, watch_name=None, watch=None):
         '''
@@ -89,7 +107,6 @@ class WatchRule(object):
                        stack_id=watch.stack_id,
                        state=watch.state,
                        wid=watch.id,
-                       watch_data=watch.watch_data,
                        last_evaluated=watch.last_evaluated)
 
     def store(self):
@@ -131,96 +148,51 @@ class WatchRule(object):
         else:
             return False
 
-    def do_Maximum(self):
-        data = 0
-        have_data = False
-        for d in self.watch_data:
-            if d.created_at < self.now - self.timeperiod:
-                continue
-            if not have_data:
-                data = float(d.data[self.rule['MetricName']]['Value'])
-                have_data = True
-            if float(d.data[self.rule['MetricName']]['Value']) > data:
-                data = float(d.data[self.rule['MetricName']]['Value'])
+    def _window_samples(self):
+        '''
+        Return the samples within the evaluation period
+        '''
+        start = self.now - self.timeperiod
+        return [d for d in self.watch_data if d.created_at >= start]
 
-        if not have_data:
-            return self.NODATA
+    def _window_values(self):
+        metric = self.rule['MetricName']
+        return [float(d.data[metric]['Value'])
+                for d in self._window_samples()]
 
+    def _compare(self, data):
         if self.do_data_cmp(data,
                             float(self.rule['Threshold'])):
             return self.ALARM
         else:
             return self.NORMAL
 
-    def do_Minimum(self):
-        data = 0
-        have_data = False
-        for d in self.watch_data:
-            if d.created_at < self.now - self.timeperiod:
-                continue
-            if not have_data:
-                data = float(d.data[self.rule['MetricName']]['Value'])
-                have_data = True
-            elif float(d.data[self.rule['MetricName']]['Value']) < data:
-                data = float(d.data[self.rule['MetricName']]['Value'])
-
-        if not have_data:
+    def do_Maximum(self):
+        values = self._window_values()
+        if not values:
             return self.NODATA
+        return self._compare(max(values))
 
-        if self.do_data_cmp(data,
-                            float(self.rule['Threshold'])):
-            return self.ALARM
-        else:
-            return self.NORMAL
+    def do_Minimum(self):
+        values = self._window_values()
+        if not values:
+            return self.NODATA
+        return self._compare(min(values))
 
     def do_SampleCount(self):
         '''
         count all samples within the specified period
         '''
-        data = 0
-        for d in self.watch_data:
-            if d.created_at < self.now - self.timeperiod:
-                continue
-            data = data + 1
-
-        if self.do_data_cmp(data,
-                            float(self.rule['Threshold'])):
-            return self.ALARM
-        else:
-            return self.NORMAL
+        return self._compare(len(self._window_samples()))
 
     def do_Average(self):
-        data = 0
-        samples = 0
-        for d in self.watch_data:
-            if d.created_at < self.now - self.timeperiod:
-                continue
-            samples = samples + 1
-            data = data + float(d.data[self.rule['MetricName']]['Value'])
-
-        if samples == 0:
+        values = self._window_values()
+        if not values:
             return self.NODATA
-
-        data = data / samples
-        if self.do_data_cmp(data,
-                            float(self.rule['Threshold'])):
-            return self.ALARM
-        else:
-            return self.NORMAL
+        return self._compare(sum(values) / len(values))
 
     def do_Sum(self):
-        data = 0
-        for d in self.watch_data:
-            if d.created_at < self.now - self.timeperiod:
-                LOG.debug('ignoring %s' % str(d.data))
-                continue
-            data = data + float(d.data[self.rule['MetricName']]['Value'])
-
-        if self.do_data_cmp(data,
-                            float(self.rule['Threshold'])):
-            return self.ALARM
-        else:
-            return self.NORMAL
+        return self._compare(sum(self._window_values()))
 
     def get_alarm_state(self):
         fn = getattr(self, 'do_%s' % self.rule['Statistic'])
@@ -233,6 +205,9 @@ class WatchRule(object):
         self.now = timeutils.utcnow()
         if self.now < (self.last_evaluated + self.timeperiod):
             return []
+        if self._load_data:
+            # Fetch the samples for the current window
+            self._watch_data = None
         return self.run_rule()
 
     def get_details(self):
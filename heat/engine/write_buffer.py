@@ -0,0 +1,71 @@
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import collections
+
+from oslo.utils import excutils
+import six
+
+from heat.db import api as db_api
+
+
+class WriteBuffer(object):
+    '''
+    Coalesce the database writes of resource state changes and events.
+
+    While a stack operation is in progress, state changes that need not be
+    persisted immediately are queued here and written out together, in a
+    single transaction, at the end of each scheduler step. Successive updates
+    to the same resource within a step are merged into one.
+
+    Anything that must survive a crash of the engine mid-step (such as a
+    transition to IN_PROGRESS) should be written synchronously instead, after
+    calling flush() so that the order of writes is preserved.
+    '''
+
+    def __init__(self, context):
+        self.context = context
+        self._resources = collections.OrderedDict()
+        self._events = []
+
+    def __len__(self):
+        return len(self._resources) + len(self._events)
+
+    def update_resource(self, resource_id, values):
+        '''Queue an update to the database row of a resource.'''
+        self._resources.setdefault(resource_id, {}).update(values)
+
+    def add_event(self, values):
+        '''Queue the creation of an event.'''
+        self._events.append(values)
+
+    def flush(self):
+        '''
+        Write all queued updates and events to the database.
+
+        If the write fails, the exception is raised and the writes remain
+        queued (ahead of any queued since) to be retried by the next flush.
+        '''
+        if not len(self):
+            return
+
+        resources, self._resources = self._resources, collections.OrderedDict()
+        events, self._events = self._events, []
+        try:
+            db_api.resource_state_batch_save(self.context, resources, events)
+        except Exception:
+            with excutils.save_and_reraise_exception():
+                for resource_id, values in six.iteritems(self._resources):
+                    resources.setdefault(resource_id, {}).update(values)
+                self._resources = resources
+                self._events = events + self._events
@@ -28,6 +28,7 @@ class EngineClient(object):
 
         1.0 - Initial version.
         1.1 - Add support_status argument to list_resource_types()
+        1.4 - Add summary argument to list_stacks()
     '''
 
     BASE_RPC_API_VERSION = '1.0'
@@ -90,7 +91,7 @@ class EngineClient(object):
 
     def list_stacks(self, ctxt, limit=None, marker=None, sort_keys=None,
                     sort_dir=None, filters=None, tenant_safe=True,
-                    show_deleted=False, show_nested=False):
+                    show_deleted=False, show_nested=False, summary=False):
         """
         The list_stacks method returns attributes of all stacks.  It supports
         pagination (``limit`` and ``marker``), sorting (``sort_keys`` and
@@ -105,6 +106,7 @@ class EngineClient(object):
         :param tenant_safe: if true, scope the request by the current tenant
         :param show_deleted: if true, show soft-deleted stacks
         :param show_nested: if true, show nested stacks
+        :param summary: if true, omit the parameters and outputs of stacks
         :returns: a list of stacks
         """
         return self.call(ctxt,
@@ -113,7 +115,9 @@ class EngineClient(object):
                                        sort_dir=sort_dir, filters=filters,
                                        tenant_safe=tenant_safe,
                                        show_deleted=show_deleted,
-                                       show_nested=show_nested))
+                                       show_nested=show_nested,
+                                       summary=summary),
+                         version='1.4')
 
     def count_stacks(self, ctxt, filters=None, tenant_safe=True,
                      show_deleted=False, show_nested=False):
@@ -25,7 +25,11 @@ import testscenarios
 import testtools
 
 from heat.common import context
+from heat.common import heat_keystoneclient
 from heat.common import messaging
+from heat.common import template_format
+from heat.common import urlfetch
+from heat.engine.clients import client_plugin
 from heat.engine.clients.os import cinder
 from heat.engine.clients.os import glance
 from heat.engine.clients.os import keystone
@@ -33,6 +37,7 @@ from heat.engine.clients.os import nova
 from heat.engine import environment
 from heat.engine import resources
 from heat.engine import scheduler
+from heat.engine import template
 from heat.tests import fakes
 from heat.tests import utils
 
@@ -84,6 +89,13 @@ class HeatTestCase(testscenarios.WithScenarios,
             scheduler.ENABLE_SLEEP = True
 
         self.addCleanup(enable_sleep)
+        self.addCleanup(client_plugin.lookup_cache().clear)
+        self.addCleanup(template.template_cache().clear)
+        self.addCleanup(urlfetch.url_cache().clear)
+        self.addCleanup(urlfetch.content_cache().clear)
+        self.addCleanup(template_format.parse_cache().clear)
+        self.addCleanup(context.trust_auth_cache().clear)
+        self.addCleanup(heat_keystoneclient.session_cache().clear)
 
         mod_dir = os.path.dirname(sys.modules[__name__].__file__)
         project_dir = os.path.abspath(os.path.join(mod_dir, '../../'))
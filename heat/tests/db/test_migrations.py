@@ -21,6 +21,7 @@ if possible.
 """
 
 import datetime
+import hashlib
 import os
 import uuid
 
@@ -384,6 +385,53 @@ class HeatMigrationsCheckers(test_migrations.WalkVersionsMixin,
     def _check_049(self, engine, data):
         self.assertColumnExists(engine, 'user_creds', 'region_name')
 
+    def _check_051(self, engine, data):
+        self.assertColumnExists(engine, 'stack', 'event_count')
+
+    def _check_052(self, engine, data):
+        self.assertIndexMembers(engine, 'watch_data',
+                                'ix_watch_data_watch_rule_id_created_at',
+                                ['watch_rule_id', 'created_at'])
+
+    def _check_053(self, engine, data):
+        self.assertIndexMembers(engine, 'event',
+                                'ix_event_stack_id_created_at',
+                                ['stack_id', 'created_at'])
+
+    def _check_054(self, engine, data):
+        self.assertColumnExists(engine, 'raw_template', 'content_hash')
+        raw_template = utils.get_table(engine, 'raw_template')
+        templates = raw_template.select().execute().fetchall()
+        self.assertNotEqual([], templates)
+        for t in templates:
+            files = jsonutils.loads(t.files) if t.files else None
+            content = jsonutils.dumps([jsonutils.loads(t.template), files],
+                                      sort_keys=True)
+            self.assertEqual(hashlib.sha256(content).hexdigest(),
+                             t.content_hash)
+
+    def _check_055(self, engine, data):
+        self.assertColumnExists(engine, 'stack', 'root_stack_id')
+        self.assertColumnExists(engine, 'stack', 'resource_count')
+        self.assertIndexMembers(engine, 'stack', 'ix_stack_root_stack_id',
+                                ['root_stack_id'])
+        # The tree of stacks created for migration 047
+        stack_table = utils.get_table(engine, 'stack')
+        root_stack_ids = dict((s.id, s.root_stack_id)
+                              for s in stack_table.select().execute())
+        root_id = '167aaefb-152e-505d-b13a-35d4c816390c'
+        self.assertIsNone(root_stack_ids[root_id])
+        for stack_id in ['1e9deba9-a303-5f29-84d3-c8165647c47e',
+                         '1e9deba9-a304-5f29-84d3-c8165647c47e',
+                         '1e9deba9-a305-5f29-84d3-c8165647c47e',
+                         '1a4bd1ec-8b21-56cd-964a-f66cb1cfa2f9']:
+            self.assertEqual(root_id, root_stack_ids[stack_id])
+
+    def _check_056(self, engine, data):
+        self.assertColumnExists(engine, 'engine', 'id')
+        self.assertColumnExists(engine, 'engine', 'hostname')
+        self.assertColumnExists(engine, 'engine', 'heartbeat_at')
+
 
 class TestHeatMigrationsMySQL(HeatMigrationsCheckers,
                               test_base.MySQLOpportunisticTestCase):
@@ -161,9 +161,10 @@ class CfnStackControllerTest(common.HeatTestCase):
         self.assertEqual(expected, result)
         default_args = {'limit': None, 'sort_keys': None, 'marker': None,
                         'sort_dir': None, 'filters': None, 'tenant_safe': True,
-                        'show_deleted': False, 'show_nested': False}
+                        'show_deleted': False, 'show_nested': False,
+                        'summary': True}
         mock_call.assert_called_once_with(
-            dummy_req.context, ('list_stacks', default_args))
+            dummy_req.context, ('list_stacks', default_args), version='1.4')
 
     @mock.patch.object(rpc_client.EngineClient, 'call')
     def test_list_rmt_aterr(self, mock_call):
@@ -179,7 +180,7 @@ class CfnStackControllerTest(common.HeatTestCase):
         result = self.controller.list(dummy_req)
         self.assertIsInstance(result, exception.HeatInvalidParameterValueError)
         mock_call.assert_called_once_with(
-            dummy_req.context, ('list_stacks', mock.ANY))
+            dummy_req.context, ('list_stacks', mock.ANY), version='1.4')
 
     @mock.patch.object(rpc_client.EngineClient, 'call')
     def test_list_rmt_interr(self, mock_call):
@@ -195,7 +196,7 @@ class CfnStackControllerTest(common.HeatTestCase):
         result = self.controller.list(dummy_req)
         self.assertIsInstance(result, exception.HeatInternalFailureError)
         mock_call.assert_called_once_with(
-            dummy_req.context, ('list_stacks', mock.ANY))
+            dummy_req.context, ('list_stacks', mock.ANY), version='1.4')
 
     def test_describe_last_updated_time(self):
         params = {'Action': 'DescribeStacks'}
@@ -32,7 +32,8 @@ class Ec2TokenTest(common.HeatTestCase):
 
     def setUp(self):
         super(Ec2TokenTest, self).setUp()
-        self.m.StubOutWithMock(requests, 'post')
+        self.session = self.m.CreateMock(requests.Session)
+        self.patchobject(requests, 'Session', return_value=self.session)
 
     def _dummy_GET_request(self, params=None, environ=None):
         # Mangle the params dict into a query string
@@ -183,7 +184,8 @@ class Ec2TokenTest(common.HeatTestCase):
         self.assertEqual('xyz', ec2.__call__(dummy_req))
 
     def _stub_http_connection(self, headers=None, params=None, response=None,
-                              req_url='http://123:5000/v2.0/ec2tokens'):
+                              req_url='http://123:5000/v2.0/ec2tokens',
+                              path='/v1'):
 
         headers = headers or {}
         params = params or {}
@@ -203,11 +205,11 @@ class Ec2TokenTest(common.HeatTestCase):
                                  "verb": "GET",
                                  "params": params,
                                  "signature": "xyz",
-                                 "path": "/v1",
+                                 "path": path,
                                  "body_hash": body_hash}})
         req_headers = {'Content-Type': 'application/json'}
-        requests.post(req_url, data=req_creds,
-                      headers=req_headers).AndReturn(DummyHTTPResponse())
+        self.session.post(req_url, data=req_creds,
+                          headers=req_headers).AndReturn(DummyHTTPResponse())
 
     def test_call_ok(self):
         dummy_conf = {'auth_uri': 'http://123:5000/v2.0'}
@@ -329,6 +331,83 @@ class Ec2TokenTest(common.HeatTestCase):
 
         self.m.VerifyAll()
 
+    def _cache_test_request(self, path='/v1'):
+        req_env = {'SERVER_NAME': 'heat',
+                   'SERVER_PORT': '8000',
+                   'PATH_INFO': path}
+        params = {'AWSAccessKeyId': 'foo', 'Signature': 'xyz'}
+        return self._dummy_GET_request(params, req_env)
+
+    def test_call_ok_cached(self):
+        dummy_conf = {'auth_uri': 'http://123:5000/v2.0'}
+        ec2 = ec2token.EC2Token(app='woot', conf=dummy_conf)
+
+        ok_resp = json.dumps({'access': {'metadata': {'roles': ['a']},
+                                         'token': {
+                                             'id': 123,
+                                             'tenant': {'name': 'tenant',
+                                                        'id': 'abcd1234'}}}})
+        self._stub_http_connection(response=ok_resp,
+                                   params={'AWSAccessKeyId': 'foo'})
+        self.m.ReplayAll()
+        for i in range(2):
+            dummy_req = self._cache_test_request()
+            self.assertEqual('woot', ec2.__call__(dummy_req))
+            self.assertEqual('abcd1234', dummy_req.headers['X-Tenant-Id'])
+            self.assertEqual('a', dummy_req.headers['X-Roles'])
+
+        self.assertEqual(1, ec2.validations.hits)
+        self.assertEqual(1, ec2.validations.misses)
+        self.m.VerifyAll()
+
+    def test_call_cached_signature_other_request(self):
+        dummy_conf = {'auth_uri': 'http://123:5000/v2.0'}
+        ec2 = ec2token.EC2Token(app='woot', conf=dummy_conf)
+
+        ok_resp = json.dumps({'access': {'token': {
+            'id': 123,
+            'tenant': {'name': 'tenant', 'id': 'abcd1234'}}}})
+        self._stub_http_connection(response=ok_resp,
+                                   params={'AWSAccessKeyId': 'foo'})
+        self._stub_http_connection(response=json.dumps({}),
+                                   params={'AWSAccessKeyId': 'foo'},
+                                   path='/v2')
+        self.m.ReplayAll()
+        self.assertEqual('woot', ec2.__call__(self._cache_test_request()))
+        # The same signature on a different request must be validated again
+        self.assertRaises(exception.HeatAccessDeniedError,
+                          ec2.__call__, self._cache_test_request('/v2'))
+        self.m.VerifyAll()
+
+    def test_call_err_not_cached(self):
+        dummy_conf = {'auth_uri': 'http://123:5000/v2.0'}
+        ec2 = ec2token.EC2Token(app='woot', conf=dummy_conf)
+
+        err_resp = json.dumps({})
+        for i in range(2):
+            self._stub_http_connection(response=err_resp,
+                                       params={'AWSAccessKeyId': 'foo'})
+        self.m.ReplayAll()
+        for i in range(2):
+            self.assertRaises(exception.HeatAccessDeniedError,
+                              ec2.__call__, self._cache_test_request())
+        self.m.VerifyAll()
+
+    def test_call_cache_disabled(self):
+        dummy_conf = {'auth_uri': 'http://123:5000/v2.0', 'cache_ttl': '0'}
+        ec2 = ec2token.EC2Token(app='woot', conf=dummy_conf)
+
+        ok_resp = json.dumps({'access': {'token': {
+            'id': 123,
+            'tenant': {'name': 'tenant', 'id': 'abcd1234'}}}})
+        for i in range(2):
+            self._stub_http_connection(response=ok_resp,
+                                       params={'AWSAccessKeyId': 'foo'})
+        self.m.ReplayAll()
+        for i in range(2):
+            self.assertEqual('woot', ec2.__call__(self._cache_test_request()))
+        self.m.VerifyAll()
+
     def test_call_ok_v2(self):
         dummy_conf = {'auth_uri': 'http://123:5000/v2.0'}
         ec2 = ec2token.EC2Token(app='woot', conf=dummy_conf)
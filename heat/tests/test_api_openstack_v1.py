@@ -381,9 +381,10 @@ class StackControllerTest(ControllerTest, common.HeatTestCase):
         self.assertEqual(expected, result)
         default_args = {'limit': None, 'sort_keys': None, 'marker': None,
                         'sort_dir': None, 'filters': None, 'tenant_safe': True,
-                        'show_deleted': False, 'show_nested': False}
+                        'show_deleted': False, 'show_nested': False,
+                        'summary': True}
         mock_call.assert_called_once_with(
-            req.context, ('list_stacks', default_args))
+            req.context, ('list_stacks', default_args), version='1.4')
 
     @mock.patch.object(rpc_client.EngineClient, 'call')
     def test_index_whitelists_pagination_params(self, mock_call, mock_enforce):
@@ -402,7 +403,7 @@ class StackControllerTest(ControllerTest, common.HeatTestCase):
 
         rpc_call_args, _ = mock_call.call_args
         engine_args = rpc_call_args[1][1]
-        self.assertEqual(8, len(engine_args))
+        self.assertEqual(9, len(engine_args))
         self.assertIn('limit', engine_args)
         self.assertIn('sort_keys', engine_args)
         self.assertIn('marker', engine_args)
@@ -517,7 +518,8 @@ class StackControllerTest(ControllerTest, common.HeatTestCase):
         self.controller.index(req, tenant_id=self.tenant)
         rpc_client.list_stacks.assert_called_once_with(mock.ANY,
                                                        filters=mock.ANY,
-                                                       tenant_safe=False)
+                                                       tenant_safe=False,
+                                                       summary=True)
 
     def test_global_index_show_deleted_false(self, mock_enforce):
         rpc_client = self.controller.rpc_client
@@ -530,6 +532,7 @@ class StackControllerTest(ControllerTest, common.HeatTestCase):
         rpc_client.list_stacks.assert_called_once_with(mock.ANY,
                                                        filters=mock.ANY,
                                                        tenant_safe=True,
+                                                       summary=True,
                                                        show_deleted=False)
 
     def test_global_index_show_deleted_true(self, mock_enforce):
@@ -543,6 +546,7 @@ class StackControllerTest(ControllerTest, common.HeatTestCase):
         rpc_client.list_stacks.assert_called_once_with(mock.ANY,
                                                        filters=mock.ANY,
                                                        tenant_safe=True,
+                                                       summary=True,
                                                        show_deleted=True)
 
     def test_global_index_show_nested_false(self, mock_enforce):
@@ -556,6 +560,7 @@ class StackControllerTest(ControllerTest, common.HeatTestCase):
         rpc_client.list_stacks.assert_called_once_with(mock.ANY,
                                                        filters=mock.ANY,
                                                        tenant_safe=True,
+                                                       summary=True,
                                                        show_nested=False)
 
     def test_global_index_show_nested_true(self, mock_enforce):
@@ -569,6 +574,7 @@ class StackControllerTest(ControllerTest, common.HeatTestCase):
         rpc_client.list_stacks.assert_called_once_with(mock.ANY,
                                                        filters=mock.ANY,
                                                        tenant_safe=True,
+                                                       summary=True,
                                                        show_nested=True)
 
     def test_index_show_deleted_True_with_count_True(self, mock_enforce):
@@ -584,6 +590,7 @@ class StackControllerTest(ControllerTest, common.HeatTestCase):
         rpc_client.list_stacks.assert_called_once_with(mock.ANY,
                                                        filters=mock.ANY,
                                                        tenant_safe=True,
+                                                       summary=True,
                                                        show_deleted=True)
         rpc_client.count_stacks.assert_called_once_with(mock.ANY,
                                                         filters=mock.ANY,
@@ -647,9 +654,10 @@ class StackControllerTest(ControllerTest, common.HeatTestCase):
         self.assertEqual(expected, result)
         default_args = {'limit': None, 'sort_keys': None, 'marker': None,
                         'sort_dir': None, 'filters': None, 'tenant_safe': True,
-                        'show_deleted': False, 'show_nested': False}
+                        'show_deleted': False, 'show_nested': False,
+                        'summary': False}
         mock_call.assert_called_once_with(
-            req.context, ('list_stacks', default_args))
+            req.context, ('list_stacks', default_args), version='1.4')
 
     @mock.patch.object(rpc_client.EngineClient, 'call')
     def test_index_rmt_aterr(self, mock_call, mock_enforce):
@@ -665,7 +673,7 @@ class StackControllerTest(ControllerTest, common.HeatTestCase):
         self.assertEqual(400, resp.json['code'])
         self.assertEqual('AttributeError', resp.json['error']['type'])
         mock_call.assert_called_once_with(
-            req.context, ('list_stacks', mock.ANY))
+            req.context, ('list_stacks', mock.ANY), version='1.4')
 
     def test_index_err_denied_policy(self, mock_enforce):
         self._mock_enforce_setup(mock_enforce, 'index', False)
@@ -693,7 +701,7 @@ class StackControllerTest(ControllerTest, common.HeatTestCase):
         self.assertEqual(500, resp.json['code'])
         self.assertEqual('Exception', resp.json['error']['type'])
         mock_call.assert_called_once_with(
-            req.context, ('list_stacks', mock.ANY))
+            req.context, ('list_stacks', mock.ANY), version='1.4')
 
     def test_create(self, mock_enforce):
         self._mock_enforce_setup(mock_enforce, 'create', True)
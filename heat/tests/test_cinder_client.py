@@ -63,6 +63,64 @@ class CinderClientPluginTests(common.HeatTestCase):
         self.m.VerifyAll()
 
 
+class CinderBatchedRefreshVolumeTests(common.HeatTestCase):
+
+    def setUp(self):
+        super(CinderBatchedRefreshVolumeTests, self).setUp()
+        self.cinder_plugin = utils.dummy_context().clients.client_plugin(
+            'cinder')
+        self.cinder_client = mock.Mock()
+        self.cinder_plugin._client = self.cinder_client
+
+    def _volume(self, volume_id, status):
+        volume = mock.Mock(id=volume_id, status=status,
+                           _info={'id': volume_id, 'status': status})
+        volume._add_details.side_effect = (
+            lambda info: setattr(volume, 'status', info['status']))
+        return volume
+
+    def test_batched_refresh(self):
+        volumes = [self._volume('1', 'creating'),
+                   self._volume('2', 'creating')]
+        self.cinder_client.volumes.list.return_value = [
+            self._volume('1', 'creating'), self._volume('3', 'creating')]
+        poller = self.cinder_plugin.poll_aggregator('volume')
+        for v in volumes:
+            poller.register(v.id)
+
+        for v in volumes:
+            self.cinder_plugin.refresh_volume(v)
+
+        self.cinder_client.volumes.list.assert_called_once_with(
+            search_opts={'status': 'creating'})
+        self.assertFalse(volumes[0].get.called)
+        # A volume that is no longer being created is fetched individually
+        volumes[1].get.assert_called_once_with()
+
+    def test_single_volume_not_batched(self):
+        volume = self._volume('1', 'creating')
+        self.cinder_plugin.poll_aggregator('volume').register(volume.id)
+
+        self.cinder_plugin.refresh_volume(volume)
+
+        volume.get.assert_called_once_with()
+        self.assertFalse(self.cinder_client.volumes.list.called)
+
+    def test_batched_refresh_list_failure(self):
+        volumes = [self._volume('1', 'creating'),
+                   self._volume('2', 'creating')]
+        self.cinder_client.volumes.list.side_effect = Exception('boom')
+        poller = self.cinder_plugin.poll_aggregator('volume')
+        for v in volumes:
+            poller.register(v.id)
+
+        for v in volumes:
+            self.cinder_plugin.refresh_volume(v)
+
+        for v in volumes:
+            v.get.assert_called_once_with()
+
+
 class VolumeConstraintTest(common.HeatTestCase):
 
     def setUp(self):
@@ -14,6 +14,7 @@
 from ceilometerclient import exc as ceil_exc
 from ceilometerclient.openstack.common.apiclient import exceptions as c_a_exc
 from cinderclient import exceptions as cinder_exc
+import fixtures
 from glanceclient import exc as glance_exc
 from heatclient import client as heatclient
 from heatclient import exc as heat_exc
@@ -30,6 +31,7 @@ from troveclient import client as troveclient
 from heat.common import exception
 from heat.engine import clients
 from heat.engine.clients import client_plugin
+from heat.engine import scheduler
 from heat.tests import common
 from heat.tests import fakes
 from heat.tests import utils
@@ -202,6 +204,200 @@ class ClientPluginTest(common.HeatTestCase):
 
         self.assertRaises(TypeError, client_plugin.ClientPlugin, c)
 
+    def _lookup_plugin(self, tenant_id='t1', region_name='r1', user_id='u1'):
+        con = mock.Mock()
+        con.tenant_id = tenant_id
+        con.user_id = user_id
+        con.region_name = region_name
+        con.clients = clients.Clients(con)
+        return FooClientsPlugin(con)
+
+    def test_cached_lookup(self):
+        plugin = self._lookup_plugin()
+        lookup = mock.Mock(return_value='1234')
+
+        self.assertEqual('1234', plugin.cached_lookup('foo', 'bar', lookup))
+        self.assertEqual('1234', plugin.cached_lookup('foo', 'bar', lookup))
+        # The cache is shared between plugin instances and users
+        self.assertEqual('1234', self._lookup_plugin(
+            user_id='u2').cached_lookup('foo', 'bar', lookup))
+        lookup.assert_called_once_with('bar')
+
+    def test_cached_lookup_scoped(self):
+        lookup = mock.Mock(side_effect=lambda value: value)
+        self._lookup_plugin().cached_lookup('foo', 'a', lookup)
+        self._lookup_plugin(tenant_id='t2').cached_lookup('foo', 'a', lookup)
+        self._lookup_plugin(region_name='r2').cached_lookup('foo', 'a',
+                                                            lookup)
+        self._lookup_plugin().cached_lookup('baz', 'a', lookup)
+        self.assertEqual(4, lookup.call_count)
+
+    def test_cached_lookup_disabled(self):
+        cfg.CONF.set_override('lookup_cache_ttl', 0)
+        self.useFixture(fixtures.MonkeyPatch(
+            'heat.engine.clients.client_plugin._lookup_cache', None))
+        plugin = self._lookup_plugin()
+        lookup = mock.Mock(return_value='1234')
+
+        plugin.cached_lookup('foo', 'bar', lookup)
+        plugin.cached_lookup('foo', 'bar', lookup)
+        self.assertEqual(2, lookup.call_count)
+
+    def test_cached_lookup_not_found(self):
+        plugin = self._lookup_plugin()
+        other_tenant = self._lookup_plugin(tenant_id='t2')
+        lookup = mock.Mock(return_value='1234')
+        plugin.cached_lookup('foo', 'bar', lookup)
+        plugin.cached_lookup('foo', '1234', lookup)
+        other_tenant.cached_lookup('foo', 'bar', lookup)
+        self.assertEqual(3, lookup.call_count)
+
+        # A lookup of the ID that finds nothing drops the lookups in the
+        # same scope that resolved to it; other failures do not
+        client_plugin.lookup_cache().invalidate(('t1', 'r1', 'foo', '1234'))
+        self.patchobject(plugin, 'is_lookup_not_found', return_value=False)
+        lookup.side_effect = ValueError
+        self.assertRaises(ValueError, plugin.cached_lookup, 'foo', '1234',
+                          lookup)
+        self.assertEqual('1234', plugin.cached_lookup('foo', 'bar', lookup))
+        self.assertEqual(4, lookup.call_count)
+
+        plugin.is_lookup_not_found.return_value = True
+        self.assertRaises(ValueError, plugin.cached_lookup, 'foo', '1234',
+                          lookup)
+        self.assertRaises(ValueError, plugin.cached_lookup, 'foo', 'bar',
+                          lookup)
+        self.assertEqual(6, lookup.call_count)
+        self.assertEqual('1234', other_tenant.cached_lookup('foo', 'bar',
+                                                            lookup))
+        self.assertEqual(6, lookup.call_count)
+
+    def test_invalidate_lookup(self):
+        plugin = self._lookup_plugin()
+        other_tenant = self._lookup_plugin(tenant_id='t2')
+        lookup = mock.Mock(side_effect=lambda value: value.upper())
+        plugin.cached_lookup('foo', 'a', lookup)
+        plugin.cached_lookup('foo', 'b', lookup)
+        plugin.cached_lookup('baz', 'a', lookup)
+        other_tenant.cached_lookup('foo', 'a', lookup)
+        self.assertEqual(4, lookup.call_count)
+
+        plugin.invalidate_lookup('foo', 'A')
+        plugin.cached_lookup('foo', 'a', lookup)
+        plugin.cached_lookup('foo', 'b', lookup)
+        plugin.cached_lookup('baz', 'a', lookup)
+        other_tenant.cached_lookup('foo', 'a', lookup)
+        self.assertEqual(6, lookup.call_count)
+
+        plugin.invalidate_lookup('foo')
+        plugin.cached_lookup('foo', 'a', lookup)
+        plugin.cached_lookup('foo', 'b', lookup)
+        plugin.cached_lookup('baz', 'a', lookup)
+        self.assertEqual(8, lookup.call_count)
+
+    def test_invalidate_lookups(self):
+        plugin = self._lookup_plugin()
+        lookup = mock.Mock(side_effect=lambda value: value.upper())
+        plugin.cached_lookup('foo', 'a', lookup)
+        plugin.cached_lookup('baz', 'a', lookup)
+        plugin.cached_lookup('foo', 'b', lookup)
+
+        client_plugin.invalidate_lookups('A')
+        plugin.cached_lookup('foo', 'a', lookup)
+        plugin.cached_lookup('baz', 'a', lookup)
+        plugin.cached_lookup('foo', 'b', lookup)
+        self.assertEqual(5, lookup.call_count)
+
+
+class PollAggregatorTest(common.HeatTestCase):
+
+    def setUp(self):
+        super(PollAggregatorTest, self).setUp()
+        self.list_func = mock.Mock(
+            side_effect=lambda ids: dict((i, i.upper()) for i in ids
+                                         if i != 'gone'))
+        self.poller = client_plugin.PollAggregator(self.list_func)
+
+    def test_batching(self):
+        self.poller.register('a')
+        self.assertFalse(self.poller.batching('a'))
+        self.poller.register('b')
+        self.assertTrue(self.poller.batching('a'))
+        self.assertTrue(self.poller.batching('b'))
+        self.assertFalse(self.poller.batching('c'))
+        self.poller.unregister('b')
+        self.assertFalse(self.poller.batching('a'))
+
+    def test_one_list_per_cycle(self):
+        for i in ('a', 'b', 'c'):
+            self.poller.register(i)
+
+        self.assertEqual('A', self.poller.get('a'))
+        self.assertEqual('B', self.poller.get('b'))
+        self.assertEqual('C', self.poller.get('c'))
+        self.assertEqual(1, self.list_func.call_count)
+        self.assertEqual(set(['a', 'b', 'c']),
+                         set(self.list_func.call_args[0][0]))
+
+        # Polling again starts a new cycle
+        self.assertEqual('B', self.poller.get('b'))
+        self.assertEqual('A', self.poller.get('a'))
+        self.assertEqual(2, self.list_func.call_count)
+
+    def test_unregister(self):
+        for i in ('a', 'b', 'c'):
+            self.poller.register(i)
+        self.poller.get('a')
+        self.poller.unregister('a')
+
+        self.poller.get('b')
+        self.poller.get('b')
+        self.assertEqual(set(['b', 'c']),
+                         set(self.list_func.call_args[0][0]))
+
+    def test_max_age(self):
+        self.poller.max_age = 0
+        self.poller.register('a')
+        self.poller.register('b')
+        self.patchobject(scheduler, 'wallclock', side_effect=[0, 1, 1])
+
+        self.poller.get('a')
+        self.poller.get('b')
+        self.assertEqual(2, self.list_func.call_count)
+
+    def test_not_found(self):
+        self.poller.register('a')
+        self.poller.register('gone')
+        self.assertIsNone(self.poller.get('gone'))
+
+    def test_list_failure(self):
+        self.list_func.side_effect = Exception('boom')
+        self.poller.register('a')
+        self.poller.register('b')
+        self.assertIsNone(self.poller.get('a'))
+        self.assertIsNone(self.poller.get('b'))
+        self.assertEqual(1, self.list_func.call_count)
+
+    def test_no_batching(self):
+        plugin = FooClientsPlugin(mock.Mock())
+        poller = plugin.poll_aggregator('foo')
+        self.assertIs(poller, plugin.poll_aggregator('foo'))
+        poller.register('a')
+        poller.register('b')
+        self.assertIsNone(poller.get('a'))
+
+    def test_default_list_by_id(self):
+        plugin = FooClientsPlugin(mock.Mock())
+
+        def get_by_id(kind, resource_id):
+            if resource_id == 'gone':
+                raise Exception('not found')
+            return resource_id.upper()
+
+        plugin._get_by_id = mock.Mock(side_effect=get_by_id)
+        self.assertEqual({'a': 'A', 'b': 'B'},
+                         plugin._list_by_id('foo', ['a', 'gone', 'b']))
+
 
 class TestClientPluginsInitialise(common.HeatTestCase):
 
@@ -0,0 +1,99 @@
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import mock
+
+from heat.common import cache
+from heat.tests import common
+
+
+class LRUCacheTest(common.HeatTestCase):
+
+    def test_get_set(self):
+        c = cache.LRUCache()
+        self.assertIsNone(c.get('a'))
+        c.set('a', 1)
+        self.assertEqual(1, c.get('a'))
+        self.assertEqual(1, c.hits)
+        self.assertEqual(1, c.misses)
+
+    def test_evicts_least_recently_used(self):
+        c = cache.LRUCache(maxsize=2)
+        c.set('a', 1)
+        c.set('b', 2)
+        c.get('a')
+        c.set('c', 3)
+        self.assertEqual(2, len(c))
+        self.assertIn('a', c)
+        self.assertNotIn('b', c)
+        self.assertIn('c', c)
+
+    def test_ttl(self):
+        timer = mock.Mock(side_effect=[0, 5, 11])
+        c = cache.LRUCache(ttl=10, timer=timer)
+        c.set('a', 1)
+        self.assertEqual(1, c.get('a'))
+        self.assertIsNone(c.get('a'))
+
+    def test_disabled(self):
+        c = cache.LRUCache(maxsize=0)
+        c.set('a', 1)
+        self.assertIsNone(c.get('a'))
+
+    def test_get_or_set(self):
+        c = cache.LRUCache()
+        create = mock.Mock(return_value=1)
+        self.assertEqual(1, c.get_or_set('a', create))
+        self.assertEqual(1, c.get_or_set('a', create))
+        self.assertEqual(1, create.call_count)
+
+    def test_get_or_set_exception_not_cached(self):
+        c = cache.LRUCache()
+        create = mock.Mock(side_effect=ValueError)
+        self.assertRaises(ValueError, c.get_or_set, 'a', create)
+        self.assertNotIn('a', c)
+
+    def test_invalidate(self):
+        c = cache.LRUCache()
+        c.set(('x', 'a'), 1)
+        c.set(('x', 'b'), 2)
+        c.set(('y', 'a'), 3)
+        c.invalidate(('x', 'a'))
+        self.assertNotIn(('x', 'a'), c)
+        c.invalidate(lambda k: k[0] == 'x')
+        self.assertEqual(1, len(c))
+        c.invalidate()
+        self.assertEqual(0, len(c))
+
+    def test_invalidate_items(self):
+        c = cache.LRUCache()
+        c.set(('x', 'a'), 1)
+        c.set(('x', 'b'), 2)
+        c.set(('y', 'a'), 1)
+        c.invalidate_items(lambda k, v: k[0] == 'x' and v == 1)
+        self.assertEqual([('x', 'b'), ('y', 'a')], sorted(c._data))
+
+    def test_maxweight(self):
+        c = cache.LRUCache(maxweight=10)
+        c.set('a', 1, weight=4)
+        c.set('b', 2, weight=4)
+        self.assertEqual(8, c.weight)
+        c.set('c', 3, weight=4)
+        self.assertNotIn('a', c)
+        self.assertEqual(8, c.weight)
+        c.set('b', 2, weight=1)
+        self.assertEqual(5, c.weight)
+        c.set('d', 4, weight=11)
+        self.assertNotIn('d', c)
+        c.invalidate('c')
+        self.assertEqual(1, c.weight)
@@ -94,6 +94,24 @@ class TestRequestContext(common.HeatTestCase):
         self.assertTrue(ctx.is_admin)
         self.assertTrue(ctx.show_deleted)
 
+    def test_trust_auth_plugin_shared(self):
+        def trust_context(trust_id):
+            return context.RequestContext(
+                trust_id=trust_id, trustor_user_id='atrustor',
+                auth_url='http://server.test:5000/v2.0', is_admin=False,
+                overwrite=False)
+
+        with mock.patch.object(context.v3, 'Password',
+                               side_effect=lambda **kw: mock.Mock()) as pw:
+            plugin = trust_context('atrust').auth_plugin
+            self.assertIs(plugin, trust_context('atrust').auth_plugin)
+            self.assertIsNot(plugin, trust_context('btrust').auth_plugin)
+        self.assertEqual(2, pw.call_count)
+        pw.assert_called_with(username=mock.ANY, password=mock.ANY,
+                              user_domain_id='default',
+                              auth_url='http://server.test:5000/v3',
+                              trust_id='btrust')
+
     def test_admin_context_policy_true(self):
         policy_check = 'heat.common.policy.Enforcer.check_is_admin'
         with mock.patch(policy_check) as pc:
@@ -0,0 +1,50 @@
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import uuid
+
+from heat.common import hash_ring
+from heat.tests import common
+
+
+class HashRingTest(common.HeatTestCase):
+
+    def setUp(self):
+        super(HashRingTest, self).setUp()
+        self.keys = [str(uuid.uuid4()) for i in range(200)]
+
+    def test_no_hosts(self):
+        ring = hash_ring.HashRing([])
+        self.assertIsNone(ring.get_host('foo'))
+
+    def test_single_host(self):
+        ring = hash_ring.HashRing(['a'])
+        self.assertEqual(set(['a']),
+                         set(ring.get_host(k) for k in self.keys))
+
+    def test_consistent(self):
+        ring1 = hash_ring.HashRing(['a', 'b', 'c'])
+        ring2 = hash_ring.HashRing(['c', 'b', 'a'])
+        for key in self.keys:
+            self.assertEqual(ring1.get_host(key), ring2.get_host(key))
+        self.assertEqual(set(['a', 'b', 'c']),
+                         set(ring1.get_host(k) for k in self.keys))
+
+    def test_add_host(self):
+        ring1 = hash_ring.HashRing(['a', 'b', 'c'])
+        ring2 = hash_ring.HashRing(['a', 'b', 'c', 'd'])
+        for key in self.keys:
+            host = ring2.get_host(key)
+            # keys only ever move to the new host
+            if host != 'd':
+                self.assertEqual(ring1.get_host(key), host)
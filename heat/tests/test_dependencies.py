@@ -12,6 +12,7 @@
 #    under the License.
 
 
+import six
 import testtools
 
 from heat.engine import dependencies
@@ -227,3 +228,49 @@ class dependenciesTest(testtools.TestCase):
                         "'%s' not found in required_by" % n)
 
         self.assertRaises(KeyError, d.required_by, 'foo')
+
+    def test_requires(self):
+        d = dependencies.Dependencies([('last', 'e1'), ('last', 'mid1'),
+                                       ('mid1', 'e2'), ('e2', None)])
+        self.assertEqual(set(['e1', 'mid1']), set(d.requires('last')))
+        self.assertEqual([], list(d.requires('e2')))
+        self.assertRaises(KeyError, d.requires, 'foo')
+
+    def test_edges_reverse(self):
+        d = dependencies.Dependencies([('1', None), ('2', '3'), ('2', '4')])
+        self.assertEqual(set([('1', None), ('3', '2'), ('4', '2')]),
+                         set(d.edges(reverse=True)))
+        self.assertEqual(set(d.graph(reverse=True).edges()),
+                         set(d.edges(reverse=True)))
+
+    def test_partial_of_partial(self):
+        d = dependencies.Dependencies([('last', 'e1'), ('last', 'mid1'),
+                                       ('last', 'mid2'), ('mid1', 'e2'),
+                                       ('mid1', 'mid3'), ('mid2', 'mid3'),
+                                       ('mid3', 'e3')])
+        p = d['mid3']['mid1']
+        self.assertEqual(['mid1', 'last'], list(p))
+        self.assertEqual(['last', 'mid1'], list(reversed(p)))
+        self.assertEqual([('last', 'mid1')], list(p.edges()))
+        self.assertRaises(KeyError, p.required_by, 'mid2')
+        self.assertEqual([], list(p.requires('mid1')))
+
+    def test_add_after_sort(self):
+        d = dependencies.Dependencies([('last', 'first')])
+        self.assertEqual(['first', 'last'], list(d))
+        d += ('first', 'zeroth')
+        self.assertEqual(['zeroth', 'first', 'last'], list(d))
+
+        p = d['first']
+        p += ('first', 'other')
+        self.assertEqual(['other', 'first', 'last'], list(p))
+        self.assertEqual(['zeroth', 'first', 'last'], list(d))
+
+    def test_circular_message(self):
+        d = dependencies.Dependencies([('first', None),
+                                       ('second', 'third'),
+                                       ('third', 'second')])
+        ex = self.assertRaises(dependencies.CircularDependencyException,
+                               list, iter(d))
+        self.assertIn('second', six.text_type(ex))
+        self.assertNotIn('first', six.text_type(ex))
@@ -318,6 +318,26 @@ class FormatTest(common.HeatTestCase):
         info = api.format_stack(self.stack)
         self.assertEqual('1970-01-01T00:00:00Z', info['updated_time'])
 
+    def test_format_stack_summary_description(self):
+        db_stack = mock.Mock(tenant='test_tenant_id', id=str(uuid.uuid4()),
+                             created_at=datetime(1970, 1, 1),
+                             updated_at=None)
+        db_stack.name = 'test_stack'
+        for template, description in (
+                ({'heat_template_version': '2013-05-23',
+                  'description': 'HOT'}, 'HOT'),
+                ({'HeatTemplateFormatVersion': '2012-12-12',
+                  'Description': 'CFN'}, 'CFN'),
+                ({'HeatTemplateFormatVersion': '2012-12-12'},
+                 'No description')):
+            db_stack.template = template
+            with mock.patch('heat.engine.template.Template') as mock_template:
+                info = api.format_stack_summary(db_stack)
+            self.assertFalse(mock_template.called)
+            self.assertEqual(description, info[rpc_api.STACK_DESCRIPTION])
+            self.assertEqual(description,
+                             info[rpc_api.STACK_TMPL_DESCRIPTION])
+
     @mock.patch.object(api, 'format_stack_outputs')
     def test_format_stack_adds_outputs(self, mock_fmt_outputs):
         mock_fmt_outputs.return_value = 'foobar'
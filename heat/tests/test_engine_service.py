@@ -23,17 +23,20 @@ import mox
 from oslo.config import cfg
 from oslo.messaging.rpc import dispatcher
 from oslo.serialization import jsonutils
+from oslo.utils import timeutils
 import six
 
 from heat.common import exception
 from heat.common import identifier
 from heat.common import template_format
 from heat.db import api as db_api
+from heat.engine import api
 from heat.engine.clients.os import glance
 from heat.engine.clients.os import keystone
 from heat.engine.clients.os import nova
 from heat.engine import dependencies
 from heat.engine import environment
+from heat.engine import event
 from heat.engine import properties
 from heat.engine import resource as res
 from heat.engine.resources import instance as instances
@@ -1598,24 +1601,92 @@ class StackServiceTest(common.HeatTestCase):
         res._register_class('ResourceWithPropsType',
                             generic_rsrc.ResourceWithProps)
 
-    @mock.patch.object(service_stack_watch.StackWatch, 'start_watch_task')
-    @mock.patch.object(service.db_api, 'stack_get_all')
-    @mock.patch.object(service.service.Service, 'start')
-    def test_start_watches_all_stacks(self, mock_super_start, mock_get_all,
-                                      start_watch_task):
-        s1 = mock.Mock(id=1)
-        s2 = mock.Mock(id=2)
-        mock_get_all.return_value = [s1, s2]
-        start_watch_task.return_value = None
-
+    @mock.patch.object(service_stack_watch.StackWatch, 'start')
+    def test_create_periodic_tasks(self, mock_watch_start):
         self.eng.thread_group_mgr = None
         self.eng.create_periodic_tasks()
 
-        mock_get_all.assert_called_once_with(mock.ANY, tenant_safe=False)
-        calls = start_watch_task.call_args_list
-        self.assertEqual(2, start_watch_task.call_count)
-        self.assertIn(mock.call(1, mock.ANY), calls)
-        self.assertIn(mock.call(2, mock.ANY), calls)
+        # A single scheduler evaluates the watch rules of all stacks
+        mock_watch_start.assert_called_once_with()
+        self.assertIsInstance(self.eng.stack_watch,
+                              service_stack_watch.StackWatch)
+
+    @mock.patch.object(service.db_api, 'event_prune')
+    def test_prune_events(self, mock_prune):
+        mock_prune.side_effect = [3, Exception('boom')]
+        self.eng.prune_events()
+        # Errors are logged rather than ending the periodic task
+        self.eng.prune_events()
+        self.assertEqual(2, mock_prune.call_count)
+
+    @mock.patch.object(service.db_api, 'engine_get_all_hosts',
+                       return_value=[])
+    @mock.patch.object(service.db_api, 'watch_data_purge')
+    def test_purge_watch_data(self, mock_purge, mock_hosts):
+        cfg.CONF.set_override('watch_data_retention', 3600)
+        mock_purge.side_effect = [3, Exception('boom')]
+        self.eng.purge_watch_data()
+        # Errors are logged rather than ending the periodic task
+        self.eng.purge_watch_data()
+        self.assertEqual([mock.call(mock.ANY, 3600)] * 2,
+                         mock_purge.call_args_list)
+
+    @mock.patch.object(service.db_api, 'watch_data_purge')
+    @mock.patch.object(service.db_api, 'engine_get_all_hosts')
+    def test_purge_watch_data_one_host(self, mock_hosts, mock_purge):
+        mock_purge.return_value = 0
+        mock_hosts.return_value = ['0-host', self.eng.host]
+        self.eng.purge_watch_data()
+        self.assertFalse(mock_purge.called)
+
+        mock_hosts.return_value = [self.eng.host, 'z-host']
+        self.eng.purge_watch_data()
+        self.assertEqual(1, mock_purge.call_count)
+
+    @mock.patch.object(service.db_api, 'engine_heartbeat')
+    def test_engine_heartbeat(self, mock_heartbeat):
+        self.eng.engine_id = 'engine-id'
+        mock_heartbeat.side_effect = [None, Exception('boom')]
+        self.eng.engine_heartbeat()
+        # Errors are logged rather than ending the periodic task
+        self.eng.engine_heartbeat()
+        self.assertEqual([mock.call('engine-id', self.eng.host)] * 2,
+                         mock_heartbeat.call_args_list)
+
+    @mock.patch.object(service.db_api, 'engine_heartbeat')
+    def test_engine_heartbeat_lapsed(self, mock_heartbeat):
+        cfg.CONF.set_override('stack_lock_lease_time', 30)
+        self.eng.engine_id = 'engine-id'
+        self.eng.thread_group_mgr = mock.Mock()
+        stop_lost_locks = self.eng.thread_group_mgr.stop_lost_locks
+        now = timeutils.utcnow()
+        timeutils.set_time_override(now)
+        self.addCleanup(timeutils.clear_time_override)
+
+        self.eng.engine_heartbeat()
+        mock_heartbeat.side_effect = Exception('boom')
+        timeutils.advance_time_seconds(30)
+        self.eng.engine_heartbeat()
+        self.assertFalse(stop_lost_locks.called)
+
+        # The locks are checked once the lease has run out without a
+        # heartbeat, and again when the heartbeat is restored
+        timeutils.advance_time_seconds(1)
+        self.eng.engine_heartbeat()
+        stop_lost_locks.assert_called_once_with('engine-id')
+        mock_heartbeat.side_effect = None
+        self.eng.engine_heartbeat()
+        self.assertEqual(2, stop_lost_locks.call_count)
+        self.eng.engine_heartbeat()
+        self.assertEqual(2, stop_lost_locks.call_count)
+
+    @mock.patch.object(service.db_api, 'engine_purge')
+    def test_purge_engines(self, mock_purge):
+        cfg.CONF.set_override('stack_lock_lease_time', 30)
+        mock_purge.side_effect = [3, Exception('boom')]
+        self.eng.purge_engines()
+        self.eng.purge_engines()
+        self.assertEqual([mock.call(30)] * 2, mock_purge.call_args_list)
 
     @stack_context('service_identify_test_stack', False)
     def test_stack_identify(self):
@@ -1831,6 +1902,19 @@ class StackServiceTest(common.HeatTestCase):
 
         self.m.VerifyAll()
 
+    @stack_context('service_event_list_test_stack')
+    def test_stack_event_list_does_not_load_stack(self):
+        expected = [api.format_event(event.Event.load(self.ctx, e.id, e,
+                                                      self.stack))
+                    for e in db_api.event_get_all_by_tenant(self.ctx)]
+
+        with mock.patch.object(parser.Stack, 'load') as mock_load:
+            events = self.eng.list_events(self.ctx, None)
+
+        self.assertFalse(mock_load.called)
+        self.assertEqual(2, len(events))
+        self.assertEqual(expected, events)
+
     @mock.patch.object(db_api, 'event_get_all_by_stack')
     @mock.patch.object(service.EngineService, '_get_stack')
     def test_stack_events_list_passes_marker_and_filters(self,
@@ -1899,6 +1983,18 @@ class StackServiceTest(common.HeatTestCase):
 
         self.m.VerifyAll()
 
+    @stack_context('service_list_summary_test_stack')
+    def test_stack_list_summary(self):
+        expected = api.format_stack(self.stack)
+        del expected[rpc_api.STACK_PARAMETERS]
+        del expected[rpc_api.STACK_OUTPUTS]
+
+        with mock.patch.object(parser.Stack, 'load_all') as mock_load_all:
+            sl = self.eng.list_stacks(self.ctx, summary=True)
+
+        self.assertFalse(mock_load_all.called)
+        self.assertEqual([expected], sl)
+
     @mock.patch.object(db_api, 'stack_get_all')
     def test_stack_list_passes_marker_info(self, mock_stack_get_all):
         limit = object()
@@ -2534,6 +2630,23 @@ class StackServiceTest(common.HeatTestCase):
         self.m.VerifyAll()
         self.stack.delete()
 
+    def test_signal_metadata_refresh_coalesced(self):
+        stack = mock.Mock(id='stack-id')
+
+        def refresh(changed):
+            # More signals arrive while the first refresh is in progress
+            if 'a' in changed:
+                self.eng._refresh_metadata(stack, 'b')
+                self.eng._refresh_metadata(stack, 'c')
+                self.eng._refresh_metadata(stack, 'b')
+
+        stack.refresh_metadata.side_effect = refresh
+        self.eng._refresh_metadata(stack, 'a')
+
+        self.assertEqual([mock.call(set(['a'])), mock.call(set(['b', 'c']))],
+                         stack.refresh_metadata.call_args_list)
+        self.assertEqual({}, self.eng._metadata_refreshes)
+
     def test_signal_reception_no_resource(self):
         stack = get_stack('signal_reception_no_resource',
                           self.ctx,
@@ -3536,6 +3649,41 @@ class ThreadGroupManagerStopTest(common.HeatTestCase):
         self.assertNotIn(stack_id, thm.groups)
         self.assertNotIn(stack_id, thm.events)
 
+    @mock.patch.object(service.db_api, 'stack_lock_get_engine_id')
+    def test_tgm_stop_lost_locks(self, mock_get_engine_id):
+        lock = mock.Mock()
+
+        def function():
+            while True:
+                eventlet.sleep()
+
+        stacks = [mock.Mock(id=stack_id) for stack_id in ('held', 'stolen',
+                                                           'unknown')]
+        thm = service.ThreadGroupManager()
+        for stack in stacks:
+            thm.start_with_acquired_lock(stack, lock, function)
+        self.assertEqual(set(['held', 'stolen', 'unknown']), thm.locked)
+
+        engine_ids = {'held': 'engine-id', 'stolen': 'other-engine-id',
+                      'unknown': Exception('boom')}
+
+        def get_engine_id(stack_id):
+            result = engine_ids[stack_id]
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        mock_get_engine_id.side_effect = get_engine_id
+        thm.stop_lost_locks('engine-id')
+
+        self.assertEqual(set(['held']), thm.locked)
+        self.assertIn('held', thm.groups)
+        self.assertNotIn('stolen', thm.groups)
+        self.assertNotIn('unknown', thm.groups)
+        self.assertEqual([mock.call('stolen'), mock.call('unknown')],
+                         sorted(lock.release.call_args_list))
+        thm.stop('held')
+
 
 class SnapshotServiceTest(common.HeatTestCase):
 
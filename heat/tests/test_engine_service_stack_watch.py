@@ -11,7 +11,11 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import datetime
+
 import mock
+from oslo.config import cfg
+from oslo.utils import timeutils
 
 from heat.engine import service_stack_watch
 from heat.rpc import api as rpc_api
@@ -26,85 +30,222 @@ class StackServiceWatcherTest(common.HeatTestCase):
 
         self.ctx = utils.dummy_context(tenant_id='stack_service_test_tenant')
         self.patch('heat.engine.service.warnings')
-
-    @mock.patch.object(service_stack_watch.db_api, 'stack_get_all_by_owner_id')
-    @mock.patch.object(service_stack_watch.db_api,
-                       'watch_rule_get_all_by_stack')
-    @mock.patch.object(service_stack_watch.db_api, 'watch_rule_update')
-    def test_periodic_watch_task_not_created(self, watch_rule_update,
-                                             watch_rule_get_all_by_stack,
-                                             stack_get_all_by_owner_id):
-        """If there is no cloud watch lite alarm, then don't create
-        a periodic task for it.
-        """
-        stack_id = 83
-        watch_rule_get_all_by_stack.return_value = []
-        stack_get_all_by_owner_id.return_value = []
-        tg = mock.Mock()
-        sw = service_stack_watch.StackWatch(tg)
-        sw.start_watch_task(stack_id, self.ctx)
-
-        # assert that add_timer is NOT called.
-        self.assertEqual([], tg.add_timer.call_args_list)
-
-    @mock.patch.object(service_stack_watch.db_api, 'stack_get_all_by_owner_id')
-    @mock.patch.object(service_stack_watch.db_api,
-                       'watch_rule_get_all_by_stack')
+        # No live engines unless a test says otherwise, so that all rules
+        # are local
+        self.patchobject(service_stack_watch.db_api, 'engine_get_all_hosts',
+                         return_value=[])
+
+    def _watch_rule(self, wid, stack_id='stack1',
+                    state=rpc_api.WATCH_STATE_NODATA, period=60,
+                    last_evaluated=None):
+        wr = mock.Mock()
+        wr.id = wid
+        wr.name = 'rule%s' % wid
+        wr.stack_id = stack_id
+        wr.state = state
+        wr.rule = {'Period': str(period)}
+        wr.last_evaluated = last_evaluated or timeutils.utcnow()
+        return wr
+
+    @mock.patch.object(service_stack_watch.db_api, 'watch_rule_get_all')
     @mock.patch.object(service_stack_watch.db_api, 'watch_rule_update')
-    def test_periodic_watch_task_created(self, watch_rule_update,
-                                         watch_rule_get_all_by_stack,
-                                         stack_get_all_by_owner_id):
-        """If there is no cloud watch lite alarm, then DO create
-        a periodic task for it.
-        """
-        stack_id = 86
-        wr1 = mock.Mock()
-        wr1.id = 4
-        wr1.state = rpc_api.WATCH_STATE_NODATA
-
-        watch_rule_get_all_by_stack.return_value = [wr1]
-        stack_get_all_by_owner_id.return_value = []
+    def test_start(self, watch_rule_update, watch_rule_get_all):
+        now = timeutils.utcnow()
+        timeutils.set_time_override(now)
+        self.addCleanup(timeutils.clear_time_override)
+        wr1 = self._watch_rule(4, period=300,
+                               last_evaluated=now - datetime.timedelta(1))
+        wr2 = self._watch_rule(
+            5, state=rpc_api.WATCH_STATE_CEILOMETER_CONTROLLED)
+        watch_rule_get_all.return_value = [wr1, wr2]
         tg = mock.Mock()
         sw = service_stack_watch.StackWatch(tg)
-        sw.start_watch_task(stack_id, self.ctx)
+        sw.start()
 
-        # assert that add_timer IS called.
-        self.assertEqual([mock.call(stack_id, sw.periodic_watcher_task,
-                                    sid=stack_id)],
+        # assert that a single timer is added for all of the rules
+        self.assertEqual([mock.call(60, sw.periodic_watcher_task)],
                          tg.add_timer.call_args_list)
-
-    @mock.patch.object(service_stack_watch.db_api, 'stack_get_all_by_owner_id')
-    @mock.patch.object(service_stack_watch.db_api,
-                       'watch_rule_get_all_by_stack')
+        watch_rule_get_all.assert_called_once_with(mock.ANY, marker=None)
+        # the last_evaluated time is reset, and ceilometer controlled rules
+        # are not scheduled
+        watch_rule_update.assert_called_once_with(
+            mock.ANY, 4, {'last_evaluated': now})
+        self.assertEqual([(now + datetime.timedelta(seconds=300), 4)],
+                         sw._queue)
+
+        # only the rules created since are scheduled subsequently
+        wr3 = self._watch_rule(6, last_evaluated=now)
+        watch_rule_get_all.return_value = [wr3]
+        sw.schedule_new_rules(self.ctx)
+        watch_rule_get_all.assert_called_with(self.ctx, marker=5)
+        self.assertEqual(1, watch_rule_update.call_count)
+        self.assertEqual(set([4, 6]), sw._scheduled)
+
+    @mock.patch.object(service_stack_watch.db_api, 'watch_rule_get_all')
     @mock.patch.object(service_stack_watch.db_api, 'watch_rule_update')
-    def test_periodic_watch_task_created_nested(self, watch_rule_update,
-                                                watch_rule_get_all_by_stack,
-                                                stack_get_all_by_owner_id):
-        stack_id = 90
-
-        def my_wr_get(cnxt, sid):
-            if sid == stack_id:
-                return []
-            wr1 = mock.Mock()
-            wr1.id = 4
-            wr1.state = rpc_api.WATCH_STATE_NODATA
-            return [wr1]
-
-        watch_rule_get_all_by_stack.side_effect = my_wr_get
-
-        def my_nested_get(cnxt, sid):
-            if sid == stack_id:
-                nested_stack = mock.Mock()
-                nested_stack.id = 55
-                return [nested_stack]
-            return []
-
-        stack_get_all_by_owner_id.side_effect = my_nested_get
+    def test_rescan(self, watch_rule_update, watch_rule_get_all):
+        now = timeutils.utcnow()
+        timeutils.set_time_override(now)
+        self.addCleanup(timeutils.clear_time_override)
+        wrs = [self._watch_rule(
+            4, state=rpc_api.WATCH_STATE_CEILOMETER_CONTROLLED)]
+        watch_rule_get_all.side_effect = lambda cnxt, marker: [
+            wr for wr in wrs if marker is None or wr.id > marker]
+        sw = service_stack_watch.StackWatch(mock.Mock())
+        sw.schedule_new_rules(self.ctx)
+        self.assertEqual(set(), sw._scheduled)
+
+        # A rule skipped when first seen, or committed out of ID order, is
+        # picked up by the next full re-scan
+        wrs[0].state = rpc_api.WATCH_STATE_NODATA
+        wrs.insert(0, self._watch_rule(3))
+        sw.schedule_new_rules(self.ctx)
+        watch_rule_get_all.assert_called_with(self.ctx, marker=4)
+        self.assertEqual(set(), sw._scheduled)
+
+        timeutils.advance_time_seconds(300)
+        sw.schedule_new_rules(self.ctx)
+        watch_rule_get_all.assert_called_with(self.ctx, marker=None)
+        self.assertEqual(set([3, 4]), sw._scheduled)
+
+    @mock.patch.object(service_stack_watch.db_api, 'watch_rule_get_all')
+    @mock.patch.object(service_stack_watch.db_api, 'engine_get_all_hosts')
+    def test_rescan_on_engine_change(self, engine_get_all_hosts,
+                                     watch_rule_get_all):
+        engine_get_all_hosts.return_value = ['engine1']
+        watch_rule_get_all.return_value = []
+        sw = service_stack_watch.StackWatch(mock.Mock())
+        sw.schedule_new_rules(self.ctx)
+        watch_rule_get_all.return_value = [self._watch_rule(4)]
+        sw.schedule_new_rules(self.ctx)
+        watch_rule_get_all.assert_called_with(self.ctx, marker=None)
+        sw.schedule_new_rules(self.ctx)
+        watch_rule_get_all.assert_called_with(self.ctx, marker=4)
+
+        engine_get_all_hosts.return_value = ['engine1', 'engine2']
+        sw.schedule_new_rules(self.ctx)
+        watch_rule_get_all.assert_called_with(self.ctx, marker=None)
+
+    @mock.patch.object(service_stack_watch.db_api, 'watch_rule_get_all')
+    @mock.patch.object(service_stack_watch.db_api, 'engine_get_all_hosts')
+    def test_schedule_partitioned(self, engine_get_all_hosts,
+                                  watch_rule_get_all):
+        engine_get_all_hosts.return_value = ['engine1', 'engine2']
+        wrs = [self._watch_rule(i, stack_id='stack%d' % i)
+               for i in range(20)]
+        watch_rule_get_all.return_value = wrs
+
+        scheduled = {}
+        for host in ('engine1', 'engine2'):
+            cfg.CONF.set_override('host', host)
+            sw = service_stack_watch.StackWatch(mock.Mock())
+            sw.schedule_new_rules(self.ctx)
+            scheduled[host] = sw._scheduled
+
+        # each rule is evaluated by exactly one of the engines
+        self.assertEqual(set(range(20)),
+                         scheduled['engine1'] | scheduled['engine2'])
+        self.assertEqual(set(),
+                         scheduled['engine1'] & scheduled['engine2'])
+        self.assertNotEqual(set(), scheduled['engine1'])
+        self.assertNotEqual(set(), scheduled['engine2'])
+
+    @mock.patch.object(service_stack_watch.db_api, 'watch_rule_get')
+    @mock.patch.object(service_stack_watch.db_api, 'engine_get_all_hosts')
+    def test_check_watch_rule_moved(self, engine_get_all_hosts,
+                                    watch_rule_get):
+        engine_get_all_hosts.return_value = ['another-engine']
+        watch_rule_get.return_value = self._watch_rule(4)
+        sw = service_stack_watch.StackWatch(mock.Mock())
+        sw.update_ring()
+        sw._scheduled.add(4)
+        sw.check_watch_rule(4)
+        # Rules of stacks now hashed to another engine are dropped
+        self.assertEqual([], sw._queue)
+        self.assertEqual(set(), sw._scheduled)
+
+    @mock.patch.object(service_stack_watch.db_api, 'watch_rule_get_all')
+    def test_periodic_watcher_task(self, watch_rule_get_all):
+        watch_rule_get_all.return_value = []
+        now = timeutils.utcnow()
+        sw = service_stack_watch.StackWatch(mock.Mock())
+        sw._push(now + datetime.timedelta(seconds=60), 3)
+        sw._push(now - datetime.timedelta(seconds=10), 2)
+        sw._push(now - datetime.timedelta(seconds=20), 1)
+
+        evaluated = []
+        self.patchobject(sw, 'check_watch_rule').side_effect = (
+            evaluated.append)
+        sw.periodic_watcher_task()
+        sw.pool.waitall()
+
+        # only the due rules are evaluated, in order
+        self.assertEqual([1, 2], evaluated)
+        self.assertEqual([3], [wr_id for due, wr_id in sw._queue])
+
+    @mock.patch.object(service_stack_watch.db_api, 'watch_rule_get')
+    def test_check_watch_rule_deleted(self, watch_rule_get):
+        watch_rule_get.return_value = None
+        sw = service_stack_watch.StackWatch(mock.Mock())
+        sw._scheduled.add(4)
+        sw.check_watch_rule(4)
+        self.assertEqual([], sw._queue)
+        self.assertEqual(set(), sw._scheduled)
+
+    @mock.patch.object(service_stack_watch.db_api, 'watch_rule_get')
+    def test_check_watch_rule_error(self, watch_rule_get):
+        watch_rule_get.side_effect = Exception('boom')
+        sw = service_stack_watch.StackWatch(mock.Mock())
+        sw.check_watch_rule(4)
+        # the rule is retried at the next interval
+        self.assertEqual([4], [wr_id for due, wr_id in sw._queue])
+
+    @mock.patch.object(service_stack_watch.stack.Stack, 'load')
+    @mock.patch.object(service_stack_watch.stack, 'load_stored_context')
+    @mock.patch.object(service_stack_watch.watchrule.WatchRule, 'load')
+    @mock.patch.object(service_stack_watch.db_api, 'watch_rule_get')
+    @mock.patch.object(service_stack_watch.db_api, 'stack_get')
+    def test_check_watch_rule_defers_stack_load(self, stack_get,
+                                                watch_rule_get, wr_load,
+                                                load_stored_context,
+                                                stack_load):
+        stack_id = 93
+        now = timeutils.utcnow()
+        wr1 = self._watch_rule(4, stack_id=stack_id)
+        watch_rule_get.return_value = wr1
+        stack_get.return_value.id = stack_id
+        rule = wr_load.return_value
+        rule.evaluate.return_value = []
+        rule.last_evaluated = now
+        rule.timeperiod = datetime.timedelta(seconds=60)
         tg = mock.Mock()
         sw = service_stack_watch.StackWatch(tg)
-        sw.start_watch_task(stack_id, self.ctx)
-
-        # assert that add_timer IS called.
-        self.assertEqual([mock.call(stack_id, sw.periodic_watcher_task,
-                                    sid=stack_id)],
-                         tg.add_timer.call_args_list)
+        sw.check_watch_rule(4)
+
+        # The rule is evaluated with the stored context, but the stack is
+        # not loaded as there are no actions to run
+        wr_load.assert_called_once_with(load_stored_context.return_value,
+                                        watch=wr1)
+        stack_get.assert_called_once_with(mock.ANY, stack_id,
+                                          tenant_safe=False)
+        self.assertEqual([], tg.start.call_args_list)
+        self.assertFalse(stack_load.called)
+        # and the next evaluation is scheduled
+        self.assertEqual([(now + datetime.timedelta(seconds=60), 4)],
+                         sw._queue)
+
+        action = mock.Mock()
+        rule.evaluate.return_value = [action]
+        rule.get_details.return_value = {'alarm': 'a'}
+        sw.check_watch_rule(4)
+        self.assertEqual(1, len(tg.start.call_args_list))
+
+        # Run the alarm action thread, which loads the stack
+        args = tg.start.call_args[0]
+        self.assertEqual(stack_id, args[0])
+        stack_load.return_value.itervalues.return_value = []
+        args[1](*args[2:])
+        action.assert_called_once_with(details={'alarm': 'a'})
+        stack_load.assert_called_once_with(mock.ANY,
+                                           stack=stack_get.return_value,
+                                           use_stored_context=True)
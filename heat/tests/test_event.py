@@ -117,6 +117,11 @@ class EventTest(common.HeatTestCase):
                         'arizona', self.resource.properties,
                         self.resource.name, self.resource.type())
         e.store()
+        self.assertEqual(2, len(db_api.event_get_all_by_stack(self.ctx,
+                                                              self.stack.id)))
+
+        # Excess events are deleted by a periodic task, not on every store
+        self.assertEqual(1, db_api.event_prune(self.ctx))
         events = db_api.event_get_all_by_stack(self.ctx, self.stack.id)
         self.assertEqual(1, len(events))
         self.assertEqual('arizona', events[0].physical_resource_id)
@@ -14,10 +14,12 @@
 import copy
 import uuid
 
+import mock
 import six
 
 from heat.common import exception
 from heat.common.i18n import _
+from heat.engine import attributes
 from heat.engine.cfn import functions
 from heat.engine import environment
 from heat.engine import function
@@ -100,6 +102,137 @@ class ResolveTest(common.HeatTestCase):
         self.assertIsNot(result, snippet)
 
 
+class CachedResultTest(common.HeatTestCase):
+    class CountingFunction(function.Function):
+        def __init__(self, stack, fn_name, args):
+            super(CachedResultTest.CountingFunction, self).__init__(
+                stack, fn_name, args)
+            self.calls = 0
+
+        def result(self):
+            self.calls += 1
+            return ''.join(function.resolve(self.args))
+
+    class PureFunction(CountingFunction):
+        pure = True
+
+    def setUp(self):
+        super(CachedResultTest, self).setUp()
+        self.stack = self._stack('test_stack')
+
+    def _stack(self, name, parent_resource=None):
+        tmpl = parser.Template({"HeatTemplateFormatVersion": "2012-12-12"})
+        return parser.Stack(utils.dummy_context(), name, tmpl,
+                            parent_resource=parent_resource)
+
+    def test_cached_until_invalidated(self):
+        func = self.CountingFunction(self.stack, 'foo', ['bar', 'baz'])
+        self.assertFalse(func.is_static())
+
+        self.assertEqual('barbaz', function.resolve(func))
+        self.assertEqual({'x': 'barbaz'}, function.resolve({'x': func}))
+        self.assertEqual(1, func.calls)
+
+        function.invalidate_results(self.stack)
+        self.assertEqual('barbaz', function.resolve(func))
+        self.assertEqual(2, func.calls)
+
+    def test_invalidated_per_stack(self):
+        other_stack = self._stack('other_stack')
+        func = self.CountingFunction(self.stack, 'foo', ['bar', 'baz'])
+        function.resolve(func)
+        function.invalidate_results(other_stack)
+        function.resolve(func)
+        self.assertEqual(1, func.calls)
+
+    def test_invalidated_by_nested_stack(self):
+        parent_resource = mock.Mock(stack=self.stack)
+        nested = self._stack('nested_stack', parent_resource)
+        func = self.CountingFunction(self.stack, 'foo', ['bar', 'baz'])
+        function.resolve(func)
+        function.invalidate_results(nested)
+        function.resolve(func)
+        self.assertEqual(2, func.calls)
+
+    def test_not_cached_without_stack(self):
+        func = self.CountingFunction(None, 'foo', ['bar', 'baz'])
+        function.resolve(func)
+        function.resolve(func)
+        self.assertEqual(2, func.calls)
+
+    def test_none_not_cached(self):
+        func = self.CountingFunction(self.stack, 'foo', ['bar', 'baz'])
+        self.patchobject(func, 'result', side_effect=[None, 'wibble'])
+        self.assertIsNone(function.resolve(func))
+        self.assertEqual('wibble', function.resolve(func))
+
+    def test_static(self):
+        func = self.PureFunction(None, 'foo', ['bar', 'baz'])
+        outer = self.PureFunction(None, 'foo', ['qux', func])
+        self.assertTrue(func.is_static())
+        self.assertTrue(outer.is_static())
+
+        self.assertEqual('quxbarbaz', function.resolve(outer))
+        function.invalidate_results(self.stack)
+        self.assertEqual('quxbarbaz', function.resolve(outer))
+        self.assertEqual(1, outer.calls)
+        self.assertEqual(1, func.calls)
+
+    def test_not_static_with_dynamic_args(self):
+        func = self.CountingFunction(self.stack, 'foo', ['bar', 'baz'])
+        outer = self.PureFunction(self.stack, 'foo', ['qux', func])
+        self.assertFalse(outer.is_static())
+
+        self.assertEqual('quxbarbaz', function.resolve(outer))
+        function.invalidate_results(self.stack)
+        self.assertEqual('quxbarbaz', function.resolve(outer))
+        self.assertEqual(2, outer.calls)
+
+    def test_join_static(self):
+        join = functions.Join(None, 'Fn::Join', [',', ['a', 'b']])
+        self.assertTrue(join.is_static())
+        ref = functions.ResourceRef(None, 'Ref', 'foo')
+        join = functions.Join(None, 'Fn::Join', [',', ['a', ref]])
+        self.assertFalse(join.is_static())
+
+    def test_error_not_cached(self):
+        func = TestFunction(None, 'foo', ['bar', 'baz'])
+        self.patchobject(func, 'result').side_effect = [ValueError, 'wibble']
+        self.assertRaises(ValueError, function.resolve, func)
+        self.assertEqual('wibble', function.resolve(func))
+
+    def test_get_att_cache_none_not_cached(self):
+        class VolatileResource(generic_rsrc.GenericResource):
+            attributes_schema = {
+                'foo': attributes.Schema(
+                    'A volatile attribute',
+                    cache_mode=attributes.Schema.CACHE_NONE),
+                'Foo': attributes.Schema('A generic attribute'),
+            }
+            calls = 0
+
+            def _resolve_attribute(self, name):
+                VolatileResource.calls += 1
+                return '%s%d' % (name, VolatileResource.calls)
+
+        resource._register_class('VolatileResourceType', VolatileResource)
+        tmpl = parser.Template({
+            'HeatTemplateFormatVersion': '2012-12-12',
+            'Resources': {'A': {'Type': 'VolatileResourceType'}}})
+        stack = parser.Stack(utils.dummy_context(), 'test_stack', tmpl)
+        stack.store()
+        res = stack['A']
+        res.state_set(res.CREATE, res.COMPLETE)
+
+        volatile = functions.GetAtt(stack, 'Fn::GetAtt', ['A', 'foo'])
+        self.assertEqual('foo1', function.resolve(volatile))
+        self.assertEqual('foo2', function.resolve(volatile))
+
+        cached = functions.GetAtt(stack, 'Fn::GetAtt', ['A', 'Foo'])
+        self.assertEqual('Foo3', function.resolve(cached))
+        self.assertEqual('Foo3', function.resolve(cached))
+
+
 class ValidateTest(common.HeatTestCase):
     def setUp(self):
         super(ValidateTest, self).setUp()
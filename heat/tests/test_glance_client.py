@@ -57,6 +57,23 @@ class GlanceUtilsTests(common.HeatTestCase):
                           self.glance_plugin.get_image_id, 'noimage')
         self.m.VerifyAll()
 
+    def test_get_image_id_by_name_cached(self):
+        """Tests that image names are resolved once and then cached."""
+        my_image = self.m.CreateMockAnything()
+        img_id = str(uuid.uuid4())
+        my_image.id = img_id
+        my_image.name = 'myfakeimage'
+        self.glance_client.images = self.m.CreateMockAnything()
+        filters = {'name': 'myfakeimage'}
+        self.glance_client.images.list(filters=filters).AndReturn([my_image])
+        self.m.ReplayAll()
+
+        self.assertEqual(img_id, self.glance_plugin.get_image_id(
+            'myfakeimage'))
+        self.assertEqual(img_id, self.glance_plugin.get_image_id(
+            'myfakeimage'))
+        self.m.VerifyAll()
+
     def test_get_image_id_by_name_in_uuid(self):
         """Tests the get_image_id function by name in uuid."""
         my_image = self.m.CreateMockAnything()
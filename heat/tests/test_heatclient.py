@@ -734,7 +734,23 @@ class KeystoneClientTest(common.HeatTestCase):
         self.m.ReplayAll()
         ctx = utils.dummy_context()
         heat_ks_client = heat_keystoneclient.KeystoneClient(ctx)
+        context.trust_auth_cache().set(('atrust123', 'heat', 'url'), 'auth')
+        context.trust_auth_cache().set(('atrust456', 'heat', 'url'), 'auth')
         self.assertIsNone(heat_ks_client.delete_trust(trust_id='atrust123'))
+        self.assertIsNone(context.trust_auth_cache().get(
+            ('atrust123', 'heat', 'url')))
+        self.assertEqual('auth', context.trust_auth_cache().get(
+            ('atrust456', 'heat', 'url')))
+
+    def test_session_shared(self):
+        """Test that clients share a session and its connections."""
+        c1 = heat_keystoneclient.KeystoneClient(utils.dummy_context())
+        c2 = heat_keystoneclient.KeystoneClient(utils.dummy_context())
+        self.assertIs(c1.session, c2.session)
+
+        cfg.CONF.set_override('insecure', True, group='clients_keystone')
+        c3 = heat_keystoneclient.KeystoneClient(utils.dummy_context())
+        self.assertIsNot(c1.session, c3.session)
 
     def test_delete_trust_not_found(self):
 
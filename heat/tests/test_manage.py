@@ -0,0 +1,48 @@
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+
+import tempfile
+
+import mock
+
+from heat.cmd import manage
+from heat.tests import common
+
+
+class PurgeWatchDataTest(common.HeatTestCase):
+
+    def setUp(self):
+        super(PurgeWatchDataTest, self).setUp()
+        self.command = mock.Mock(age=None, granularity='seconds')
+        self.patchobject(manage, 'CONF', command=self.command,
+                         watch_data_retention=86400)
+        # Like a pipe, a plain file has no encoding to print unicode with
+        self.stdout = tempfile.TemporaryFile()
+        self.addCleanup(self.stdout.close)
+        self.patchobject(manage.sys, 'stdout', new=self.stdout)
+        self.purge = self.patchobject(manage.utils, 'purge_watch_data',
+                                      return_value=3)
+
+    def test_purge_watch_data(self):
+        manage.purge_watch_data()
+        self.purge.assert_called_once_with(86400, 'seconds')
+        self.stdout.seek(0)
+        self.assertEqual('Deleted 3 watch data samples.\n',
+                         self.stdout.read())
+
+    def test_purge_watch_data_age(self):
+        self.command.age = '2'
+        self.command.granularity = 'hours'
+        manage.purge_watch_data()
+        self.purge.assert_called_once_with('2', 'hours')
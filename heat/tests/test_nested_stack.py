@@ -452,6 +452,141 @@ Resources:
         self.create_stack(root_template)
         self.m.VerifyAll()
 
+    def test_nested_stack_tree_load(self):
+        resource._register_class('GenericResource',
+                                 generic_rsrc.GenericResource)
+        root_template = '''
+HeatTemplateFormatVersion: 2012-12-12
+Resources:
+    Nested:
+        Type: AWS::CloudFormation::Stack
+        Properties:
+            TemplateURL: 'https://server.test/depth1.template'
+'''
+        depth1_template = '''
+HeatTemplateFormatVersion: 2012-12-12
+Resources:
+    Nested:
+        Type: AWS::CloudFormation::Stack
+        Properties:
+            TemplateURL: 'https://server.test/depth2.template'
+'''
+        depth2_template = '''
+HeatTemplateFormatVersion: 2012-12-12
+Resources:
+    Generic:
+        Type: GenericResource
+'''
+        urlfetch.get(
+            'https://server.test/depth1.template').AndReturn(
+                depth1_template)
+        urlfetch.get(
+            'https://server.test/depth2.template').AndReturn(
+                depth2_template)
+        self.m.StubOutWithMock(parser.Stack, 'validate')
+        parser.Stack.validate().MultipleTimes().AndReturn(None)
+        self.m.ReplayAll()
+        stack = self.create_stack(root_template)
+        self.m.VerifyAll()
+
+        loaded = parser.Stack.load(stack.context, stack_id=stack.id)
+        with mock.patch.object(parser.Stack, 'load') as mock_load:
+            with mock.patch.object(db_api, 'stack_get_all_by_owner_ids',
+                                   wraps=db_api.stack_get_all_by_owner_ids
+                                   ) as mock_owned:
+                self.assertEqual(3, loaded.total_resources())
+                # one query per level of nesting, plus one to find no more
+                # children
+                self.assertEqual(3, mock_owned.call_count)
+                # nothing is kept once the walk is done
+                self.assertIsNone(loaded._db_nested)
+
+                # the nested stacks are already loaded, so are not fetched
+                mock_owned.reset_mock()
+                nested = list(loaded.iter_resources(nested_depth=2))
+                self.assertEqual(0, mock_owned.call_count)
+
+        self.assertFalse(mock_load.called)
+        self.assertEqual(3, len(nested))
+        self.assertEqual('Generic', nested[2].name)
+
+        # a nested stack fetches the levels below it that were not fetched
+        # with it
+        loaded = parser.Stack.load(stack.context, stack_id=stack.id)
+        with mock.patch.object(parser.Stack, 'load') as mock_load:
+            with mock.patch.object(db_api, 'stack_get_all_by_owner_ids',
+                                   wraps=db_api.stack_get_all_by_owner_ids
+                                   ) as mock_owned:
+                self.assertEqual(2, len(list(loaded.iter_resources(
+                    nested_depth=1))))
+                self.assertEqual(1, mock_owned.call_count)
+
+                mock_owned.reset_mock()
+                child = loaded['Nested'].nested()
+                self.assertEqual(2, child.total_resources())
+                self.assertEqual(2, mock_owned.call_count)
+                self.assertIsNone(child._db_nested)
+
+        self.assertFalse(mock_load.called)
+
+    def test_nested_stack_total_tree_resources(self):
+        resource._register_class('GenericResource',
+                                 generic_rsrc.GenericResource)
+        urlfetch.get('https://server.test/the.template'
+                     ).MultipleTimes().AndReturn(
+            '''
+HeatTemplateFormatVersion: '2012-12-12'
+Parameters:
+  KeyName:
+    Type: String
+Resources:
+  NestedResource:
+    Type: GenericResource
+''')
+        self.m.ReplayAll()
+        stack = self.create_stack(self.test_template)
+        self.m.VerifyAll()
+
+        nested = stack['the_nested'].nested()
+        db_nested = db_api.stack_get(stack.context, nested.id)
+        self.assertEqual(stack.id, db_nested.root_stack_id)
+        self.assertEqual(1, db_nested.resource_count)
+        self.assertIsNone(db_api.stack_get(stack.context,
+                                           stack.id).root_stack_id)
+
+        loaded = parser.Stack.load(stack.context, stack_id=stack.id)
+        with mock.patch.object(parser.Stack, 'load') as mock_load:
+            self.assertEqual(2, loaded.total_tree_resources())
+        self.assertFalse(mock_load.called)
+
+        # A nested stack loaded on its own finds its root
+        loaded_nested = parser.Stack.load(stack.context, stack_id=nested.id)
+        self.assertEqual(stack.id, loaded_nested.root_stack_id)
+        self.assertEqual(2, loaded_nested.total_tree_resources())
+
+    def test_nested_stack_root_stack_id_from_owners(self):
+        resource._register_class('GenericResource',
+                                 generic_rsrc.GenericResource)
+        urlfetch.get('https://server.test/the.template'
+                     ).MultipleTimes().AndReturn(
+            '''
+HeatTemplateFormatVersion: '2012-12-12'
+Parameters:
+  KeyName:
+    Type: String
+Resources:
+  NestedResource:
+    Type: GenericResource
+''')
+        self.m.ReplayAll()
+        stack = self.create_stack(self.test_template)
+        self.m.VerifyAll()
+
+        nested_id = stack['the_nested'].resource_id
+        db_api.stack_update(stack.context, nested_id, {'root_stack_id': None})
+        loaded_nested = parser.Stack.load(stack.context, stack_id=nested_id)
+        self.assertEqual(stack.id, loaded_nested.root_stack_id)
+
     def test_nested_stack_four_deep(self):
         root_template = '''
 HeatTemplateFormatVersion: 2012-12-12
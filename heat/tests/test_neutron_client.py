@@ -30,6 +30,40 @@ class NeutronClientPluginTestCase(common.HeatTestCase):
         self.neutron_plugin._client = self.neutron_client
 
 
+class NeutronBatchedShowTests(NeutronClientPluginTestCase):
+
+    def test_batched_show_chunked(self):
+        ids = ['port%03d' % i for i in range(neutron.LIST_ID_CHUNK_SIZE + 5)]
+        self.neutron_client.list_ports.side_effect = lambda id: {
+            'ports': [{'id': i, 'status': 'ACTIVE'} for i in id]}
+        poller = self.neutron_plugin.poll_aggregator('port')
+        for i in ids:
+            poller.register(i)
+
+        for i in ids:
+            self.assertEqual({'id': i, 'status': 'ACTIVE'},
+                             self.neutron_plugin.show_resource('port', i))
+
+        self.assertEqual(2, self.neutron_client.list_ports.call_count)
+        chunks = [c[1]['id']
+                  for c in self.neutron_client.list_ports.call_args_list]
+        self.assertEqual(neutron.LIST_ID_CHUNK_SIZE, len(chunks[0]))
+        self.assertEqual(set(ids), set(chunks[0] + chunks[1]))
+        self.assertFalse(self.neutron_client.show_port.called)
+
+    def test_batched_show_list_failure(self):
+        self.neutron_client.list_networks.side_effect = Exception('boom')
+        self.neutron_client.show_network.side_effect = lambda i: {
+            'network': {'id': i, 'status': 'BUILD'}}
+        poller = self.neutron_plugin.poll_aggregator('network')
+        poller.register('a')
+        poller.register('b')
+
+        self.assertEqual({'id': 'a', 'status': 'BUILD'},
+                         self.neutron_plugin.show_resource('network', 'a'))
+        self.neutron_client.show_network.assert_called_once_with('a')
+
+
 class NeutronClientPluginTests(NeutronClientPluginTestCase):
     def setUp(self):
         super(NeutronClientPluginTests, self).setUp()
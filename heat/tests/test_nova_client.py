@@ -81,6 +81,30 @@ class NovaClientPluginTests(NovaClientPluginTestCase):
                           self.nova_plugin.get_flavor_id, 'noflavor')
         self.m.VerifyAll()
 
+    def test_get_flavor_id_cached(self):
+        my_flavor = mock.Mock(id='1234')
+        my_flavor.name = 'X-Large'
+        self.nova_plugin._client = mock.Mock()
+        self.nova_plugin._client.flavors.list.return_value = [my_flavor]
+
+        for i in range(3):
+            self.assertEqual('1234',
+                             self.nova_plugin.get_flavor_id('X-Large'))
+        other_plugin = utils.dummy_context().clients.client_plugin('nova')
+        other_plugin._client = self.nova_plugin._client
+        self.assertEqual('1234', other_plugin.get_flavor_id('X-Large'))
+        self.assertEqual(1,
+                         self.nova_plugin._client.flavors.list.call_count)
+
+        # A flavor that has gone is looked up afresh
+        self.nova_plugin._client.flavors.list.return_value = []
+        self.assertRaises(exception.FlavorMissing,
+                          self.nova_plugin.get_flavor_id, '1234')
+        self.assertRaises(exception.FlavorMissing,
+                          self.nova_plugin.get_flavor_id, 'X-Large')
+        self.assertEqual(3,
+                         self.nova_plugin._client.flavors.list.call_count)
+
     def test_get_keypair(self):
         """Tests the get_keypair function."""
         my_pub_key = 'a cool public key string'
@@ -175,6 +199,60 @@ class NovaUtilsRefreshServerTests(NovaClientPluginTestCase):
         self.m.VerifyAll()
 
 
+class NovaBatchedRefreshServerTests(common.HeatTestCase):
+
+    def setUp(self):
+        super(NovaBatchedRefreshServerTests, self).setUp()
+        self.nova_plugin = utils.dummy_context().clients.client_plugin('nova')
+        self.nova_client = mock.Mock()
+        self.nova_plugin._client = self.nova_client
+
+    def _server(self, server_id, status):
+        server = mock.Mock(id=server_id, status=status,
+                           _info={'id': server_id, 'status': status})
+        server._add_details.side_effect = (
+            lambda info: setattr(server, 'status', info['status']))
+        return server
+
+    def test_batched_refresh(self):
+        servers = [self._server('1', 'BUILD'), self._server('2', 'BUILD')]
+        self.nova_client.servers.list.return_value = [
+            self._server('1', 'ACTIVE'), self._server('2', 'ERROR'),
+            self._server('3', 'ACTIVE')]
+        poller = self.nova_plugin.poll_aggregator('server')
+        for s in servers:
+            poller.register(s.id)
+
+        for s in servers:
+            self.nova_plugin.refresh_server(s)
+
+        self.nova_client.servers.list.assert_called_once_with(
+            search_opts={'status': 'BUILD'})
+        self.assertEqual(['ACTIVE', 'ERROR'], [s.status for s in servers])
+        for s in servers:
+            self.assertFalse(s.get.called)
+
+    def test_single_server_not_batched(self):
+        server = self._server('1', 'BUILD')
+        self.nova_plugin.poll_aggregator('server').register(server.id)
+
+        self.nova_plugin.refresh_server(server)
+
+        server.get.assert_called_once_with()
+        self.assertFalse(self.nova_client.servers.list.called)
+
+    def test_batched_refresh_missing(self):
+        servers = [self._server('1', 'BUILD'), self._server('2', 'BUILD')]
+        self.nova_client.servers.list.return_value = []
+        poller = self.nova_plugin.poll_aggregator('server')
+        for s in servers:
+            poller.register(s.id)
+
+        self.nova_plugin.refresh_server(servers[0])
+
+        servers[0].get.assert_called_once_with()
+
+
 class NovaUtilsUserdataTests(NovaClientPluginTestCase):
 
     def test_build_userdata(self):
@@ -1081,6 +1081,30 @@ class StackTest(common.HeatTestCase):
         all_resources = list(stack.iter_resources(1))
         self.assertEqual(5, len(all_resources))
 
+    def test_refresh_metadata(self):
+        tpl = {'HeatTemplateFormatVersion': '2012-12-12',
+               'Resources': {
+                   'A': {'Type': 'GenericResourceType'},
+                   'B': {'Type': 'ResourceWithPropsType',
+                         'Properties': {'Foo': {'Ref': 'A'}}},
+                   'C': {'Type': 'GenericResourceType',
+                         'Metadata': {'x': {'Fn::GetAtt': ['B', 'Foo']}}},
+                   'D': {'Type': 'GenericResourceType',
+                         'Metadata': {'y': {'Ref': 'A'}}},
+                   'E': {'Type': 'GenericResourceType',
+                         'Metadata': {'z': 'static'}},
+                   'F': {'Type': 'GenericResourceType',
+                         'Metadata': {'w': {'Ref': 'E'}}}}}
+        stack = parser.Stack(self.ctx, 'test_stack', parser.Template(tpl))
+        for i, res in enumerate(stack.itervalues()):
+            res.id = i + 1
+            res.metadata_update = mock.Mock()
+
+        stack.refresh_metadata(['A'])
+
+        refreshed = set(n for n in stack if stack[n].metadata_update.called)
+        self.assertEqual(set(['C', 'D']), refreshed)
+
     def test_root_stack_no_parent(self):
         tpl = {'HeatTemplateFormatVersion': '2012-12-12',
                'Resources':
@@ -1139,7 +1163,8 @@ class StackTest(common.HeatTestCase):
                               user_creds_id=stack.user_creds_id,
                               tenant_id='test_tenant_id',
                               use_stored_context=False,
-                              username=mox.IgnoreArg())
+                              username=mox.IgnoreArg(),
+                              root_stack_id=None)
 
         self.m.ReplayAll()
         parser.Stack.load(self.ctx, stack_id=self.stack.id,
@@ -3644,6 +3669,60 @@ class StackTest(common.HeatTestCase):
 
         self.m.VerifyAll()
 
+    def test_stack_create_write_failure(self):
+        tmpl = {'HeatTemplateFormatVersion': '2012-12-12',
+                'Resources': {'AResource': {'Type': 'GenericResourceType'}}}
+        stack = parser.Stack(self.ctx, 'create_write_fail',
+                             parser.Template(tmpl))
+        stack.store()
+
+        with mock.patch.object(db_api, 'resource_state_batch_save',
+                               side_effect=exception.Error('DB down')):
+            stack.create()
+
+        self.assertEqual((parser.Stack.CREATE, parser.Stack.FAILED),
+                         stack.state)
+        self.assertEqual('Failed to store resource state: DB down',
+                         stack.status_reason)
+        self.assertIsNone(stack.write_buffer)
+
+    def test_stack_create_write_failure_keeps_resource_failure(self):
+        tmpl = {'HeatTemplateFormatVersion': '2012-12-12',
+                'Resources': {'AResource': {'Type': 'GenericResourceType'}}}
+        stack = parser.Stack(self.ctx, 'create_write_fail',
+                             parser.Template(tmpl))
+        stack.store()
+
+        self.patchobject(generic_rsrc.GenericResource, 'handle_create',
+                         side_effect=Exception('foo'))
+        with mock.patch.object(db_api, 'resource_state_batch_save',
+                               side_effect=exception.Error('DB down')):
+            stack.create()
+
+        self.assertEqual((parser.Stack.CREATE, parser.Stack.FAILED),
+                         stack.state)
+        self.assertEqual('Resource CREATE failed: Exception: foo',
+                         stack.status_reason)
+
+    def test_stack_delete_write_failure(self):
+        tmpl = {'HeatTemplateFormatVersion': '2012-12-12',
+                'Resources': {'AResource': {'Type': 'GenericResourceType'}}}
+        stack = parser.Stack(self.ctx, 'delete_write_fail',
+                             parser.Template(tmpl))
+        stack.store()
+        stack.create()
+        self.assertEqual((parser.Stack.CREATE, parser.Stack.COMPLETE),
+                         stack.state)
+
+        with mock.patch.object(db_api, 'resource_state_batch_save',
+                               side_effect=exception.Error('DB down')):
+            stack.delete()
+
+        self.assertEqual((parser.Stack.DELETE, parser.Stack.FAILED),
+                         stack.state)
+        self.assertEqual('Failed to store resource state: DB down',
+                         stack.status_reason)
+
     def test_stack_delete_resourcefailure(self):
         tmpl = {'HeatTemplateFormatVersion': '2012-12-12',
                 'Resources': {'AResource': {'Type': 'GenericResourceType'}}}
@@ -3974,6 +4053,35 @@ class StackTest(common.HeatTestCase):
                                        use_stored_context=True)
         self.assertEqual(ctx_expected, load_stack.context.to_dict())
 
+    def test_reset_resource_attributes(self):
+        tmpl = {'HeatTemplateFormatVersion': '2012-12-12',
+                'Resources': {
+                    'A': {'Type': 'GenericResourceType'},
+                    'B': {'Type': 'ResourceWithPropsType',
+                          'Properties': {'Foo': {'Ref': 'A'}}},
+                    'C': {'Type': 'ResourceWithPropsType',
+                          'Properties': {'Foo': {'Ref': 'B'}}},
+                    'D': {'Type': 'GenericResourceType'}}}
+        self.stack = parser.Stack(self.ctx, 'reset_attrs_test',
+                                  template.Template(tmpl))
+        names = ('A', 'B', 'C', 'D')
+
+        def reset_names(res=None):
+            for name in names:
+                self.stack[name].attributes._resolved_values['x'] = 'y'
+            self.stack.reset_resource_attributes(res)
+            return set(name for name in names
+                       if not self.stack[name].attributes._resolved_values)
+
+        # Without a dependency graph every resource is reset
+        self.assertEqual(set(names), reset_names(self.stack['D']))
+
+        self.stack.dependencies
+        self.assertEqual(set(['A', 'B', 'C']), reset_names(self.stack['A']))
+        self.assertEqual(set(['B', 'C']), reset_names(self.stack['B']))
+        self.assertEqual(set(['D']), reset_names(self.stack['D']))
+        self.assertEqual(set(names), reset_names())
+
     def test_load_honors_owner(self):
         """
         Loading a stack from the database will set the owner_id of the
@@ -574,6 +574,36 @@ class ProviderTemplateTest(common.HeatTestCase):
         self.assertIsNone(temp_res.validate())
         self.m.VerifyAll()
 
+    def test_template_parsed_once(self):
+        provider = {'HeatTemplateFormatVersion': '2012-12-12',
+                    'Parameters': {'Foo': {'Type': 'String'}},
+                    'Resources': {}}
+        files = {'test_resource.template': json.dumps(provider)}
+        env = environment.Environment()
+        env.load({'resource_registry':
+                  {'DummyResource': 'test_resource.template'}})
+        stack = parser.Stack(utils.dummy_context(), 'test_stack',
+                             parser.Template(empty_template, files=files),
+                             env=env, stack_id=str(uuid.uuid4()))
+        definition = rsrc_defn.ResourceDefinition('test_t_res',
+                                                  'DummyResource',
+                                                  {'Foo': 'bar'})
+
+        template_format.parse_cache().clear()
+        with mock.patch.object(template_format, '_load',
+                               wraps=template_format._load) as mock_load:
+            resources = [template_resource.TemplateResource(name, definition,
+                                                            stack)
+                         for name in ('res1', 'res2')]
+            for res in resources:
+                res.implementation_signature()
+        self.assertEqual(1, mock_load.call_count)
+
+        # Each resource has its own copy of the parsed template
+        nested = [res.child_template() for res in resources]
+        self.assertEqual(nested[0], nested[1])
+        self.assertIsNot(nested[0], nested[1])
+
     def test_user_template_not_retrieved_by_file(self):
         # make sure that a TemplateResource defined in the user environment
         # can NOT be retrieved using the "file:" scheme, validation should fail
@@ -26,6 +26,7 @@ from heat.common import timeutils
 from heat.db import api as db_api
 from heat.engine import attributes
 from heat.engine.cfn import functions as cfn_funcs
+from heat.engine.clients import client_plugin
 from heat.engine import dependencies
 from heat.engine import environment
 from heat.engine import parser
@@ -211,6 +212,90 @@ class ResourceTest(common.HeatTestCase):
         actual = res.prepare_abandon()
         self.assertEqual(expected, actual)
 
+    def _batched_poll_resource(self, check):
+        tmpl = rsrc_defn.ResourceDefinition('test_resource', 'Foo')
+        res = generic_rsrc.GenericResource('test_resource', tmpl, self.stack)
+        aggregator = mock.Mock()
+        plugin = self.patchobject(res, 'client_plugin').return_value
+        plugin.poll_aggregator.return_value = aggregator
+        res.handle_create = lambda: res._batch_polls('server', 'phys_id')
+        res.check_create_complete = check
+        return res, aggregator
+
+    def test_batched_polls_unregistered_on_failure(self):
+        res, aggregator = self._batched_poll_resource(
+            mock.Mock(side_effect=exception.Error('boom')))
+        runner = scheduler.TaskRunner(res.action_handler_task, res.CREATE)
+        self.assertRaises(exception.Error, runner)
+        aggregator.register.assert_called_once_with('phys_id')
+        aggregator.unregister.assert_called_once_with('phys_id')
+
+    def test_batched_polls_unregistered_on_cancel(self):
+        res, aggregator = self._batched_poll_resource(
+            mock.Mock(return_value=False))
+        runner = scheduler.TaskRunner(res.action_handler_task, res.CREATE)
+        runner.start()
+        runner.step()
+        self.assertFalse(aggregator.unregister.called)
+        runner.cancel()
+        aggregator.unregister.assert_called_once_with('phys_id')
+
+    def test_delete_invalidates_lookups(self):
+        tmpl = rsrc_defn.ResourceDefinition('test_resource', 'Foo')
+        res = generic_rsrc.GenericResource('test_resource', tmpl, self.stack)
+        scheduler.TaskRunner(res.create)()
+        res.resource_id_set('phys_id')
+        with mock.patch.object(client_plugin,
+                               'invalidate_lookups') as mock_invalidate:
+            scheduler.TaskRunner(res.delete)()
+        mock_invalidate.assert_called_once_with('phys_id')
+
+    def test_data_loaded_with_resource(self):
+        tmpl = rsrc_defn.ResourceDefinition('test_resource', 'Foo')
+        res = generic_rsrc.GenericResource('test_resource', tmpl, self.stack)
+        res._store()
+        res.data_set('password', 'secret', redact=True)
+        res.data_set('endpoint', 'http://server.test/signal')
+
+        self.stack._db_resources = None
+        with mock.patch('heat.db.sqlalchemy.api._decrypt',
+                        wraps=db_api.IMPL._decrypt) as mock_decrypt:
+            with mock.patch.object(db_api.IMPL, 'resource_data_get_all',
+                                   wraps=db_api.IMPL.resource_data_get_all
+                                   ) as mock_get_all:
+                loaded = generic_rsrc.GenericResource('test_resource', tmpl,
+                                                      self.stack)
+                self.assertEqual(0, mock_decrypt.call_count)
+
+                self.assertEqual('secret', loaded.data().get('password'))
+                self.assertEqual('secret', loaded.data().get('password'))
+                loaded.data_set('token', 'abc', redact=True)
+                loaded.data_delete('endpoint')
+                self.assertEqual({'password': 'secret', 'token': 'abc'},
+                                 loaded.data())
+
+        self.assertEqual(1, mock_decrypt.call_count)
+        self.assertEqual(1, mock_get_all.call_count)
+
+    def test_data_changed_before_loaded(self):
+        tmpl = rsrc_defn.ResourceDefinition('test_resource', 'Foo')
+        res = generic_rsrc.GenericResource('test_resource', tmpl, self.stack)
+        res._store()
+        res.data_set('endpoint', 'http://server.test/signal')
+
+        self.stack._db_resources = None
+        loaded = generic_rsrc.GenericResource('test_resource', tmpl,
+                                              self.stack)
+        loaded.data_set('token', 'abc')
+        self.assertEqual({'endpoint': 'http://server.test/signal',
+                          'token': 'abc'}, loaded.data())
+
+        self.stack._db_resources = None
+        loaded = generic_rsrc.GenericResource('test_resource', tmpl,
+                                              self.stack)
+        loaded.data_delete('endpoint')
+        self.assertEqual({'token': 'abc'}, loaded.data())
+
     def test_state_set_invalid(self):
         tmpl = rsrc_defn.ResourceDefinition('test_resource', 'Foo')
         res = generic_rsrc.GenericResource('test_resource', tmpl, self.stack)
@@ -341,6 +426,65 @@ class ResourceTest(common.HeatTestCase):
         self.assertEqual(res.COMPLETE, db_res.status)
         self.assertEqual('test_update', db_res.status_reason)
 
+    def test_state_set_buffered(self):
+        tmpl = rsrc_defn.ResourceDefinition('test_resource', 'Foo')
+        res = generic_rsrc.GenericResource('test_res_buf', tmpl, self.stack)
+        flush = self.stack._start_buffered_writes()
+
+        def db_state():
+            db_res = db_api.resource_get(res.context, res.id)
+            return db_res.action, db_res.status
+
+        def event_count():
+            return db_api.event_count_all_by_stack(res.context,
+                                                   self.stack.id)
+
+        # The IN_PROGRESS state is written immediately, but not its event
+        res.state_set(res.CREATE, res.IN_PROGRESS)
+        self.assertEqual((res.CREATE, res.IN_PROGRESS), db_state())
+        self.assertEqual(0, event_count())
+
+        res.state_set(res.CREATE, res.COMPLETE)
+        self.assertEqual((res.CREATE, res.IN_PROGRESS), db_state())
+        self.assertEqual(0, event_count())
+
+        flush()
+        self.assertEqual((res.CREATE, res.COMPLETE), db_state())
+        self.assertEqual(2, event_count())
+
+        # Synchronous writes flush the buffer first to preserve ordering
+        res.state_set(res.UPDATE, res.FAILED)
+        res.resource_id_set('phys_id')
+        self.assertEqual((res.UPDATE, res.FAILED), db_state())
+        self.assertEqual(3, event_count())
+
+        res.state_set(res.DELETE, res.COMPLETE)
+        self.stack._end_buffered_writes()
+        self.assertIsNone(self.stack.write_buffer)
+        self.assertEqual((res.DELETE, res.COMPLETE), db_state())
+        self.assertEqual(4, event_count())
+
+    def test_state_set_buffered_flush_failure(self):
+        tmpl = rsrc_defn.ResourceDefinition('test_resource', 'Foo')
+        res = generic_rsrc.GenericResource('test_res_buf', tmpl, self.stack)
+        flush = self.stack._start_buffered_writes()
+        res.state_set(res.CREATE, res.IN_PROGRESS)
+        res.state_set(res.CREATE, res.COMPLETE)
+
+        with mock.patch.object(db_api, 'resource_state_batch_save',
+                               side_effect=exception.Error('DB down')):
+            self.assertIsInstance(flush(), exception.Error)
+        self.assertEqual(3, len(self.stack.write_buffer))
+
+        # The writes are retried by the next flush
+        res.state_set(res.CREATE, res.COMPLETE, 'done')
+        flush()
+        db_res = db_api.resource_get(res.context, res.id)
+        self.assertEqual((res.CREATE, res.COMPLETE, 'done'),
+                         (db_res.action, db_res.status, db_res.status_reason))
+        self.assertEqual(2, db_api.event_count_all_by_stack(res.context,
+                                                            self.stack.id))
+
     def test_parsed_template(self):
         join_func = cfn_funcs.Join(None,
                                    'Fn::Join', [' ', ['bar', 'baz', 'quux']])
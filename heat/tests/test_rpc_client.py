@@ -120,6 +120,7 @@ class EngineRpcAPITestCase(testtools.TestCase):
             'tenant_safe': mock.ANY,
             'show_deleted': mock.ANY,
             'show_nested': mock.ANY,
+            'summary': mock.ANY,
         }
         self._test_engine_api('list_stacks', 'call', **default_args)
 
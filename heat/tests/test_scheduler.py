@@ -12,6 +12,7 @@
 #    under the License.
 
 import contextlib
+import itertools
 
 import eventlet
 
@@ -417,6 +418,22 @@ class DependencyTaskGroupTest(common.HeatTestCase):
         exc = self.assertRaises(type(e1), run_tasks_with_exceptions)
         self.assertEqual(e1, exc)
 
+    def test_exception_grace_period_cancelled_not_waited(self):
+        e1 = Exception('e1')
+        sleep = self.patchobject(scheduler.TaskRunner, '_sleep')
+
+        def run_tasks_with_exceptions():
+            self.error_wait_time = 5
+            tasks = (('A', None), ('C', 'A'))
+            with self._dep_test(*tasks) as dummy:
+                dummy.do_step(1, 'A')
+                dummy.do_step(2, 'A').AndRaise(e1)
+
+        exc = self.assertRaises(type(e1), run_tasks_with_exceptions)
+        self.assertEqual(e1, exc)
+        # The cancelled task 'C' must not cause an additional wait
+        self.assertEqual(2, sleep.call_count)
+
     def test_exception_grace_period_expired(self):
         e1 = Exception('e1')
 
@@ -439,6 +456,34 @@ class DependencyTaskGroupTest(common.HeatTestCase):
         exc = self.assertRaises(type(e1), run_tasks_with_exceptions)
         self.assertEqual(e1, exc)
 
+    def test_step_callback(self):
+        steps = []
+        deps = dependencies.Dependencies([('second', 'first')])
+        tg = scheduler.DependencyTaskGroup(
+            deps, lambda o: steps.append(o),
+            step_callback=lambda: steps.append('callback'))
+
+        scheduler.TaskRunner(tg)(wait_time=None)
+
+        self.assertEqual(['first', 'callback', 'second', 'callback'], steps)
+
+    def test_step_callback_failure(self):
+        steps = []
+        deps = dependencies.Dependencies([('second', 'first')])
+
+        def callback():
+            if steps == ['first', 'second']:
+                raise IOError('DB down')
+
+        tg = scheduler.DependencyTaskGroup(
+            deps, lambda o: steps.append(o), step_callback=callback,
+            aggregate_exceptions=True)
+
+        exc = self.assertRaises(scheduler.ExceptionGroup,
+                                scheduler.TaskRunner(tg), wait_time=None)
+        self.assertIsInstance(exc.exceptions[0], IOError)
+        self.assertEqual(['first', 'second'], steps)
+
 
 class TaskTest(common.HeatTestCase):
 
@@ -479,6 +524,23 @@ class TaskTest(common.HeatTestCase):
 
         scheduler.TaskRunner(task)(wait_time=42)
 
+    def test_run_wait_strategy(self):
+        task = DummyTask()
+        self.m.StubOutWithMock(task, 'do_step')
+        self.m.StubOutWithMock(scheduler.TaskRunner, '_sleep')
+
+        task.do_step(1).AndReturn(None)
+        scheduler.TaskRunner._sleep(1).AndReturn(None)
+        task.do_step(2).AndReturn(None)
+        scheduler.TaskRunner._sleep(2).AndReturn(None)
+        task.do_step(3).AndReturn(None)
+        scheduler.TaskRunner._sleep(3).AndReturn(None)
+
+        self.m.ReplayAll()
+
+        backoff = scheduler.ExponentialBackoff(maximum=3, jitter=0)
+        scheduler.TaskRunner(task)(wait_time=backoff)
+
     def test_start_run(self):
         task = DummyTask()
         self.m.StubOutWithMock(task, 'do_step')
@@ -892,6 +954,82 @@ class TaskTest(common.HeatTestCase):
         self.assertTrue(runner.done())
 
 
+class ExponentialBackoffTest(common.HeatTestCase):
+
+    def test_backoff(self):
+        backoff = scheduler.ExponentialBackoff(initial=0.5, factor=3,
+                                               maximum=10, jitter=0)
+        waits = iter(backoff)
+        self.assertEqual([0.5, 1.5, 4.5, 10, 10],
+                         [next(waits) for i in range(5)])
+
+    def test_jitter(self):
+        backoff = scheduler.ExponentialBackoff(initial=10, factor=1,
+                                               jitter=0.2)
+        for wait in itertools.islice(backoff, 100):
+            self.assertTrue(8 <= wait <= 12)
+
+    def test_wait_times(self):
+        self.assertEqual([5, 5],
+                         list(itertools.islice(scheduler.wait_times(5), 2)))
+        self.assertEqual([None, None],
+                         list(itertools.islice(scheduler.wait_times(None),
+                                               2)))
+        self.assertEqual([1, 2],
+                         list(scheduler.wait_times([1, 2])))
+
+
+class DependencyTaskGroupWaitTest(common.HeatTestCase):
+
+    def setUp(self):
+        super(DependencyTaskGroupWaitTest, self).setUp()
+        scheduler.ENABLE_SLEEP = True
+        self.now = 0
+        self.patchobject(scheduler, 'wallclock', side_effect=lambda: self.now)
+        self.steps = []
+
+    def _task(self, key):
+        for i in range(1, 4):
+            self.steps.append((key, i))
+            yield
+
+    def _run_group(self):
+        backoff = scheduler.ExponentialBackoff(initial=2, maximum=4,
+                                               jitter=0)
+        deps = dependencies.Dependencies([('A', None), ('B', None)])
+        group = scheduler.DependencyTaskGroup(
+            deps, self._task,
+            wait_strategy=lambda k: backoff if k == 'A' else None)
+        runner = scheduler.TaskRunner(group)
+        runner.start()
+        return group, runner
+
+    def _step_at(self, runner, now):
+        self.now = now
+        del self.steps[:]
+        runner.step()
+        return sorted(self.steps)
+
+    def test_wait_strategy(self):
+        group, runner = self._run_group()
+        self.assertEqual([('A', 1), ('B', 1)], sorted(self.steps))
+
+        self.assertEqual([('B', 2)], self._step_at(runner, 1))
+        self.assertEqual([('A', 2), ('B', 3)], self._step_at(runner, 2))
+        self.assertEqual([], self._step_at(runner, 5))
+        self.assertEqual([('A', 3)], self._step_at(runner, 6))
+        self.assertFalse(runner.done())
+        self.assertEqual([], self._step_at(runner, 9))
+        self.assertEqual([], self._step_at(runner, 10))
+        self.assertTrue(runner.done())
+
+    def test_wait_strategy_sleep_disabled(self):
+        scheduler.ENABLE_SLEEP = False
+        group, runner = self._run_group()
+
+        self.assertEqual([('A', 2), ('B', 2)], self._step_at(runner, 1))
+
+
 class TimeoutTest(common.HeatTestCase):
     def test_compare(self):
         task = scheduler.TaskRunner(DummyTask())
@@ -17,13 +17,16 @@ import uuid
 
 import mock
 import mox
+from oslo.config import cfg
 from oslo.utils import timeutils
 import six
+import sqlalchemy
 
 from heat.common import context
 from heat.common import exception
 from heat.common import template_format
 from heat.db.sqlalchemy import api as db_api
+from heat.db.sqlalchemy import models
 from heat.engine.clients.os import glance
 from heat.engine.clients.os import nova
 from heat.engine import environment
@@ -470,6 +473,21 @@ class SqlAlchemyTest(common.HeatTestCase):
         self.assertEqual(1, len(results))
         self.assertEqual('foo', results[0]['name'])
 
+    def test_stack_get_all_summaries(self):
+        self._setup_test_stack('foo', UUID1)
+        self._setup_test_stack('bar', UUID2)
+
+        results = list(db_api.stack_get_all_summaries(
+            self.ctx, sort_keys=['stack_name'], sort_dir='asc'))
+        self.assertEqual(['bar', 'foo'], [r.name for r in results])
+        self.assertEqual(UUID2, results[0].id)
+        self.assertEqual(self.ctx.tenant_id, results[0].tenant)
+        self.assertIn('Resources', results[0].template)
+
+        results = list(db_api.stack_get_all_summaries(
+            self.ctx, filters={'name': 'foo'}))
+        self.assertEqual([UUID1], [r.id for r in results])
+
     def test_stack_get_all_filter_matches_in_list(self):
         self._setup_test_stack('foo', UUID1)
         self._setup_test_stack('bar', UUID2)
@@ -1119,7 +1137,8 @@ def create_stack(ctx, template, user_creds, **kwargs):
         'user_creds_id': user_creds.id,
         'owner_id': None,
         'timeout': '60',
-        'disable_rollback': 0
+        'disable_rollback': 0,
+        'backup': False
     }
     values.update(kwargs)
     return db_api.stack_create(ctx, values)
@@ -1245,6 +1264,18 @@ class DBAPIRawTemplateTest(common.HeatTestCase):
         self.assertEqual(new_t, updated_tp.template)
         self.assertEqual(new_files, updated_tp.files)
 
+    def test_raw_template_content_hash(self):
+        tp = create_raw_template(self.ctx)
+        content_hash = tp.content_hash
+        self.assertEqual(64, len(content_hash))
+        self.assertEqual(content_hash,
+                         create_raw_template(self.ctx).content_hash)
+
+        db_api.raw_template_update(self.ctx, tp.id, {'files': {}})
+        self.assertNotEqual(content_hash,
+                            db_api.raw_template_get(self.ctx,
+                                                    tp.id).content_hash)
+
 
 class DBAPIUserCredsTest(common.HeatTestCase):
     def setUp(self):
@@ -1368,6 +1399,20 @@ class DBAPIStackTest(common.HeatTestCase):
         self.assertEqual(stack.id, ret_stack.id)
         self.assertEqual('db_test_stack_name', ret_stack.name)
 
+    def test_stack_get_eager_load_defers_template(self):
+        stack = create_stack(self.ctx, self.template, self.user_creds)
+        self.ctx.session.expunge_all()
+
+        ret_stack = db_api.stack_get(self.ctx, stack.id, eager_load=True)
+        state = sqlalchemy.inspect(ret_stack.raw_template)
+        self.assertNotIn('content_hash', state.unloaded)
+        self.assertIn('template', state.unloaded)
+        self.assertIn('files', state.unloaded)
+        self.assertEqual(self.template.content_hash,
+                         ret_stack.raw_template.content_hash)
+        self.assertEqual(self.template.template,
+                         ret_stack.raw_template.template)
+
     def test_stack_get_returns_none_if_stack_does_not_exist(self):
         stack = db_api.stack_get(self.ctx, UUID1, show_deleted=False)
         self.assertIsNone(stack)
@@ -1441,6 +1486,50 @@ class DBAPIStackTest(common.HeatTestCase):
                                                            parent_stack2.id)
         self.assertEqual(2, len(stack2_children))
 
+    def test_stack_count_total_resources(self):
+        root = create_stack(self.ctx, self.template, self.user_creds,
+                            resource_count=1)
+        values = [
+            {'owner_id': root.id, 'resource_count': 2},
+            {'owner_id': root.id, 'resource_count': 4},
+            {'owner_id': root.id, 'resource_count': 8, 'backup': True},
+            {'owner_id': root.id, 'resource_count': 16},
+        ]
+        nested = [create_stack(self.ctx, self.template, self.user_creds,
+                               root_stack_id=root.id, **val)
+                  for val in values]
+        db_api.stack_delete(self.ctx, nested[3].id)
+        other = create_stack(self.ctx, self.template, self.user_creds,
+                             resource_count=32)
+
+        self.assertEqual(7, db_api.stack_count_total_resources(self.ctx,
+                                                               root.id))
+        self.assertEqual(32, db_api.stack_count_total_resources(self.ctx,
+                                                                other.id))
+        self.assertEqual(0, db_api.stack_count_total_resources(self.ctx,
+                                                               UUID1))
+
+    def test_stack_get_all_by_owner_ids(self):
+        parent_stack1 = create_stack(self.ctx, self.template, self.user_creds)
+        parent_stack2 = create_stack(self.ctx, self.template, self.user_creds)
+        parent_stack3 = create_stack(self.ctx, self.template, self.user_creds)
+        values = [
+            {'owner_id': parent_stack1.id},
+            {'owner_id': parent_stack2.id},
+            {'owner_id': parent_stack2.id},
+            {'owner_id': parent_stack3.id},
+            {'owner_id': parent_stack1.id, 'backup': True},
+        ]
+        children = [create_stack(self.ctx, self.template, self.user_creds,
+                                 **val) for val in values]
+        db_api.stack_delete(self.ctx, children[2].id)
+
+        ret_stacks = db_api.stack_get_all_by_owner_ids(
+            self.ctx, [parent_stack1.id, parent_stack2.id])
+        self.assertEqual(set([children[0].id, children[1].id]),
+                         set(s.id for s in ret_stacks))
+        self.assertEqual([], db_api.stack_get_all_by_owner_ids(self.ctx, []))
+
     def test_stack_get_all_with_regular_tenant(self):
         values = [
             {'tenant': UUID1},
@@ -1533,6 +1622,72 @@ class DBAPIStackTest(common.HeatTestCase):
         self._deleted_stack_existance(utils.dummy_context(), stacks,
                                       (), (0, 1, 2, 3, 4))
 
+    def test_purge_deleted_dependents(self):
+        deleted = datetime.datetime.now() - datetime.timedelta(days=2)
+        project_id = str(uuid.uuid4())
+        live_stack = create_stack(self.ctx, self.template, self.user_creds,
+                                  stack_user_project_id=project_id)
+        stacks = [create_stack(self.ctx, create_raw_template(self.ctx),
+                               self.user_creds, deleted_at=deleted,
+                               stack_user_project_id=project_id),
+                  create_stack(self.ctx, create_raw_template(self.ctx),
+                               create_user_creds(self.ctx), deleted_at=deleted,
+                               stack_user_project_id=str(uuid.uuid4()))]
+        for stack in stacks:
+            res = create_resource(self.ctx, stack)
+            res.context = self.ctx
+            create_resource_data(self.ctx, res)
+            create_event(self.ctx, stack_id=stack.id)
+            wr = create_watch_rule(self.ctx, stack, name=stack.id)
+            create_watch_data(self.ctx, wr)
+            db_api.snapshot_create(self.ctx, {'tenant': self.ctx.tenant_id,
+                                              'stack_id': stack.id})
+            config = db_api.software_config_create(
+                self.ctx, {'name': 'config', 'tenant': self.ctx.tenant_id})
+            db_api.software_deployment_create(
+                self.ctx, {'tenant': self.ctx.tenant_id,
+                           'stack_user_project_id':
+                           stack.stack_user_project_id,
+                           'config_id': config.id,
+                           'server_id': str(uuid.uuid4())})
+
+        totals = db_api.purge_deleted(age=1, granularity='days')
+
+        self.assertEqual(2, totals['stack'])
+        self.assertEqual(2, totals['resource'])
+        self.assertEqual(2, totals['resource_data'])
+        self.assertEqual(2, totals['event'])
+        self.assertEqual(2, totals['watch_rule'])
+        self.assertEqual(2, totals['watch_data'])
+        self.assertEqual(2, totals['snapshot'])
+        self.assertEqual(2, totals['raw_template'])
+        # Those still used by the live stack are kept
+        self.assertEqual(1, totals['user_creds'])
+        self.assertEqual(1, totals['software_deployment'])
+        self.assertIsNotNone(db_api.stack_get(self.ctx, live_stack.id))
+        self.assertIsNotNone(db_api.user_creds_get(self.user_creds.id))
+        self.assertEqual(1, len(db_api.software_deployment_get_all(
+            self.ctx)))
+
+    def test_purge_deleted_batches(self):
+        deleted = datetime.datetime.now() - datetime.timedelta(days=2)
+        stacks = [create_stack(self.ctx, create_raw_template(self.ctx),
+                               self.user_creds, deleted_at=deleted)
+                  for i in range(5)]
+        progress = mock.Mock()
+        progress.side_effect = lambda totals: progress_totals.append(
+            totals['stack'])
+        progress_totals = []
+
+        db_api.purge_deleted(age=1, granularity='days', batch_size=2,
+                             progress=progress)
+        self.assertEqual([2, 4, 5], progress_totals)
+        self._deleted_stack_existance(utils.dummy_context(), stacks,
+                                      (), (0, 1, 2, 3, 4))
+
+        self.assertRaises(exception.Error, db_api.purge_deleted,
+                          age=1, batch_size=0)
+
     def _deleted_stack_existance(self, ctx, stacks, existing, deleted):
         for s in existing:
             self.assertIsNotNone(db_api.stack_get(ctx, stacks[s].id,
@@ -1632,12 +1787,83 @@ class DBAPIResourceTest(common.HeatTestCase):
         self.assertRaises(exception.NotFound, db_api.resource_get_all_by_stack,
                           self.ctx, self.stack2.id)
 
+    def test_resource_get_all_by_stacks(self):
+        self.stack1 = create_stack(self.ctx, self.template, self.user_creds)
+        self.stack2 = create_stack(self.ctx, self.template, self.user_creds)
+        values = [
+            {'name': 'res1', 'stack_id': self.stack.id},
+            {'name': 'res2', 'stack_id': self.stack.id},
+            {'name': 'res3', 'stack_id': self.stack1.id},
+        ]
+        [create_resource(self.ctx, self.stack, **val) for val in values]
+
+        resources = db_api.resource_get_all_by_stacks(
+            self.ctx, [self.stack.id, self.stack1.id, self.stack2.id])
+        self.assertEqual(['res1', 'res2'],
+                         sorted(resources[self.stack.id].keys()))
+        self.assertEqual('res3', resources[self.stack1.id]['res3'].name)
+        self.assertEqual({}, resources[self.stack2.id])
+
     def test_resource_status_reason_truncate(self):
         res = create_resource(self.ctx, self.stack,
                               status_reason='a' * 1024)
         ret_res = db_api.resource_get(self.ctx, res.id)
         self.assertEqual('a' * 255, ret_res.status_reason)
 
+    def test_resource_update(self):
+        res = create_resource(self.ctx, self.stack)
+        db_api.resource_update(self.ctx, res.id,
+                               {'status': 'failed',
+                                'status_reason': 'a' * 1024})
+        ret_res = db_api.resource_get(self.ctx, res.id)
+        self.assertEqual('failed', ret_res.status)
+        self.assertEqual('a' * 255, ret_res.status_reason)
+        self.assertEqual('create', ret_res.action)
+
+    def test_resource_state_batch_save(self):
+        res1 = create_resource(self.ctx, self.stack, name='res1')
+        res2 = create_resource(self.ctx, self.stack, name='res2')
+        res3 = create_resource(self.ctx, self.stack, name='res3')
+        event = {'stack_id': self.stack.id,
+                 'resource_action': 'create',
+                 'resource_status': 'failed',
+                 'resource_name': 'res2',
+                 'resource_status_reason': 'a' * 1024}
+
+        db_api.resource_state_batch_save(
+            self.ctx,
+            {res1.id: {'status': 'failed', 'status_reason': 'b' * 1024},
+             res2.id: {'status': 'failed', 'status_reason': 'oops'},
+             res3.id: {'nova_instance': UUID2}},
+            [event, dict(event, resource_name='res1')])
+
+        self.assertEqual('failed', db_api.resource_get(self.ctx,
+                                                       res1.id).status)
+        self.assertEqual('b' * 255, db_api.resource_get(
+            self.ctx, res1.id).status_reason)
+        self.assertEqual('oops', db_api.resource_get(self.ctx,
+                                                     res2.id).status_reason)
+        ret_res3 = db_api.resource_get(self.ctx, res3.id)
+        self.assertEqual('complete', ret_res3.status)
+        self.assertEqual(UUID2, ret_res3.nova_instance)
+
+        events = db_api.event_get_all_by_stack(self.ctx, self.stack.id)
+        self.assertEqual(['res1', 'res2'],
+                         sorted(e.resource_name for e in events))
+        self.assertEqual('a' * 255, events[0].resource_status_reason)
+        self.assertIsNotNone(events[0].uuid)
+
+    def test_resource_state_batch_save_counts_events(self):
+        create_event(self.ctx, stack_id=self.stack.id)
+        events = [{'stack_id': self.stack.id,
+                   'resource_name': 'new%d' % i} for i in range(3)]
+
+        db_api.resource_state_batch_save(self.ctx, {}, events)
+
+        stack = db_api.stack_get(self.ctx, self.stack.id)
+        stack.refresh()
+        self.assertEqual(4, stack.event_count)
+
 
 class DBAPIStackLockTest(common.HeatTestCase):
     def setUp(self):
@@ -1698,6 +1924,65 @@ class DBAPIStackLockTest(common.HeatTestCase):
         observed = db_api.stack_lock_release(self.stack.id, UUID2)
         self.assertTrue(observed)
 
+    def _heartbeat(self, engine_id, hostname, age=0):
+        db_api.engine_heartbeat(engine_id, hostname)
+        if age:
+            session = db_api.get_session()
+            engine = session.query(models.Engine).get(engine_id)
+            engine.update_and_save({
+                'heartbeat_at': (engine.heartbeat_at -
+                                 datetime.timedelta(seconds=age))},
+                session=session)
+
+    def test_engine_heartbeat(self):
+        self._heartbeat(UUID1, 'host1', age=30)
+        engine = db_api.engine_get(UUID1)
+        self.assertEqual('host1', engine.hostname)
+        then = engine.heartbeat_at
+        self.assertTrue(db_api.engine_get_heartbeat_age(UUID1) >= 30)
+
+        db_api.engine_heartbeat(UUID1, 'host1')
+        self.assertTrue(db_api.engine_get(UUID1).heartbeat_at > then)
+        self.assertTrue(db_api.engine_get_heartbeat_age(UUID1) < 30)
+
+        db_api.engine_delete(UUID1)
+        self.assertIsNone(db_api.engine_get(UUID1))
+        self.assertIsNone(db_api.engine_get_heartbeat_age(UUID1))
+
+    def test_engine_heartbeat_db_time(self):
+        # The time is taken from the database server, not the local clock
+        then = timeutils.utcnow() - datetime.timedelta(days=1)
+        with mock.patch.object(timeutils, 'utcnow', return_value=then):
+            db_api.engine_heartbeat(UUID1, 'host1')
+            self.assertTrue(db_api.engine_get_heartbeat_age(UUID1) < 30)
+            self.assertEqual(['host1'], db_api.engine_get_all_hosts(60))
+            self.assertEqual(0, db_api.engine_purge(60))
+
+    def test_engine_purge(self):
+        self._heartbeat(UUID1, 'host1', age=300)
+        self._heartbeat(UUID2, 'host2', age=300)
+        self._heartbeat(UUID3, 'host3')
+        db_api.stack_lock_create(self.stack.id, UUID2)
+
+        # Dead engines that still hold locks are kept
+        self.assertEqual(1, db_api.engine_purge(60))
+        self.assertIsNone(db_api.engine_get(UUID1))
+        self.assertIsNotNone(db_api.engine_get(UUID2))
+        self.assertIsNotNone(db_api.engine_get(UUID3))
+
+    def test_engine_get_all_hosts(self):
+        self._heartbeat(UUID1, 'host1', age=300)
+        self._heartbeat(UUID2, 'host3')
+        self._heartbeat(UUID3, 'host2')
+        self._heartbeat(str(uuid.uuid4()), 'host2')
+
+        self.assertEqual(['host2', 'host3'], db_api.engine_get_all_hosts(60))
+
+    def test_stack_lock_get_engine_id(self):
+        self.assertIsNone(db_api.stack_lock_get_engine_id(self.stack.id))
+        db_api.stack_lock_create(self.stack.id, UUID1)
+        self.assertEqual(UUID1,
+                         db_api.stack_lock_get_engine_id(self.stack.id))
 
 class DBAPIResourceDataTest(common.HeatTestCase):
     def setUp(self):
@@ -1847,6 +2132,43 @@ class DBAPIEventTest(common.HeatTestCase):
         events = db_api.event_get_all_by_stack(self.ctx, self.stack2.id)
         self.assertEqual(1, len(events))
 
+    def test_event_get_all_by_stack_stack_columns(self):
+        stack = create_stack(self.ctx, self.template, self.user_creds,
+                             name='events_stack', tenant='tenant1')
+        create_event(self.ctx, stack_id=stack.id, resource_name='res1')
+
+        events = db_api.event_get_all_by_stack(self.ctx, stack.id)
+        self.assertEqual(1, len(events))
+        self.assertEqual('events_stack', events[0].stack_name)
+        self.assertEqual('tenant1', events[0].stack_tenant)
+        self.assertEqual(stack.id, events[0].stack_id)
+        self.assertEqual('res1', events[0].resource_name)
+        self.assertEqual('create_complete', events[0].resource_status_reason)
+        self.assertEqual({'name': 'foo'}, events[0].resource_properties)
+
+    def test_event_get_all_by_stack_paginate(self):
+        stack = create_stack(self.ctx, self.template, self.user_creds)
+        [create_event(self.ctx, stack_id=stack.id, resource_name=str(i))
+         for i in range(5)]
+
+        def all_pages(**kwargs):
+            names = []
+            marker = None
+            while True:
+                events = db_api.event_get_all_by_stack(self.ctx, stack.id,
+                                                       limit=2, marker=marker,
+                                                       **kwargs)
+                if not events:
+                    return names
+                names.extend(e.resource_name for e in events)
+                marker = events[-1].uuid
+
+        self.assertEqual(['4', '3', '2', '1', '0'], all_pages())
+        self.assertEqual(['0', '1', '2', '3', '4'],
+                         all_pages(sort_keys=['event_time'], sort_dir='asc'))
+        self.assertEqual([], db_api.event_get_all_by_stack(
+            self.ctx, stack.id, marker='not-an-event'))
+
     def test_event_count_all_by_stack(self):
         self.stack1 = create_stack(self.ctx, self.template, self.user_creds)
         self.stack2 = create_stack(self.ctx, self.template, self.user_creds)
@@ -1868,6 +2190,68 @@ class DBAPIEventTest(common.HeatTestCase):
         ret_event = db_api.event_get(self.ctx, event.id)
         self.assertEqual('a' * 255, ret_event.resource_status_reason)
 
+    def _event_count(self, stack_id):
+        stack = db_api.stack_get(self.ctx, stack_id)
+        stack.refresh()
+        return stack.event_count
+
+    def test_event_create_counts_events(self):
+        stack = create_stack(self.ctx, self.template, self.user_creds)
+        self.assertEqual(0, self._event_count(stack.id))
+        create_event(self.ctx, stack_id=stack.id)
+        create_event(self.ctx, stack_id=stack.id)
+        self.assertEqual(2, self._event_count(stack.id))
+
+    def test_event_prune(self):
+        cfg.CONF.set_override('max_events_per_stack', 3)
+        cfg.CONF.set_override('event_purge_batch_size', 2)
+        stack1 = create_stack(self.ctx, self.template, self.user_creds)
+        stack2 = create_stack(self.ctx, self.template, self.user_creds)
+        stack3 = create_stack(self.ctx, self.template, self.user_creds)
+        for i in range(6):
+            create_event(self.ctx, stack_id=stack1.id, resource_name='%d' % i)
+        for i in range(4):
+            create_event(self.ctx, stack_id=stack2.id, resource_name='%d' % i)
+        for i in range(3):
+            create_event(self.ctx, stack_id=stack3.id, resource_name='%d' % i)
+
+        self.assertEqual(5, db_api.event_prune(self.ctx))
+
+        def remaining(stack_id):
+            return sorted(e.resource_name for e in
+                          db_api.event_get_all_by_stack(self.ctx, stack_id))
+
+        # The excess is pruned, but never less than the batch size
+        self.assertEqual(['3', '4', '5'], remaining(stack1.id))
+        self.assertEqual(['2', '3'], remaining(stack2.id))
+        self.assertEqual(['0', '1', '2'], remaining(stack3.id))
+        self.assertEqual(3, self._event_count(stack1.id))
+        self.assertEqual(2, self._event_count(stack2.id))
+        self.assertEqual(3, self._event_count(stack3.id))
+
+        self.assertEqual(0, db_api.event_prune(self.ctx))
+
+    def test_event_prune_recounts(self):
+        cfg.CONF.set_override('max_events_per_stack', 3)
+        cfg.CONF.set_override('event_purge_batch_size', 1)
+        stack = create_stack(self.ctx, self.template, self.user_creds)
+        for i in range(4):
+            create_event(self.ctx, stack_id=stack.id, resource_name='%d' % i)
+        # A stale count, e.g. read before another engine pruned the stack
+        db_api.stack_update(self.ctx, stack.id, {'event_count': 10})
+
+        self.assertEqual(1, db_api.event_prune(self.ctx))
+        self.assertEqual(3, len(db_api.event_get_all_by_stack(self.ctx,
+                                                              stack.id)))
+        self.assertEqual(3, self._event_count(stack.id))
+        self.assertEqual(0, db_api.event_prune(self.ctx))
+
+    def test_event_prune_unlimited(self):
+        cfg.CONF.set_override('max_events_per_stack', 0)
+        stack = create_stack(self.ctx, self.template, self.user_creds)
+        create_event(self.ctx, stack_id=stack.id)
+        self.assertEqual(0, db_api.event_prune(self.ctx))
+
 
 class DBAPIWatchRuleTest(common.HeatTestCase):
     def setUp(self):
@@ -1978,3 +2362,70 @@ class DBAPIWatchDataTest(common.HeatTestCase):
 
         data = [wd.data for wd in watch_data]
         [self.assertIn(val['data'], data) for val in values]
+
+    def test_watch_data_purge(self):
+        other_rule = create_watch_rule(self.ctx, self.stack, name='other',
+                                       rule={'Period': '600'})
+        now = timeutils.utcnow()
+        for age in (900, 500, 100):
+            for wr in (self.watch_rule, other_rule):
+                create_watch_data(
+                    self.ctx, wr, data={'foo': age},
+                    created_at=now - datetime.timedelta(seconds=age))
+
+        # Samples within the rule Period are always kept
+        self.assertEqual(3, db_api.watch_data_purge(self.ctx, min_age=200))
+        self.assertEqual(
+            [{'foo': 100}],
+            [wd.data for wd in db_api.watch_data_get_all_by_watch_rule(
+                self.ctx, self.watch_rule.id)])
+        self.assertEqual(
+            [{'foo': 500}, {'foo': 100}],
+            [wd.data for wd in db_api.watch_data_get_all_by_watch_rule(
+                self.ctx, other_rule.id)])
+
+        self.assertEqual(0, db_api.purge_watch_data(1, 'hours'))
+        self.assertEqual(1, db_api.purge_watch_data(0))
+        self.assertEqual(2, len(db_api.watch_data_get_all(self.ctx)))
+
+    def test_watch_data_purge_single_delete(self):
+        now = timeutils.utcnow()
+        for i in range(3):
+            wr = create_watch_rule(self.ctx, self.stack, name='rule%d' % i,
+                                   rule={'Period': '60'})
+            create_watch_data(self.ctx, wr,
+                              created_at=now - datetime.timedelta(hours=1))
+
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            if statement.startswith('DELETE'):
+                statements.append(statement)
+
+        engine = db_api.get_engine()
+        sqlalchemy.event.listen(engine, 'before_cursor_execute', record)
+        self.addCleanup(sqlalchemy.event.remove, engine,
+                        'before_cursor_execute', record)
+        self.assertEqual(3, db_api.watch_data_purge(self.ctx, 600))
+        self.assertEqual(1, len(statements))
+
+    def test_watch_data_get_all_by_watch_rule(self):
+        other_rule = create_watch_rule(self.ctx, self.stack, name='other')
+        now = timeutils.utcnow()
+        for age in (600, 200, 100):
+            create_watch_data(
+                self.ctx, self.watch_rule,
+                data={'foo': age},
+                created_at=now - datetime.timedelta(seconds=age))
+        create_watch_data(self.ctx, other_rule, created_at=now)
+
+        watch_data = db_api.watch_data_get_all_by_watch_rule(
+            self.ctx, self.watch_rule.id)
+        self.assertEqual([{'foo': 600}, {'foo': 200}, {'foo': 100}],
+                         [wd.data for wd in watch_data])
+
+        watch_data = db_api.watch_data_get_all_by_watch_rule(
+            self.ctx, self.watch_rule.id,
+            since=now - datetime.timedelta(seconds=300))
+        self.assertEqual([{'foo': 200}, {'foo': 100}],
+                         [wd.data for wd in watch_data])
@@ -197,6 +197,22 @@ class StackLockTest(common.HeatTestCase):
         self.assertRaises(self.TestThreadLockException, check_thread_lock)
         assert not db_api.stack_lock_release.called
 
+    def test_engine_alive_heartbeat(self):
+        db_api.engine_heartbeat(self.engine_id, 'host')
+        mget_client = self.patchobject(stack_lock.rpc_messaging,
+                                       'get_rpc_client')
+        self.assertTrue(stack_lock.StackLock.engine_alive(self.context,
+                                                          self.engine_id))
+        self.assertFalse(mget_client.called)
+
+    def test_engine_alive_heartbeat_expired(self):
+        self.patchobject(db_api, 'engine_get_heartbeat_age', return_value=61)
+        mget_client = self.patchobject(stack_lock.rpc_messaging,
+                                       'get_rpc_client')
+        self.assertFalse(stack_lock.StackLock.engine_alive(self.context,
+                                                           self.engine_id))
+        self.assertFalse(mget_client.called)
+
     def test_engine_alive_ok(self):
         slock = stack_lock.StackLock(self.context, self.stack, self.engine_id)
         mget_client = self.patchobject(stack_lock.rpc_messaging,
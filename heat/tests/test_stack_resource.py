@@ -202,7 +202,7 @@ class StackResourceTest(common.HeatTestCase):
             return_value=self.simple_template)
         sig1, sig2 = self.parent_resource.implementation_signature()
         self.assertEqual('3700dc2ae6ff4f0a236e7477ad6b8d51157f2153', sig1)
-        self.assertEqual('70e69545e0c47123159974c9166741085eb46dba', sig2)
+        self.assertEqual('3ed4604aec3175544a4e2cde1801fc79312647ce', sig2)
         self.parent_stack.t.files["foo"] = "bar"
         sig1a, sig2a = self.parent_resource.implementation_signature()
         self.assertEqual(sig1, sig1a)
@@ -413,7 +413,7 @@ class StackResourceTest(common.HeatTestCase):
                 'Resources': [1]}
         template = stack_resource.template.Template(tmpl)
         root_resources = mock.Mock(return_value=2)
-        self.parent_resource.stack.root_stack.total_resources = root_resources
+        self.parent_resource.stack.total_tree_resources = root_resources
 
         self.assertRaises(exception.RequestLimitExceeded,
                           self.parent_resource._validate_nested_resources,
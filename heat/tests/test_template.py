@@ -14,13 +14,17 @@
 import fixtures
 from oslotest import mockpatch
 import six
+import sqlalchemy
 from stevedore import extension
 
 from heat.common import exception
 from heat.common import template_format
+from heat.db import api as db_api
 from heat.engine import function
+from heat.engine import rsrc_defn
 from heat.engine import template
 from heat.tests import common
+from heat.tests import utils
 
 
 class TemplatePluginFixture(fixtures.Fixture):
@@ -240,3 +244,77 @@ Outputs:
         err = self.assertRaises(exception.InvalidTemplateSection,
                                 tmpl.validate)
         self.assertIn('parameteers', six.text_type(err))
+
+
+class TestTemplateCache(common.HeatTestCase):
+
+    def setUp(self):
+        super(TestTemplateCache, self).setUp()
+        self.ctx = utils.dummy_context()
+        self.t = {
+            'HeatTemplateFormatVersion': '2012-12-12',
+            'Resources': {'foo': {'Type': 'GenericResourceType'}},
+        }
+        self.tmpl_id = template.Template(self.t).store(self.ctx)
+        self.cache = template.template_cache()
+        self.cache.clear()
+
+    def test_load_cached(self):
+        t1 = template.Template.load(self.ctx, self.tmpl_id)
+        t2 = template.Template.load(self.ctx, self.tmpl_id)
+        self.assertEqual(1, self.cache.hits)
+        self.assertEqual(1, self.cache.misses)
+        self.assertEqual(self.t, t1.t)
+        self.assertEqual(self.t, t2.t)
+        self.assertEqual(self.tmpl_id, t2.id)
+
+    def test_load_cached_not_fetched(self):
+        template.Template.load(self.ctx, self.tmpl_id)
+        self.ctx.session.expunge_all()
+        stack_id = db_api.stack_create(self.ctx, {
+            'name': 'test_stack', 'raw_template_id': self.tmpl_id,
+            'username': self.ctx.username, 'tenant': self.ctx.tenant_id,
+            'parameters': {}, 'disable_rollback': True}).id
+        self.ctx.session.expunge_all()
+
+        db_stack = db_api.stack_get(self.ctx, stack_id, eager_load=True)
+        t = template.Template.load(self.ctx, self.tmpl_id,
+                                   db_stack.raw_template)
+        self.assertEqual(1, self.cache.hits)
+        self.assertEqual(self.t, t.t)
+        self.assertIn('template',
+                      sqlalchemy.inspect(db_stack.raw_template).unloaded)
+
+    def test_load_copies_resources(self):
+        t1 = template.Template.load(self.ctx, self.tmpl_id)
+        t1.add_resource(rsrc_defn.ResourceDefinition('bar',
+                                                     'GenericResourceType'))
+        t1.remove_resource('foo')
+
+        t2 = template.Template.load(self.ctx, self.tmpl_id)
+        self.assertEqual(['foo'], list(t2.t['Resources']))
+
+    def test_load_copies_files(self):
+        files = {'nested.yaml': 'heat_template_version: 2013-05-23'}
+        tmpl_id = template.Template(self.t, files=files).store(self.ctx)
+        t1 = template.Template.load(self.ctx, tmpl_id)
+        t1.files['provider.yaml'] = 'heat_template_version: 2013-05-23'
+
+        t2 = template.Template.load(self.ctx, tmpl_id)
+        self.assertEqual(1, self.cache.hits)
+        self.assertEqual(files, t2.files)
+
+    def test_store_invalidates(self):
+        t1 = template.Template.load(self.ctx, self.tmpl_id)
+        t1.add_resource(rsrc_defn.ResourceDefinition('bar',
+                                                     'GenericResourceType'))
+        t1.store(self.ctx)
+        self.assertEqual(0, len(self.cache))
+
+        t2 = template.Template.load(self.ctx, self.tmpl_id)
+        self.assertEqual(set(['foo', 'bar']), set(t2.t['Resources']))
+
+    def test_memory_budget(self):
+        self.cache.maxweight = 1
+        template.Template.load(self.ctx, self.tmpl_id)
+        self.assertEqual(0, len(self.cache))
@@ -132,6 +132,33 @@ Outputs: {}
         expected = {'heat_template_version': '2013-05-23'}
         self.assertEqual(expected, template_format.parse(tmpl_str))
 
+    def test_parse_cached(self):
+        tmpl_str = ('heat_template_version: 2013-05-23\n'
+                    'resources:\n'
+                    '  foo: {type: OS::Heat::None}\n')
+        with mock.patch.object(yaml, 'load', wraps=yaml.load) as yaml_load:
+            tpl = template_format.parse(tmpl_str)
+            tpl['resources']['foo']['type'] = 'Modified'
+            tpl2 = template_format.parse(six.text_type(tmpl_str))
+        self.assertEqual(1, yaml_load.call_count)
+        self.assertEqual('OS::Heat::None', tpl2['resources']['foo']['type'])
+        self.assertIsNot(tpl['resources'], tpl2['resources'])
+
+    def test_parse_error_not_cached(self):
+        tmpl_str = '{test'
+        self._parse_template(tmpl_str, 'line 1, column 1')
+        self._parse_template(tmpl_str, 'line 1, column 1')
+        self.assertEqual(0, len(template_format.parse_cache()))
+
+    def test_parse_cache_disabled(self):
+        config.cfg.CONF.set_override('template_parse_cache_size', 0)
+        self.patchobject(template_format, '_parse_cache', new=None)
+        tmpl_str = 'heat_template_version: 2013-05-23'
+        with mock.patch.object(yaml, 'load', wraps=yaml.load) as yaml_load:
+            template_format.parse(tmpl_str)
+            template_format.parse(tmpl_str)
+        self.assertEqual(2, yaml_load.call_count)
+
 
 class YamlParseExceptions(common.HeatTestCase):
 
@@ -12,6 +12,7 @@
 #    under the License.
 
 from oslo.config import cfg
+from oslo.utils import timeutils
 import requests
 from requests import exceptions
 import six
@@ -21,8 +22,10 @@ from heat.tests import common
 
 
 class Response(object):
-    def __init__(self, buf=''):
+    def __init__(self, buf='', headers=None, status_code=200):
         self.buf = buf
+        self.headers = headers or {}
+        self.status_code = status_code
 
     def iter_content(self, chunk_size=1):
         while self.buf:
@@ -130,3 +133,78 @@ class UrlFetchTest(common.HeatTestCase):
                                       urlfetch.get, url)
         self.assertIn("Template exceeds", six.text_type(exception))
         self.m.VerifyAll()
+
+    def test_http_cached(self):
+        url = 'http://example.com/template'
+        data = '{ "foo": "bar" }'
+        requests.get(url, stream=True).AndReturn(Response(data))
+        self.m.ReplayAll()
+        self.assertEqual(data, urlfetch.get(url))
+        self.assertEqual(data, urlfetch.get(url))
+        self.m.VerifyAll()
+
+    def test_http_cache_revalidate(self):
+        url = 'http://example.com/template'
+        data = '{ "foo": "bar" }'
+        new_data = '{ "foo": "baz" }'
+        headers = {'ETag': '"abc"',
+                   'Last-Modified': 'Wed, 21 Oct 2015 07:28:00 GMT'}
+        validators = {'If-None-Match': '"abc"',
+                      'If-Modified-Since': 'Wed, 21 Oct 2015 07:28:00 GMT'}
+        requests.get(url, stream=True).AndReturn(Response(data, headers))
+        requests.get(url, stream=True, headers=validators).AndReturn(
+            Response(status_code=304))
+        requests.get(url, stream=True, headers=validators).AndReturn(
+            Response(new_data))
+        requests.get(url, stream=True).AndReturn(Response(new_data))
+        self.m.ReplayAll()
+
+        timeutils.set_time_override()
+        self.addCleanup(timeutils.clear_time_override)
+        self.assertEqual(data, urlfetch.get(url))
+        timeutils.advance_time_seconds(61)
+        self.assertEqual(data, urlfetch.get(url))
+        timeutils.advance_time_seconds(61)
+        self.assertEqual(new_data, urlfetch.get(url))
+        timeutils.advance_time_seconds(61)
+        self.assertEqual(new_data, urlfetch.get(url))
+        self.m.VerifyAll()
+
+    def test_http_cache_content_addressed(self):
+        data = '{ "foo": "bar" }'
+        requests.get('http://example.com/a', stream=True).AndReturn(
+            Response(data))
+        requests.get('http://example.com/b', stream=True).AndReturn(
+            Response(data))
+        self.m.ReplayAll()
+        urlfetch.get('http://example.com/a')
+        urlfetch.get('http://example.com/b')
+        self.assertEqual(2, len(urlfetch.url_cache()))
+        self.assertEqual(1, len(urlfetch.content_cache()))
+        self.m.VerifyAll()
+
+    def test_http_cache_disabled(self):
+        cfg.CONF.set_override('url_fetch_cache_size', 0)
+        self.patchobject(urlfetch, '_url_cache', new=None)
+        self.patchobject(urlfetch, '_content_cache', new=None)
+        url = 'http://example.com/template'
+        data = '{ "foo": "bar" }'
+        requests.get(url, stream=True).AndReturn(Response(data))
+        requests.get(url, stream=True).AndReturn(Response(data))
+        self.m.ReplayAll()
+        self.assertEqual(data, urlfetch.get(url))
+        self.assertEqual(data, urlfetch.get(url))
+        self.m.VerifyAll()
+
+    def test_http_cache_no_ttl(self):
+        cfg.CONF.set_override('url_fetch_cache_ttl', 0)
+        url = 'http://example.com/template'
+        data = '{ "foo": "bar" }'
+        headers = {'ETag': '"abc"'}
+        requests.get(url, stream=True).AndReturn(Response(data, headers))
+        requests.get(url, stream=True).AndReturn(Response(data, headers))
+        self.m.ReplayAll()
+        self.assertEqual(data, urlfetch.get(url))
+        self.assertEqual(data, urlfetch.get(url))
+        self.assertEqual(0, len(urlfetch.url_cache()))
+        self.m.VerifyAll()
@@ -353,8 +353,8 @@ class AccessKeyTest(common.HeatTestCase):
         # Delete the resource data for secret_key, to test that existing
         # stacks which don't have the resource_data stored will continue
         # working via retrieving the keypair from keystone
-        db_api.resource_data_delete(rsrc, 'credential_id')
-        db_api.resource_data_delete(rsrc, 'secret_key')
+        rsrc.data_delete('credential_id')
+        rsrc.data_delete('secret_key')
         rs_data = db_api.resource_data_get_all(rsrc)
         self.assertEqual(0, len(rs_data.keys()))
 
@@ -634,6 +634,34 @@ class WatchRuleTest(common.HeatTestCase):
         # correctly get a list of all datapoints where watch_rule_id ==
         # watch_rule.id, so leave it as a single-datapoint test for now.
 
+    def test_evaluate_window_data(self):
+        rule = {u'EvaluationPeriods': u'1',
+                u'AlarmDescription': u'test alarm',
+                u'Period': u'300',
+                u'ComparisonOperator': u'GreaterThanThreshold',
+                u'Statistic': u'SampleCount',
+                u'Threshold': u'1',
+                u'MetricName': u'WindowMetric'}
+        wr = watchrule.WatchRule(context=self.ctx,
+                                 watch_name='window_test',
+                                 stack_id=self.stack_id, rule=rule)
+        wr.store()
+
+        now = timeutils.utcnow()
+        for age in (1000, 600, 100, 50):
+            db_api.watch_data_create(self.ctx, {
+                'data': {u'WindowMetric': {'Unit': 'Count', 'Value': 1}},
+                'watch_rule_id': wr.id,
+                'created_at': now - datetime.timedelta(seconds=age)})
+
+        self._action_set_stubs(now, action_expected=False)
+        self.wr = watchrule.WatchRule.load(self.ctx, 'window_test')
+        self.wr.last_evaluated = now - datetime.timedelta(seconds=301)
+        self.assertEqual([], self.wr.evaluate())
+        # Only the samples within the period are loaded from the DB
+        self.assertEqual(2, len(self.wr.watch_data))
+        self.assertEqual('ALARM', self.wr.state)
+
     def test_create_watch_data_suspended(self):
         rule = {u'EvaluationPeriods': u'1',
                 u'AlarmDescription': u'test alarm',